@@ -1,14 +1,31 @@
+import heapq
 import math
-import random
+import os
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pygame.sprite
 
+from bullets import AimedBurstEmitter, BulletPool, RingEmitter, SpiralEmitter
+from entities import EntityRegistry, move_entities
+from flocking import FlockSteering, wrap_delta
+from flow_field import FlowField
 from initial_set_load import *
+from rng_streams import RandomStreams
+from spatial_grid import UniformGrid
+from swarm_worker import SwarmSimulation
 
 
 # Global variable for score
 player_score = [0]
 
+# Global variable for collision check between projectiles and enemies
+# If True, rect-collided pairs are checked again with masks of their images (enabled by --pixel-collision)
+pixel_accurate_collision = [False]
+
 
 def get_distance(pos1, pos2):
     """
@@ -23,6 +40,236 @@ def get_distance(pos1, pos2):
     return math.sqrt(x_difference*x_difference + y_difference*y_difference)
 
 
+mask_cache = {}      # Masks of shared images, key: image
+
+
+def get_mask(image):
+    """
+    Get the mask of an image. Masks are built only once for each image.
+    Images should be shared ones (from scale_image, rotate_image, etc.), not rebuilt every frame.
+    :param image: image to get mask
+    :return: mask of the image
+    """
+
+    mask = mask_cache.get(image)
+    if mask is None:
+        mask = mask_cache[image] = pygame.mask.from_surface(image)
+    return mask
+
+
+def sweep_boxes(starts, deltas, half_sizes, rects):
+    """
+    Swept collision test between moving boxes (projectiles) and static rects (enemies).
+    Each projectile moves from start to start + delta during a frame.
+    Uses slab method on rects expanded by half size of projectile (Minkowski sum).
+    All arguments are broadcast against each other, so the test can run for all pairs ((P, 1, 2) and (1, E, 4) arrays)
+    or for selected candidate pairs ((N, 2) and (N, 4) arrays) at once.
+    :param starts: array of center positions at the start of the frame, last axis is (x, y)
+    :param deltas: array of movements during the frame, last axis is (x, y)
+    :param half_sizes: array of half sizes of projectiles, last axis is (half width, half height)
+    :param rects: array of enemy rects, last axis is (x, y, w, h)
+    :return: arrays of time of entering, time of exiting (both in 0~1 of the frame), and whether collided
+    """
+
+    # Expanded rect boundaries
+    lower = rects[..., :2] - half_sizes
+    upper = rects[..., :2] + rects[..., 2:] + half_sizes
+
+    # Times of crossing lower and upper boundaries for each axis
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_lower = (lower - starts) / deltas
+        t_upper = (upper - starts) / deltas
+    t_min = np.minimum(t_lower, t_upper)
+    t_max = np.maximum(t_lower, t_upper)
+
+    # Not moving along an axis: always inside or always outside the slab
+    not_moving = deltas == 0
+    inside = (lower < starts) & (starts < upper)
+    t_min = np.where(not_moving, np.where(inside, -np.inf, np.inf), t_min)
+    t_max = np.where(not_moving, np.where(inside, np.inf, -np.inf), t_max)
+
+    # Segment is in the expanded rect while it is in slabs of both axes
+    t_enter = t_min.max(axis=-1)
+    t_exit = t_max.min(axis=-1)
+    collided = (t_enter < t_exit) & (t_enter <= 1) & (t_exit >= 0)
+    return np.clip(t_enter, 0, 1), np.clip(t_exit, 0, 1), collided
+
+
+def find_candidate_pairs(starts, deltas, half_sizes, rects):
+    """
+    Broadphase of projectile-enemy collision. Enemies are sorted by left side of rects,
+    and only enemies in the x range of each projectile's swept segment become candidates.
+    :param starts: (P, 2) array of center positions of projectiles at the start of the frame
+    :param deltas: (P, 2) array of movements of projectiles during the frame
+    :param half_sizes: (P, 2) array of half sizes of projectiles
+    :param rects: (E, 4) array of enemy rects
+    :return: (N,) arrays of projectile indices and enemy indices of candidate pairs
+    """
+
+    # Sort enemies by left side
+    order = np.argsort(rects[:, 0], kind="stable")
+    lefts = rects[order, 0]
+    max_width = rects[:, 2].max()
+
+    # x range covered by each projectile during the frame
+    min_x = np.minimum(starts[:, 0], starts[:, 0] + deltas[:, 0]) - half_sizes[:, 0]
+    max_x = np.maximum(starts[:, 0], starts[:, 0] + deltas[:, 0]) + half_sizes[:, 0]
+
+    # Enemies whose left side is in (min_x - max_width, max_x) can overlap the range
+    first = np.searchsorted(lefts, min_x - max_width, side="left")
+    last = np.searchsorted(lefts, max_x, side="right")
+    counts = np.maximum(last - first, 0)
+
+    # Expand ranges into pairs
+    projectile_indices = np.repeat(np.arange(len(starts)), counts)
+    range_offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    enemy_indices = order[np.repeat(first, counts) + range_offsets]
+    return projectile_indices, enemy_indices
+
+
+def find_projectile_hits(starts, deltas, half_sizes, rects, enemy_deltas, full_test_limit=20000, chunk_size=64):
+    """
+    Find all colliding projectile-enemy pairs of a frame in bulk.
+    For moderate counts (pairs <= full_test_limit) all pairs are tested, otherwise only candidate pairs from broadphase.
+    Each pair is swept with relative movement (projectile movement minus enemy movement) against the enemy rect
+    at the end of the frame, so a fast projectile and a fast enemy moving toward each other never pass through.
+    :param starts: (P, 2) array of center positions of projectiles at the start of the frame
+    :param deltas: (P, 2) array of movements of projectiles during the frame
+    :param half_sizes: (P, 2) array of half sizes of projectiles
+    :param rects: (E, 4) array of enemy rects at the end of the frame
+    :param enemy_deltas: (E, 2) array of movements of enemies during the frame
+    :param full_test_limit: maximum number of pairs to test all pairs
+    :param chunk_size: number of projectiles tested at once in full test, to limit the size of temporary arrays
+    :return: list of (time of entering, time of exiting, projectile index, enemy index) sorted by time of impact
+    """
+
+    hits = []
+
+    if len(starts) * len(rects) <= full_test_limit:
+        # Full interval test of all pairs
+        for chunk_start in range(0, len(starts), chunk_size):
+            chunk = slice(chunk_start, chunk_start + chunk_size)
+            t_enter, t_exit, collided = sweep_boxes(starts[chunk, np.newaxis] + enemy_deltas[np.newaxis],
+                                                    deltas[chunk, np.newaxis] - enemy_deltas[np.newaxis],
+                                                    half_sizes[chunk, np.newaxis], rects[np.newaxis])
+            projectile_indices, enemy_indices = np.nonzero(collided)
+            hits.extend(zip(t_enter[projectile_indices, enemy_indices].tolist(),
+                            t_exit[projectile_indices, enemy_indices].tolist(),
+                            (projectile_indices + chunk_start).tolist(), enemy_indices.tolist()))
+    else:
+        # Test only candidate pairs, found with rects covering enemies during the whole frame
+        swept_rects = np.concatenate([rects[:, :2] - np.maximum(enemy_deltas, 0), rects[:, 2:] + np.abs(enemy_deltas)], axis=1)
+        projectile_indices, enemy_indices = find_candidate_pairs(starts, deltas, half_sizes, swept_rects)
+        t_enter, t_exit, collided = sweep_boxes(starts[projectile_indices] + enemy_deltas[enemy_indices],
+                                                deltas[projectile_indices] - enemy_deltas[enemy_indices],
+                                                half_sizes[projectile_indices], rects[enemy_indices])
+        hits.extend(zip(t_enter[collided].tolist(), t_exit[collided].tolist(),
+                        projectile_indices[collided].tolist(), enemy_indices[collided].tolist()))
+
+    hits.sort()
+    return hits
+
+
+def collide_pixel_swept(projectile, enemy, start, delta, t_enter, t_exit):
+    """
+    Check visible pixels of a moving projectile and an enemy overlap at any point of the swept segment
+    :param projectile: moving projectile sprite
+    :param enemy: enemy sprite, at its position at the end of the frame
+    :param start: center position of projectile at the start of the frame, relative to the enemy at the end of the frame
+    :param delta: movement of projectile relative to the enemy during the frame
+    :param t_enter: time of entering the enemy rect
+    :param t_exit: time of exiting the enemy rect
+    :return: whether two sprites collide
+    """
+
+    projectile_mask = get_mask(projectile.image)
+    enemy_mask = get_mask(enemy.image)
+
+    # Sample positions along the segment at intervals of half size of projectile
+    step = max(1, min(projectile.rect.w, projectile.rect.h) // 2)
+    n_samples = max(1, math.ceil((t_exit - t_enter) * math.hypot(delta[0], delta[1]) / step))
+    for n in range(n_samples + 1):
+        t = t_enter + (t_exit - t_enter) * n / n_samples
+        left = round(start[0] + delta[0] * t - projectile.rect.w / 2)
+        top = round(start[1] + delta[1] * t - projectile.rect.h / 2)
+        if projectile_mask.overlap(enemy_mask, (enemy.rect.x - left, enemy.rect.y - top)):
+            return True
+    return False
+
+
+def check_projectile_collisions():
+    """
+    Collision check of all player projectiles against all enemies, batched for a frame.
+    Called once per frame after all sprites are updated.
+
+    Positions of projectiles and rects and movements of enemies are gathered into arrays once, and movement of
+    each projectile relative to each enemy during the frame is tested as a segment, so fast projectiles never pass
+    through enemies, even fast ones.
+    Hits are processed in the order of time of impact:
+     - PlayerNormalBullet hits only the first enemy on its path.
+       An enemy already killed by damage of this frame (earlier bullets, cannonball splash) does not stop later bullets.
+     - PlayerEnergyCannonBall explodes at the first enemy on its path, giving splash damage.
+    :return: None
+    """
+
+    projectiles = [projectile for projectile in player_projectiles if projectile.can_hit()]
+    if not projectiles or not all_enemies:
+        return
+    enemies, rects, enemy_deltas = get_enemy_arrays()
+
+    # Gather positions into arrays
+    ends = np.array([projectile.rect.center for projectile in projectiles], dtype=float)
+    deltas = np.array([projectile.get_movement() for projectile in projectiles], dtype=float)
+    starts = ends - deltas
+    half_sizes = np.array([projectile.rect.size for projectile in projectiles], dtype=float) / 2
+
+    # Process hits in the order of time of impact
+    used_projectiles = set()
+    for t_enter, t_exit, i, j in find_projectile_hits(starts, deltas, half_sizes, rects, enemy_deltas):
+        projectile, enemy = projectiles[i], enemies[j]
+        if i in used_projectiles:
+            continue
+        pending_damage = damage_buffer.get_pending(enemy)
+        if isinstance(projectile, PlayerNormalBullet) and 0 < pending_damage and enemy.hp <= pending_damage:
+            continue        # Already killed by damage of this frame
+        if pixel_accurate_collision[0] and not collide_pixel_swept(projectile, enemy, starts[i] + enemy_deltas[j],
+                                                                   deltas[i] - enemy_deltas[j], t_enter, t_exit):
+            continue
+
+        # Place the projectile at the point of impact, for generating effects there
+        projectile.rect.center = (round(starts[i][0] + deltas[i][0] * t_enter), round(starts[i][1] + deltas[i][1] * t_enter))
+        projectile.hit(enemy)
+        used_projectiles.add(i)
+
+
+def check_beam_collisions():
+    """
+    Collision check of player's beam against all enemies, for a frame.
+    Called once per frame after all sprites are updated, only while the beam is on.
+
+    Enemy rects are binned into a uniform grid over the wrapping field (enemy_grid), and the beam walks only
+    the cells it passes through, so only enemies in those cells are tested against it.
+    Screen positions of sprites are inside the field around the screen, so a beam crossing the field boundary
+    continues into the cells on the other side, meeting enemies there at their shifted positions.
+    :return: None
+    """
+
+    beams = [sprite.beam_weapon for sprite in player_group if sprite.beam_weapon.firing]
+    if not beams or not all_enemies:
+        return
+    enemies, rects, _ = get_enemy_arrays()
+
+    enemy_grid.build(rects, margin=max(beam.half_width for beam in beams))
+    for beam in beams:
+        indices, rects = enemy_grid.query_segment(beam.start, beam.end)
+        if not len(indices):
+            continue
+        start = np.array(beam.start, dtype=float)
+        delta = np.array(beam.end, dtype=float) - start
+        _, _, collided = sweep_boxes(start, delta, np.full(2, beam.half_width, dtype=float), rects)
+        beam.hit([enemies[j] for j in np.unique(indices[collided]).tolist()])
+
+
 class FieldVibrationController:
     """
     Field offset controller for field vibrating effect.
@@ -37,6 +284,9 @@ class FieldVibrationController:
     Vibrating magnitude should be gradually decrease at a constant ratio(attenuation).
     So the attenuation constant will be less than 1.
     """
+    snapshot_fields = (("vibe_magnitude", "f8"), ("vibe_length", "i4"), ("vibe_frequency", "f8"), ("attenuation_const", "f8"),
+                       ("now_vibrating", "?"))
+    snapshot_refs = ("vibe_type",)
 
     def __init__(self):
         self.vibe_magnitude = 0         # Magnitude of vinration
@@ -95,11 +345,458 @@ class FieldVibrationController:
         return field_offset
 
 
+class DamageBuffer:
+    """
+    Collects damage events dealt to enemy sprites during a frame and applies them all at once.
+
+    Projectiles do not call get_damage() of enemy sprites directly.
+    Instead, they add (target, amount) events to this buffer on the main thread, summed per target as they come,
+    and all events are resolved in a single pass after all sprites are updated.
+    So an enemy sprite hit by several projectiles in one frame gets only one HP reduction,
+    one HP bar rebuild, and at most one death (coins, score, explosion).
+    """
+
+    def __init__(self):
+        self.total_damage = {}      # Total damage to each target during current frame, in the order of first hit
+
+    def add(self, target, amount):
+        """
+        Add a damage event to be resolved at the end of current frame
+        :param target: enemy sprite to get damage
+        :param amount: amount of damage
+        :return: None
+        """
+
+        self.total_damage[target] = self.total_damage.get(target, 0) + amount
+
+    def get_pending(self, target):
+        """
+        Get damage added to a target in current frame and not resolved yet
+        :param target: enemy sprite
+        :return: total pending damage
+        """
+
+        return self.total_damage.get(target, 0)
+
+    def resolve(self):
+        """
+        Sum up all damage per target and apply it once for each target
+        :return: number of enemy sprites got damaged in this frame
+        """
+
+        total_damage, self.total_damage = self.total_damage, {}
+
+        # Apply total damage only on targets still alive (not killed by touching player, etc.)
+        for target, damage in total_damage.items():
+            if target.alive():
+                target.get_damage(damage)
+
+        return len(total_damage)
+
+    def clear(self):
+        """
+        Discard all unresolved damage events
+        :return: None
+        """
+
+        self.total_damage.clear()
+
+
+shard_local = threading.local()     # Side effect buffer of the shard being updated on current thread
+
+
+def defer(function, *args, **kwargs):
+    """
+    Call a function having side effects on shared state (killing sprites, adding sprites to groups, score, etc.).
+    While a shard of sprites is updated by ShardedUpdater, the call is buffered and done at the barrier instead.
+    Otherwise the function is called immediately.
+    :param function: function to call
+    :param args: positional arguments of the function
+    :param kwargs: keyword arguments of the function
+    :return: None
+    """
+
+    buffer = getattr(shard_local, "buffer", None)
+    if buffer is None:
+        function(*args, **kwargs)
+    else:
+        buffer.append((function, args, kwargs))
+
+
+class ShardedUpdater:
+    """
+    Updates all sprites of a group, optionally partitioning them into shards updated on a thread pool.
+
+    Each sprite class chooses its update stage with class attribute "update_stage":
+     - 0: Updated serially on the main thread before the shards (player)
+     - 1: Updated in a shard. Touches only its own attributes, and defers other side effects with defer()
+     - 2: Updated serially on the main thread after the shards (default, for sprites reading other sprites)
+    Stage 1 sprites are partitioned by field x position, so a sprite and its HP bar or spawn effect
+    are in the same shard and updated in group order.
+    Deferred side effects of each shard are buffered, and merged in shard order at the barrier,
+    so the result does not depend on thread scheduling.
+
+    Unlike the serial update, stage 0 and 2 sprites are not updated in group order but before and after all shards,
+    and deferred kills take effect at the barrier. So the result is the same as the serial one only while stage 1
+    sprites touch nothing but their own state and do not draw random values in update().
+
+    On a free-threaded Python build, shards are updated on multiple cores.
+    On a GIL build it is slower than updating serially, so it is disabled by default.
+    """
+
+    def __init__(self, n_shards=None, enabled=None):
+        """
+        :param n_shards: number of shards (and worker threads), number of CPUs by default
+        :param enabled: whether update sprites in shards, True only on a free-threaded build by default
+        """
+
+        self.n_shards = n_shards or min(8, os.cpu_count() or 1)
+        if enabled is None:
+            enabled = not getattr(sys, "_is_gil_enabled", lambda: True)()
+        self.enabled = enabled
+        self.executor = None        # Thread pool, created at first sharded update
+
+    def update(self, group, *args):
+        """
+        Update all sprites in a group
+        :param group: sprite group to update
+        :param args: arguments passed to update() of each sprite
+        :return: None
+        """
+
+        if not self.enabled or self.n_shards < 2:
+            group.update(*args)
+            return
+
+        # Same as Group.update(), sprites added during the update are not updated in this frame
+        sprites = group.get_other_sprites() if isinstance(group, EntityGroup) else group.sprites()
+        stages = [[], [], []]
+        for sprite in sprites:
+            stages[getattr(sprite, "update_stage", 2)].append(sprite)
+
+        for sprite in stages[0]:
+            sprite.update(*args)
+
+        # Update shards in parallel, then apply deferred side effects in shard order
+        shards = self.partition(stages[1])
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.n_shards, thread_name_prefix="shard")
+        futures = [self.executor.submit(self.update_shard, shard, args) for shard in shards if shard]
+        for future in futures:
+            for function, function_args, function_kwargs in future.result():
+                function(*function_args, **function_kwargs)
+
+        for sprite in stages[2]:
+            sprite.update(*args)
+
+    def partition(self, sprites):
+        """
+        Partition sprites into shards by field x position, keeping group order in each shard
+        :param sprites: list of sprites to partition
+        :return: list of shards (lists of sprites)
+        """
+
+        shards = [[] for _ in range(self.n_shards)]
+        for sprite in sprites:
+            anchor = getattr(sprite, "parent_sprite", sprite)       # HP bar follows its parent sprite
+            shards[int(anchor.x_pos % field_width * self.n_shards // field_width)].append(sprite)
+        return shards
+
+    @staticmethod
+    def update_shard(shard, args):
+        """
+        Update sprites in a shard on a worker thread, buffering their side effects
+        :param shard: list of sprites to update
+        :param args: arguments passed to update() of each sprite
+        :return: list of deferred (function, args, kwargs) tuples
+        """
+
+        shard_local.buffer = buffer = []
+        try:
+            for sprite in shard:
+                sprite.update(*args)
+        finally:
+            shard_local.buffer = None
+        return buffer
+
+    def shutdown(self):
+        """
+        Stop worker threads
+        :return: None
+        """
+
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+class Component:
+    """
+    Descriptor of a sprite attribute stored in a component array of entity registry.
+
+    While the sprite is registered as an entity, the attribute reads and writes a row of the component array.
+    Otherwise (before added to all_sprites, or after killed), the value is kept in the sprite itself.
+    """
+
+    def __init__(self, component, index=None, convert=float):
+        """
+        :param component: name of component
+        :param index: index in a row of the component, None if a row is a single value
+        :param convert: function converting a NumPy value to the attribute type
+        """
+
+        self.component = component
+        self.index = index
+        self.convert = convert
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, sprite, owner=None):
+        if sprite is None:
+            return self
+        entity = sprite.__dict__.get("entity")
+        if entity is None:
+            try:
+                return sprite.__dict__[self.name]
+            except KeyError:
+                raise AttributeError(self.name) from None
+        archetype, row = entity_registry.locations[entity]
+        array = archetype.arrays[self.component]
+        return self.convert(array[row] if self.index is None else array[row, self.index])
+
+    def __set__(self, sprite, value):
+        entity = sprite.__dict__.get("entity")
+        if entity is None:
+            sprite.__dict__[self.name] = value
+            return
+        archetype, row = entity_registry.locations[entity]
+        if self.index is None:
+            archetype.arrays[self.component][row] = value
+        else:
+            archetype.arrays[self.component][row, self.index] = value
+
+
+class EntityAdapter(pygame.sprite.Sprite):
+    """
+    Base class of sprites keeping some attributes (Component descriptors) in entity registry.
+
+    The sprite is registered as an entity of its archetype while it is in all_sprites,
+    so systems can process its components in bulk, and other code keeps using it as an ordinary sprite.
+    Existing sprite classes can migrate to entity registry attribute by attribute in this way.
+    """
+    archetype = None        # Name of archetype registered in entity registry
+
+    def add_internal(self, group):
+        pygame.sprite.Sprite.add_internal(self, group)
+        if group is all_sprites:
+            self.register_entity()
+
+    def remove_internal(self, group):
+        pygame.sprite.Sprite.remove_internal(self, group)
+        if group is all_sprites:
+            self.unregister_entity()
+
+    def kill(self):
+        """
+        Remove this sprite from all groups, keeping its components in itself
+        :return: None
+        """
+
+        self.unregister_entity()
+        pygame.sprite.Sprite.kill(self)
+
+    def get_components(self):
+        """
+        Get Component descriptors of this class
+        :return: dict of attribute name and Component descriptor
+        """
+
+        return {name: descriptor for cls in reversed(type(self).__mro__) for name, descriptor in vars(cls).items()
+                if isinstance(descriptor, Component)}
+
+    def register_entity(self):
+        """
+        Move attributes of this sprite into a new entity
+        :return: None
+        """
+
+        if self.__dict__.get("entity") is not None:
+            return
+        archetype = entity_registry.archetypes[self.archetype]
+        values = {}
+        for name, descriptor in self.get_components().items():
+            value = self.__dict__.pop(name, 0)
+            if descriptor.index is None:
+                values[descriptor.component] = value
+            else:
+                row = values.setdefault(descriptor.component, np.zeros(archetype.components[descriptor.component][1]))
+                row[descriptor.index] = value
+        self.__dict__["entity"] = entity_registry.spawn(self.archetype, 1, **values)[0]
+
+    def unregister_entity(self):
+        """
+        Move attributes of this sprite back from its entity, and remove the entity
+        :return: None
+        """
+
+        entity = self.__dict__.pop("entity", None)
+        if entity is None or not entity_registry.contains(entity):
+            return          # Already removed by clearing entity registry
+        archetype, row = entity_registry.locations[entity]
+        for name, descriptor in self.get_components().items():
+            array = archetype.arrays[descriptor.component]
+            self.__dict__[name] = descriptor.convert(array[row] if descriptor.index is None else array[row, descriptor.index])
+        entity_registry.despawn([entity])
+
+
+class EntityGroup(pygame.sprite.Group):
+    """
+    Sprite group keeping its sprites not stored in entity registry (other than EntityAdapter) separately.
+
+    Sprites stored in entity registry are updated, drawn and collided by systems in bulk from component arrays,
+    so only the other sprites are visited one by one. update() updates only the other sprites.
+    """
+
+    def __init__(self, *sprites):
+        self.other_sprites = {}         # Sprites not stored in entity registry, in the order added
+        pygame.sprite.Group.__init__(self, *sprites)
+
+    def add_internal(self, sprite, layer=None):
+        pygame.sprite.Group.add_internal(self, sprite, layer)
+        if not isinstance(sprite, EntityAdapter):
+            self.other_sprites[sprite] = None
+
+    def remove_internal(self, sprite):
+        pygame.sprite.Group.remove_internal(self, sprite)
+        self.other_sprites.pop(sprite, None)
+
+    def get_other_sprites(self):
+        """
+        Get sprites not stored in entity registry
+        :return: list of sprites in the order added
+        """
+
+        return list(self.other_sprites)
+
+    def update(self, *args):
+        """
+        Update sprites not stored in entity registry. Entities are updated by systems instead.
+        :param args: arguments passed to update() of each sprite
+        :return: None
+        """
+
+        for sprite in self.get_other_sprites():
+            sprite.update(*args)
+
+
+class QualityGovernor:
+    """
+    Runtime controller which adjusts visual quality according to measured frame time.
+
+    Frame time (time spent for updating and drawing, without waiting for fps_clock) is averaged over
+    a rolling window and compared with the frame budget (1 / FPS).
+    If the average exceeds the budget, quality level steps down (higher level number, cheaper settings).
+    If the average stays well below the budget for a long time, quality level steps up again.
+    Different thresholds and lengths for stepping down/up (hysteresis) prevent oscillating between levels.
+
+    Settings of each quality level:
+     - hit_effect_interval: Only one of this number of hiteffects is generated
+     - explosion_frame_ratio: Ratio of explosion animation frames to display
+     - hud_refresh_interval: Texts of HUD are rerendered every this number of frames
+     - hp_bar_step: HP bars of enemies are rebuilt only if their length changes more than this number of pixels
+     - spawn_effect_frame_step: Spawneffect animation skips this number of frames at a time
+     - cull_coins: Draw only coins on the screen
+    """
+
+    def __init__(self, window=30, down_threshold=1.0, up_threshold=.7, up_frames=180):
+        self.frame_budget = 1 / FPS                 # Time allowed for a frame in seconds
+        self.frame_times = deque(maxlen=window)     # Measured frame times of recent frames
+        self.down_threshold = down_threshold        # Step down if average frame time > budget * down_threshold
+        self.up_threshold = up_threshold            # Step up if average frame time < budget * up_threshold
+        self.up_frames = up_frames                  # Frames to keep below up_threshold before stepping up
+        self.frames_below_up_threshold = 0
+        self.frames_at_level = 0                    # Frames measured since changing level
+
+        self.enabled = True
+        self.quality_levels = [
+            {"hit_effect_interval": 1, "explosion_frame_ratio": 1, "hud_refresh_interval": 1,
+             "hp_bar_step": 1, "spawn_effect_frame_step": 1, "cull_coins": False},     # Level 0: best quality
+            {"hit_effect_interval": 2, "explosion_frame_ratio": .75, "hud_refresh_interval": 2,
+             "hp_bar_step": 2, "spawn_effect_frame_step": 1, "cull_coins": False},     # Level 1
+            {"hit_effect_interval": 3, "explosion_frame_ratio": .5, "hud_refresh_interval": 4,
+             "hp_bar_step": 4, "spawn_effect_frame_step": 2, "cull_coins": True},      # Level 2
+            {"hit_effect_interval": 5, "explosion_frame_ratio": .35, "hud_refresh_interval": 6,
+             "hp_bar_step": 8, "spawn_effect_frame_step": 4, "cull_coins": True},      # Level 3: lowest quality
+        ]
+        self.level = 0
+        self.settings = self.quality_levels[self.level]     # Settings of current quality level
+
+    def update(self, frame_time):
+        """
+        Add measured frame time and step quality level down or up if necessary
+        :param frame_time: time spent for last frame in seconds
+        :return: None
+        """
+
+        self.frame_times.append(frame_time)        # Measured even if disabled, other controllers read it
+        if not self.enabled:
+            return
+
+        self.frames_at_level += 1
+        if self.frames_at_level < self.frame_times.maxlen:
+            return      # Not enough samples after starting or changing level
+
+        average_frame_time = sum(self.frame_times) / len(self.frame_times)
+
+        # Step down immediately when over budget
+        if average_frame_time > self.frame_budget * self.down_threshold:
+            self.frames_below_up_threshold = 0
+            if self.level < len(self.quality_levels) - 1:
+                self.set_level(self.level + 1)
+
+        # Step up only after staying well below budget for a long time
+        elif average_frame_time < self.frame_budget * self.up_threshold:
+            self.frames_below_up_threshold += 1
+            if self.frames_below_up_threshold >= self.up_frames and self.level > 0:
+                self.set_level(self.level - 1)
+        else:
+            self.frames_below_up_threshold = 0
+
+    def set_level(self, level):
+        """
+        Change quality level and restart measuring
+        :param level: new quality level
+        :return: None
+        """
+
+        self.level = level
+        self.settings = self.quality_levels[self.level]
+        self.frames_at_level = 0
+        self.frames_below_up_threshold = 0
+
+    def get_average_frame_time(self, n_frames):
+        """
+        Average frame time of most recent frames, for other controllers reacting to frame time
+        :param n_frames: number of recent frames to average
+        :return: average frame time in seconds, 0 if no frame is measured yet
+        """
+
+        recent_frame_times = list(self.frame_times)[-n_frames:]
+        return sum(recent_frame_times) / len(recent_frame_times) if recent_frame_times else 0
+
+
 # Player sprite
 class Player(pygame.sprite.Sprite):
     """
     A player class which user can control
     """
+    update_stage = 0                    # Updated before other sprites, on the main thread
+    snapshot_fields = (("hp", "f8"), ("got_damaged", "?"), ("blink_count", "i4"), ("current_damage_animation_frame", "i4"),
+                       ("mp", "f8"), ("coins", "i8"), ("x_pos", "f8"), ("y_pos", "f8"), ("max_x_speed", "f8"), ("max_y_speed", "f8"),
+                       ("x_speed", "f8"), ("y_speed", "f8"), ("current_imagenum", "i4"), ("dead", "?"))
+    snapshot_refs = ("target_pos",)
 
     def __init__(self):
         pygame.sprite.Sprite.__init__(self)
@@ -132,7 +829,7 @@ class Player(pygame.sprite.Sprite):
         self.acc = 1800
 
         # Image & rect attributes
-        self.norm_image = pygame.transform.scale(player_img, [30, 30])          # Normal image of Player
+        self.norm_image = scale_image(images.player_img, [30, 30])              # Normal image of Player
         self.hit_image = pygame.Surface([30, 30])                               # Image displayed only when got damaged
         self.hit_image.fill((255, 0, 0))                                        # Blink red
         self.image_list = [self.norm_image, self.hit_image]                     # Image list for faster image selection
@@ -150,6 +847,8 @@ class Player(pygame.sprite.Sprite):
         self.automatic_weapon = PlayerMinigun(self)
         # Manual weapon: Both aiming and attacking are controlled by mouse movement and clicking
         self.manual_weapon = PlayerEnergyCannonLauncher(self)
+        # Beam weapon: Aiming is controlled by mouse, and firing by holding space key
+        self.beam_weapon = PlayerLaser(self)
 
         # Death attribute
         self.dead = False
@@ -220,6 +919,7 @@ class Player(pygame.sprite.Sprite):
         # Use all equipped weapons
         self.automatic_weapon.update()
         self.manual_weapon.update(mouse_button_down)
+        self.beam_weapon.update(bool(keys[pygame.K_SPACE]))
 
         # Check collision with any of enemy sprites
         collided_enemies = pygame.sprite.spritecollide(self, all_enemies, False)    # Check collision with enemy sprite
@@ -303,7 +1003,7 @@ class TargetPointer(pygame.sprite.Sprite):
         pygame.sprite.Sprite.__init__(self)
 
         self.size = [30, 30]
-        self.image = pygame.transform.scale(target_pointer_img, self.size)
+        self.image = scale_image(images.target_pointer_img, self.size)
         self.rect = self.image.get_rect()
 
         target_pointer_group.add(self)
@@ -330,9 +1030,9 @@ class BossPointer(pygame.sprite.Sprite):
         self.targeting_from = targeting_from
         self.targeting_to = targeting_to
 
-        # Use two images for implementing rotation of arrow
-        self.image_orig = pygame.transform.scale(boss_pointer_img, (80, 15))    # Original image before rotating
-        self.image = self.image_orig.copy()                                     # Image to rotate
+        # Original image, and rotated one taken from the cache of rotated images
+        self.image_orig = scale_image(images.boss_pointer_img, (80, 15))        # Original image before rotating
+        self.image = self.image_orig
         self.rect = self.image.get_rect()
         self.rect.center = self.targeting_from.rect.center                      # Set position
 
@@ -356,20 +1056,133 @@ class BossPointer(pygame.sprite.Sprite):
         dist_y = self.targeting_to.rect.centery - self.targeting_from.rect.centery
         angle = math.atan2(dist_y, dist_x) * 180 / math.pi
 
-        # Rotate image and set position
-        new_image = pygame.transform.rotate(self.image_orig, -angle)    # Rotate image
+        # Rotate image (quantized angle, cached) and set position
+        new_image = rotate_image(self.image_orig, -angle)               # Rotate image
         old_center = self.rect.center                                   # Copy position of original image
         self.image = new_image                                          # Apply rotated image
         self.rect = self.image.get_rect()                               # Get new rect from rotated image
         self.rect.center = old_center                                   # Set position of new image rect
 
 
+class ThreatIndicators:
+    """
+    Arrows at the edge of the screen pointing to the nearest off-screen threats (big enemies, walls),
+    so player can see them coming before they enter the screen.
+
+    Positions and speeds of all threats are gathered into arrays, and distances to the screen,
+    predicted distances after a short time, and directions are computed for all of them at once.
+    The nearest few are selected with a partial sort. Arrows are taken from a list of images pre-rotated
+    at quantized angles, so no image is rotated while playing.
+    """
+
+    def __init__(self, threat_groups, max_count=8, max_distance=1500, lookahead=1., n_angles=90):
+        """
+        :param threat_groups: sprite groups of threats, sprites should have x_pos, y_pos, x_speed and y_speed
+        :param max_count: maximum number of arrows
+        :param max_distance: threats farther than this from the screen are not indicated
+        :param lookahead: seconds to predict positions, threats coming closer within this time are indicated earlier
+        :param n_angles: number of pre-rotated arrow images
+        """
+
+        self.threat_groups = threat_groups
+        self.max_count = max_count
+        self.max_distance = max_distance
+        self.lookahead = lookahead
+        self.n_angles = n_angles
+        self.half_screen = np.array([screen_width / 2, screen_height / 2])
+        self.inset = 30                 # Distance of arrow centers from the edge of screen
+
+        self.arrow_images = None        # Arrow image of each quantized angle, rotated at first update
+        self.arrow_offsets = None       # Offset from arrow center to top left of each image
+        self.blit_list = []             # Arrows to draw in current frame, replaced every update
+
+    def rotate_arrows(self):
+        """
+        Rotate arrow image for every quantized angle at once
+        :return: None
+        """
+
+        arrow = scale_image(images.boss_pointer_img, (40, 12))
+        self.arrow_images = [rotate_image(arrow, -360 * i / self.n_angles) for i in range(self.n_angles)]
+        self.arrow_offsets = np.array([[image.get_width() // 2, image.get_height() // 2] for image in self.arrow_images])
+
+    def update(self, player_pos):
+        """
+        Select nearest off-screen threats and place arrows toward them
+        :param player_pos: field position of player, at the center of screen
+        :return: None
+        """
+
+        if self.arrow_images is None:
+            self.rotate_arrows()
+
+        threats = [sprite for group in self.threat_groups for sprite in group if sprite in all_enemies]
+        if not threats:
+            self.blit_list = []
+            return
+
+        # Field positions and speeds. Those of sprites registered as entities are read from component arrays in bulk.
+        states = np.zeros((len(threats), 4))
+        rows_by_archetype = {}
+        for i, sprite in enumerate(threats):
+            location = entity_registry.locations.get(sprite.__dict__.get("entity"))
+            if location:
+                rows_by_archetype.setdefault(location[0], []).append((i, location[1]))
+            else:
+                states[i] = sprite.x_pos, sprite.y_pos, sprite.x_speed, sprite.y_speed
+        for archetype, pairs in rows_by_archetype.items():
+            indices, rows = np.array(pairs).T
+            states[indices, :2] = archetype.arrays["position"][rows]
+            states[indices, 2:] = archetype.arrays["velocity"][rows]
+
+        # Positions relative to player (center of screen) now and after lookahead
+        relative = wrap_delta(states[:, :2] - player_pos, (field_width, field_height))
+        predicted = relative + states[:, 2:] * self.lookahead
+
+        # Distance from screen rect, now and predicted. 0 if on the screen.
+        distances = np.hypot(*np.maximum(np.abs(relative) - self.half_screen, 0).T)
+        predicted_distances = np.hypot(*np.maximum(np.abs(predicted) - self.half_screen, 0).T)
+        scores = np.minimum(distances, predicted_distances)
+        candidates = np.flatnonzero((distances > 0) & (scores < self.max_distance))
+        if len(candidates) > self.max_count:
+            candidates = candidates[np.argpartition(scores[candidates], self.max_count)[:self.max_count]]
+        relative = relative[candidates]
+
+        # Arrow on the edge of screen along direction to the threat, with image of quantized angle
+        angles = np.arctan2(relative[:, 1], relative[:, 0])
+        indices = np.round(angles * self.n_angles / (2 * math.pi)).astype(int) % self.n_angles
+        with np.errstate(divide="ignore"):
+            ratios = np.min((self.half_screen - self.inset) / np.abs(relative), axis=1)
+        centers = self.half_screen + relative * ratios[:, np.newaxis]
+        topleft = (centers - self.arrow_offsets[indices]).astype(int)
+        images = self.arrow_images
+        self.blit_list = [(images[i], position) for i, position in zip(indices.tolist(), topleft.tolist())]
+
+    def get_blit_list(self):
+        """
+        Get arrows to draw
+        :return: list of (image, position) tuples to blit
+        """
+
+        return self.blit_list
+
+    def clear(self):
+        """
+        Remove all arrows
+        :return: None
+        """
+
+        self.blit_list = []
+
+
 class PlayerMinigun:
     """
     A weapon class which player sprite can use.
     Shoots one/multiple lines of small bullets.
     This is an abstract sprite and invisible on the screen.
     """
+    snapshot_fields = (("level", "i4"), ("aiming_angle", "f8"), ("passed_frames_from_last_attack", "i4"))
+    snapshot_refs = ("pos", "target_pos")
 
     def __init__(self, weapon_user: Player):
         self.user = weapon_user                     # User of this weapon (player)
@@ -419,6 +1232,8 @@ class PlayerNormalBullet(pygame.sprite.Sprite):
     Moves straight line from the player to aimed direction.
     Killed(disappears) when collided with enemy sprites and gives damage to them.
     """
+    update_stage = 1                    # Updated in a shard by ShardedUpdater
+    snapshot_fields = (("x_pos", "f8"), ("y_pos", "f8"), ("current_frame_num", "i4"), ("frames", "i4"))
 
     def __init__(self, fired_weapon, speed, angle, power):
         pygame.sprite.Sprite.__init__(self)
@@ -434,20 +1249,15 @@ class PlayerNormalBullet(pygame.sprite.Sprite):
 
         # Image & rect attributes
         self.size = [20, 10]
-        self.image_frame_list = player_normal_bullet_animation[::(60 // FPS)]           # Get image frames according to fps
+        self.image_frame_list = images.player_normal_bullet_animation[::(60 // FPS)]    # Get image frames according to fps
         self.n_frames = len(self.image_frame_list)                                      # Number of frames
 
-        # Rotate image towards moving direction
+        # Rotate image towards moving direction and scale it to half size (shared among bullets of similar angle)
         for n in range(self.n_frames):
-            rotated_image = pygame.transform.rotate(self.image_frame_list[n], -angle * 180 / math.pi)
-            self.image_frame_list[n] = rotated_image
-
-        # Get new rect object from rotated image
-        rotated_rect = self.image_frame_list[0].get_rect()
-        self.rotated_image_w, self.rotated_image_h = rotated_rect.w, rotated_rect.h
+            self.image_frame_list[n] = rotate_image(self.image_frame_list[n], -angle * 180 / math.pi, .5)
 
         self.current_frame_num = 0                                          # Variable for counting frames
-        self.image = pygame.transform.scale(self.image_frame_list[self.current_frame_num], [self.rotated_image_w // 2, self.rotated_image_h // 2])   # Get first image to display
+        self.image = self.image_frame_list[self.current_frame_num]          # Get first image to display
         self.rect = self.image.get_rect()
 
         # Set the sprite's screen position using field position and camera offset
@@ -475,22 +1285,10 @@ class PlayerNormalBullet(pygame.sprite.Sprite):
         """
 
         # Blink the image of bullet
-        self.image = pygame.transform.scale(self.image_frame_list[self.current_frame_num % self.n_frames], [self.rotated_image_w // 2, self.rotated_image_h // 2])
+        self.image = self.image_frame_list[self.current_frame_num % self.n_frames]
         self.current_frame_num += 1
 
-        if self.frames >= 5:
-            # Check collision with any of enemy sprites for bullets existed at least 5 frames
-            collided_enemies = pygame.sprite.spritecollide(self, all_enemies, False)    # Check collision with enemy sprite
-            if collided_enemies:                # If one or more sprite collided with bullet
-                enemy = collided_enemies[0]     # Only one enemy sprite will get damaged (Because bullet cannot deal splash damage).
-
-                # Damage value will be random, but has current power as mean value.
-                damage = self.power * random.uniform(0.5, 1.5)
-                enemy.get_damage(damage)
-                HitEffect(self)                 # Generate hiteffect
-                self.kill()                     # Delete the bullet after collision
-
-        # Move bullet
+        # Move bullet (collision with enemies along the movement is checked by check_projectile_collisions)
         self.x_pos += self.x_speed / FPS
         self.y_pos += self.y_speed / FPS
 
@@ -502,11 +1300,41 @@ class PlayerNormalBullet(pygame.sprite.Sprite):
 
         # Delete the bullet sprite when it goes too far from the center of screen
         if get_distance([screen_width // 2, screen_height // 2], self.rect.center) > 1500:
-            self.kill()
+            defer(self.kill)
 
         # Increase existed frames of this bullet
         self.frames += 1
 
+    def can_hit(self):
+        """
+        Check whether this bullet can hit enemies. Only bullets existed at least 5 frames can hit.
+        :return: whether this bullet can hit enemies
+        """
+
+        return self.alive() and self.frames > 5
+
+    def get_movement(self):
+        """
+        Movement of this bullet during a frame
+        :return: (x, y) movement in pixels
+        """
+
+        return self.x_speed / FPS, self.y_speed / FPS
+
+    def hit(self, enemy):
+        """
+        Give damage to an enemy sprite collided with this bullet, then delete the bullet
+        :param enemy: enemy sprite collided with this bullet
+        :return: damage dealt to the enemy
+        """
+
+        # Damage value will be random, but has current power as mean value.
+        damage = self.power * random_streams.combat.uniform(0.5, 1.5)
+        damage_buffer.add(enemy, damage)
+        effect_manager.add_hit_effect(self)     # Generate hiteffect
+        self.kill()                             # Delete the bullet after collision
+        return damage
+
 
 class PlayerEnergyCannonLauncher:
     """
@@ -514,6 +1342,9 @@ class PlayerEnergyCannonLauncher:
     Shoots large, exploding energy cannonball one by one.
     This is an abstract sprite and invisible on the screen.
     """
+    snapshot_fields = (("level", "i4"), ("aiming_angle", "f8"), ("remaining_cannonball_holding_frame", "i4"), ("overheated", "?"),
+                       ("remaining_cooltime_frames", "i4"))
+    snapshot_refs = ("holding_cannonball", "pos", "target_pos")
 
     def __init__(self, weapon_user: Player):
         self.user = weapon_user                     # User of this weapon (player)
@@ -599,6 +1430,8 @@ class PlayerEnergyCannonBall(pygame.sprite.Sprite):
     Killed(disappears) when collided with enemy sprites and gives direct damage to them with multiple explosion effect.
     It also attacks enemies within a specified range giving splash damage.
     """
+    snapshot_fields = (("x_pos", "f8"), ("y_pos", "f8"), ("x_speed", "f8"), ("y_speed", "f8"), ("size", "f8", (2,)),
+                       ("current_frame_num", "i4"), ("power", "f8"), ("shock_range", "f8"), ("charging", "?"))
 
     def __init__(self, fired_weapon, speed, max_power):
         pygame.sprite.Sprite.__init__(self)
@@ -614,10 +1447,10 @@ class PlayerEnergyCannonBall(pygame.sprite.Sprite):
 
         # Image & rect attributes
         self.size = [5, 5]
-        self.image_frame_list = player_energy_cannonball_animation[::(60 // FPS)]       # Get image frames according to fps
+        self.image_frame_list = images.player_energy_cannonball_animation[::(60 // FPS)]  # Get image frames according to fps
         self.n_frames = len(self.image_frame_list)                                      # Number of frames
         self.current_frame_num = 0                                                      # Variable for counting frames
-        self.image = pygame.transform.scale(self.image_frame_list[self.current_frame_num], self.size)   # Get first image to display
+        self.image = scale_image(self.image_frame_list[self.current_frame_num], self.size)              # Get first image to display
         self.rect = self.image.get_rect()
         x_offset = screen_width // 2 - field_width // 2
         y_offset = screen_height // 2 - field_height // 2
@@ -653,7 +1486,7 @@ class PlayerEnergyCannonBall(pygame.sprite.Sprite):
         """
 
         # Blink the image of cannonball
-        self.image = pygame.transform.scale(self.image_frame_list[self.current_frame_num % self.n_frames], [round(self.size[0]), round(self.size[1])])
+        self.image = scale_image(self.image_frame_list[self.current_frame_num % self.n_frames], self.size)
         self.current_frame_num += 1
 
         # Cannonball control
@@ -687,46 +1520,69 @@ class PlayerEnergyCannonBall(pygame.sprite.Sprite):
         self.rect.centerx = round(self.x_pos - camera_offset[0] - x_offset) % field_width + x_offset
         self.rect.centery = round(self.y_pos - camera_offset[1] - y_offset) % field_height + y_offset
 
-        # Attack enemies
-        # Check collision with any of enemy sprites
-        collided_enemies = pygame.sprite.spritecollide(self, all_enemies, False)
+        # Collision with enemies along the movement is checked by check_projectile_collisions
 
-        # If one or more enemy sprites touches cannonball
-        if collided_enemies:
-            # Apply full damage of cannonball on enemy which directly collided with cannonball
-            collided_enemies[0].get_damage(self.power)
+        # Delete the cannonball sprite when it goes too far from the center of screen
+        if get_distance([screen_width // 2, screen_height // 2], self.rect.center) > 1500:
+            self.kill()
 
-            # Applying splash damage on nearby enemies within shock range
-            current_shock_range = self.shock_range
+    def can_hit(self):
+        """
+        Check whether this cannonball can hit enemies. Cannonball explodes even while charging.
+        :return: whether this cannonball can hit enemies
+        """
 
-            # Check all enemy sprites whether it is in the shock range
-            for enemy in all_enemies:
-                distance_from_explosion = get_distance(self.rect.center, enemy.rect.center)     # Distance from cannonball to enemy
+        return self.alive()
 
-                # Apply partial damage of cannonball on all enemy sprites in the shock range
-                if distance_from_explosion <= current_shock_range:
-                    damage = (current_shock_range - distance_from_explosion) * self.power / current_shock_range
-                    enemy.get_damage(damage)
+    def get_movement(self):
+        """
+        Movement of this cannonball during a frame
+        :return: (x, y) movement in pixels
+        """
 
-            # Generate cluster explosion effect
-            Explosion(self, [round(s * 8) for s in self.size])                          # Generate center explosion first
+        if self.charging:
+            return 0, 0
+        return self.x_speed / FPS, self.y_speed / FPS
 
-            # Generate additional explosions
-            for _ in range(round(current_shock_range ** 2 / 20000)):                    # Number of explosions will be determined by the density of explosion
-                size_multiplier = random.uniform(4, 8)                                  # Random size of explosion
-                x_offset = random.uniform(-current_shock_range, current_shock_range)    # Random position of explosion (offset from center)
-                y_offset = random.uniform(-current_shock_range, current_shock_range)
-                Explosion(self, [round(s * size_multiplier) for s in self.size], offset=(x_offset, y_offset))   # Generate explosion with offset
+    def hit(self, collided_enemy):
+        """
+        Explode when touched an enemy sprite.
+        Gives full damage to the enemy and splash damage on nearby enemies, then delete the cannonball.
+        :param collided_enemy: enemy sprite directly collided with this cannonball
+        :return: damage dealt to the enemy directly collided
+        """
 
-            # Generate field shaking effect
-            field_vibrator.initialize(20, 90, frequency=30, vibe_type="s")
+        # Apply full damage of cannonball on enemy which directly collided with cannonball
+        damage_buffer.add(collided_enemy, self.power)
 
-            # Delete cannonball
-            self.kill()
+        # Applying splash damage on nearby enemies within shock range
+        current_shock_range = self.shock_range
 
-        # Delete the cannonball sprite when it goes too far from the center of screen
-        if get_distance([screen_width // 2, screen_height // 2], self.rect.center) > 1500:
-            self.kill()
+        # Check all enemy sprites whether it is in the shock range
+        for enemy in all_enemies:
+            distance_from_explosion = get_distance(self.rect.center, enemy.rect.center)     # Distance from cannonball to enemy
+
+            # Apply partial damage of cannonball on all enemy sprites in the shock range
+            if distance_from_explosion <= current_shock_range:
+                damage = (current_shock_range - distance_from_explosion) * self.power / current_shock_range
+                damage_buffer.add(enemy, damage)
+
+        # Generate cluster explosion effect
+        effect_manager.add_explosion(self, [round(s * 8) for s in self.size])       # Generate center explosion first
+
+        # Generate additional explosions
+        for _ in range(round(current_shock_range ** 2 / 20000)):                    # Number of explosions will be determined by the density of explosion
+            size_multiplier = random_streams.effects.uniform(4, 8)                                  # Random size of explosion
+            x_offset = random_streams.effects.uniform(-current_shock_range, current_shock_range)    # Random position of explosion (offset from center)
+            y_offset = random_streams.effects.uniform(-current_shock_range, current_shock_range)
+            effect_manager.add_explosion(self, [round(s * size_multiplier) for s in self.size], offset=(x_offset, y_offset))    # Generate explosion with offset
+
+        # Generate field shaking effect
+        field_vibrator.initialize(20, 90, frequency=30, vibe_type="s")
+
+        # Delete cannonball
+        self.kill()
+        return self.power
 
     def set_direction(self, angle):
         """
@@ -740,10 +1596,74 @@ class PlayerEnergyCannonBall(pygame.sprite.Sprite):
         self.charging = False       # Complete charging
 
 
+class PlayerLaser:
+    """
+    A weapon class which player sprite can use.
+    Fires a continuous beam toward the cursor while the trigger (space key) is held, consuming MP.
+    The beam passes through enemies, damaging every enemy along it each frame.
+    Hits are found by check_beam_collisions() after all sprites are updated.
+    """
+    snapshot_fields = (("level", "i4"), ("firing", "?"))
+    snapshot_refs = ("start", "end")
+
+    def __init__(self, weapon_user: Player):
+        self.user = weapon_user                     # User of this weapon (player)
+
+        self.level = 1                              # Level of this weapon
+        self.start = self.end = (0, 0)              # Screen positions of both ends of the beam
+        self.firing = False                         # Whether the beam is on in this frame
+
+        self.length = 1000                          # Length of the beam in pixels
+        self.half_width = 6                         # Half width of the beam, enemies touching it are hit
+        self.damage_per_second = 40                 # Damage dealt to each enemy on the beam
+        self.mp_per_second = 15                     # MP consumed while firing
+
+    def update(self, trigger_held):
+        """
+        Turn the beam on or off and aim it from player toward the target position
+        :param trigger_held: whether the trigger is held
+        :return: None
+        """
+
+        self.firing = trigger_held and self.user.mp > 0
+        if not self.firing:
+            return
+        self.user.mp = max(0, self.user.mp - self.mp_per_second / FPS)
+
+        # Beam of fixed length from player toward the target position
+        self.start = self.user.rect.center
+        relative_x = self.user.target_pos[0] - self.start[0]
+        relative_y = self.user.target_pos[1] - self.start[1]
+        aiming_angle = math.atan2(relative_y, relative_x)
+        self.end = (self.start[0] + self.length * math.cos(aiming_angle), self.start[1] + self.length * math.sin(aiming_angle))
+
+    def hit(self, enemies):
+        """
+        Deal damage of a frame to enemies on the beam
+        :param enemies: enemy sprites touching the beam
+        :return: None
+        """
+
+        for enemy in enemies:
+            damage_buffer.add(enemy, self.damage_per_second / FPS)
+
+    def draw(self, surface):
+        """
+        Draw the beam, a colored glow with a bright core
+        :param surface: surface to draw on
+        :return: None
+        """
+
+        pygame.draw.line(surface, (255, 60, 90), self.start, self.end, self.half_width * 2)
+        pygame.draw.line(surface, (255, 230, 240), self.start, self.end, max(1, self.half_width // 2))
+
+
 class SpawnEffect(pygame.sprite.Sprite):
     """
     An effect sprite generated right before an enemy appears.
     """
+    update_stage = 1                    # Updated in a shard by ShardedUpdater
+    snapshot_fields = (("current_frame_num", "i4"), ("complete", "?"))
 
     def __init__(self, pos, size):
         pygame.sprite.Sprite.__init__(self)
@@ -753,10 +1673,10 @@ class SpawnEffect(pygame.sprite.Sprite):
 
         # Size & image attributes
         self.size = size            # Spawneffect's size given by sprite to be generated
-        self.image_frame_list = spawneffect_animation[::(60 // FPS)]        # Get image frames according to fps
+        self.image_frame_list = images.spawneffect_animation[::(60 // FPS) * quality_governor.settings["spawn_effect_frame_step"]]  # Get image frames according to fps and quality
         self.n_frames = len(self.image_frame_list)                          # Number of frames
         self.current_frame_num = 0                                          # Variable for counting frames
-        self.image = pygame.transform.scale(self.image_frame_list[self.current_frame_num], self.size)   # Get first image to display
+        self.image = scale_image(self.image_frame_list[self.current_frame_num], self.size)   # Get first image to display
         self.rect = self.image.get_rect()
 
         # Update the sprite's screen position using foeld position and camera offset
@@ -791,18 +1711,20 @@ class SpawnEffect(pygame.sprite.Sprite):
         # Update image at each frame
         if self.current_frame_num < self.n_frames:
             # Update image if frames to display remains
-            self.image = pygame.transform.scale(self.image_frame_list[self.current_frame_num], self.size)
+            self.image = scale_image(self.image_frame_list[self.current_frame_num], self.size)
             self.current_frame_num += 1     # Increment frame number
         else:
             # Kill this effect if no new image to display remains
             self.complete = True
-            self.kill()
+            defer(self.kill)
 
 
 class HitEffect(pygame.sprite.Sprite):
     """
     An effect sprite generated when a bullet collide with enemy or player sprite
     """
+    update_stage = 1                    # Updated in a shard by ShardedUpdater
+    snapshot_fields = (("current_frame_num", "i4"), ("n_frames", "i4"))
 
     def __init__(self, trigger_sprite):
         pygame.sprite.Sprite.__init__(self)
@@ -812,10 +1734,10 @@ class HitEffect(pygame.sprite.Sprite):
 
         # Size & image attributes
         self.size = [48, 48]
-        self.image_frame_list = hiteffect_animation[::(60 // FPS)]          # Get image frames according to fps
+        self.image_frame_list = images.hiteffect_animation[::(60 // FPS)]   # Get image frames according to fps
         self.n_frames = len(self.image_frame_list)                          # Number of frames
         self.current_frame_num = 0                                          # Variable for counting frames
-        self.image = pygame.transform.scale(self.image_frame_list[self.current_frame_num], self.size)   # Get first image to display
+        self.image = scale_image(self.image_frame_list[self.current_frame_num], self.size)   # Get first image to display
         self.rect = self.image.get_rect()
 
         # Define the sprite's screen position
@@ -847,17 +1769,29 @@ class HitEffect(pygame.sprite.Sprite):
         # Update image at each frame
         if self.current_frame_num < self.n_frames:
             # Update image if frames to display remains
-            self.image = pygame.transform.scale(self.image_frame_list[self.current_frame_num], self.size)
+            self.image = scale_image(self.image_frame_list[self.current_frame_num], self.size)
             self.current_frame_num += 1     # Increment frame number
         else:
             # Kill this effect if no new image to display remains
-            self.kill()
+            defer(self.kill)
+
+    def shorten(self, n_frames):
+        """
+        Reduce the number of remaining animation frames
+        :param n_frames: maximum number of frames to display
+        :return: None
+        """
+
+        self.n_frames = min(self.n_frames, max(1, n_frames))
 
 
 class Explosion(pygame.sprite.Sprite):
     """
     An effect sprite generated when a enemy sprite killed or large projectiles (cannonballs, rockets, etc) exploded
     """
+    update_stage = 1                    # Updated in a shard by ShardedUpdater
+    snapshot_fields = (("x_pos", "f8"), ("y_pos", "f8"), ("size", "i4", (2,)), ("current_frame_num", "i4"), ("n_frames", "i4"))
+    snapshot_refs = ("image_frame_list",)
 
     def __init__(self, trigger_sprite, size, offset=(0, 0)):
         pygame.sprite.Sprite.__init__(self)
@@ -868,15 +1802,7 @@ class Explosion(pygame.sprite.Sprite):
         # Size & image attributes
         self.size = size
         self.n_frames = 0
-        # Select right size of explosion animation according to size
-        while self.n_frames <= 1:
-            if self.size[0] < 128:
-                self.image_frame_list = random.choice(explosion_animation_list_small)[::(60 // FPS)]        # Get image frames according to fps
-            elif self.size[0] < 256:
-                self.image_frame_list = random.choice(explosion_animation_list_medium)[::(60 // FPS)]       # Get image frames according to fps
-            else:
-                self.image_frame_list = random.choice(explosion_animation_list_large)[::(60 // FPS)]        # Get image frames according to fps
-            self.n_frames = len(self.image_frame_list)                          # Number of frames
+        self.select_animation()
         self.current_frame_num = 0                                          # Variable for counting frames
         self.shockwave_size = [round(self.size[0] * .7), round(self.size[1] * .7)]
         self.image = pygame.transform.scale(self.image_frame_list[self.current_frame_num], self.shockwave_size)       # Get first image(shockwave) to display
@@ -915,15 +1841,281 @@ class Explosion(pygame.sprite.Sprite):
             self.current_frame_num += 1     # Increment frame number
         else:
             # Kill this effect if no new image to display remains
-            self.kill()
+            defer(self.kill)
+
+    def select_animation(self):
+        """
+        Select right size of explosion animation according to size
+        :return: None
+        """
+
+        self.n_frames = 0
+        while self.n_frames <= 1:
+            if self.size[0] < 128:
+                self.image_frame_list = random_streams.effects.choice(images.explosion_animation_list_small)[::(60 // FPS)]  # Get image frames according to fps
+            elif self.size[0] < 256:
+                self.image_frame_list = random_streams.effects.choice(images.explosion_animation_list_medium)[::(60 // FPS)]  # Get image frames according to fps
+            else:
+                self.image_frame_list = random_streams.effects.choice(images.explosion_animation_list_large)[::(60 // FPS)]  # Get image frames according to fps
+            self.n_frames = len(self.image_frame_list)                          # Number of frames
+
+    def resize(self, size, center):
+        """
+        Change size and screen position of explosion which is not animated yet (used for merging explosions)
+        :param size: new size of explosion
+        :param center: new center position on screen
+        :return: None
+        """
+
+        self.size = size
+        self.select_animation()
+        self.shockwave_size = [round(self.size[0] * .7), round(self.size[1] * .7)]
+        self.image = pygame.transform.scale(self.image_frame_list[self.current_frame_num], self.shockwave_size)
+        self.rect = self.image.get_rect(center=center)
+
+        # Recalculate field position using screen position and camera offset
+        self.x_pos = self.rect.centerx + camera_offset[0]
+        self.y_pos = self.rect.centery + camera_offset[1]
+
+    def shorten(self, n_frames):
+        """
+        Reduce the number of remaining animation frames
+        :param n_frames: maximum number of frames to display
+        :return: None
+        """
+
+        self.n_frames = min(self.n_frames, max(2, n_frames))
+
+
+class EffectManager:
+    """
+    Budget controller for visual effect sprites (explosions and hiteffects).
+
+    Every effect is generated through this class instead of calling Explosion or HitEffect directly.
+    Number of live effect sprites never exceeds max_effects.
+    Each effect has a priority: larger and on-screen effects are more important than small or off-screen ones.
+
+    Under pressure (live effects more than merge_ratio of the budget):
+     - New explosion overlapping with another one generated in the same frame is merged into a larger single explosion
+     - New off-screen effects are generated with shortened animation
+
+    When the budget is full, the new effect replaces the least important live effect,
+    or is dropped if it is the least important one. Live effects are ranked in a heap at the first replacement
+    of a frame, and later replacements in the same frame pop from it, instead of scanning all live effects each time.
+    """
+
+    def __init__(self, max_effects=150, merge_ratio=.5, offscreen_weight=.25, max_merged_size=512):
+        self.max_effects = max_effects              # Maximum number of live effect sprites
+        self.merge_ratio = merge_ratio              # Ratio of budget to start merging and shortening effects
+        self.offscreen_weight = offscreen_weight    # Priority multiplier for effects out of screen
+        self.max_merged_size = max_merged_size      # Merged explosion cannot be larger than this size
 
+        self.screen_rect = pygame.Rect(0, 0, screen_width, screen_height)
+        self.fresh_explosions = []                  # Explosions generated in current frame, candidates for merging
+        self.skipped_hit_effects = 0                # Hiteffects skipped by quality setting since last generated one
+        self.ranking = None                         # Heap of (priority, order, effect), built when first needed in a frame
+        self.ranked_priorities = {}                 # Latest priority of each ranked effect, older heap entries are stale
+        self.rank_count = 0                         # Order of heap entries, breaks ties of priority
 
-class StraightLineMover(pygame.sprite.Sprite):
+        # Statistics for the current frame
+        self.merged_count = 0
+        self.dropped_count = 0
+
+    def update(self):
+        """
+        Start a new frame. Explosions generated in previous frame cannot be merged anymore.
+        :return: None
+        """
+
+        self.fresh_explosions.clear()
+        self.merged_count = 0
+        self.dropped_count = 0
+        self.ranking = None                 # Effects moved on the screen, so rank them again when needed
+        self.ranked_priorities.clear()
+
+    def live_count(self):
+        """
+        Number of effect sprites currently alive
+        :return: number of live effects
+        """
+
+        return len(explosion_group) + len(hiteffect_group)
+
+    def priority(self, center, size):
+        """
+        Calculate priority of an effect. Larger and on-screen effects have higher priority.
+        :param center: center position of effect on screen
+        :param size: size of effect
+        :return: priority value
+        """
+
+        half_w, half_h = size[0] // 2, size[1] // 2
+        on_screen = -half_w < center[0] < self.screen_rect.w + half_w and -half_h < center[1] < self.screen_rect.h + half_h
+        return size[0] * size[1] * (1 if on_screen else self.offscreen_weight)
+
+    def rank(self, effect, priority):
+        """
+        Put an effect generated or resized in current frame into the ranking, if it is built
+        :param effect: effect sprite
+        :param priority: priority of the effect
+        :return: None
+        """
+
+        if self.ranking is not None:
+            self.rank_count += 1
+            heapq.heappush(self.ranking, (priority, self.rank_count, effect))
+            self.ranked_priorities[effect] = priority
+
+    def make_room(self, new_priority):
+        """
+        Free one slot of the budget by killing the least important live effect, if it is less important than new one
+        :param new_priority: priority of new effect to generate
+        :return: whether a slot is freed
+        """
+
+        # Rank all live effects once per frame
+        if self.ranking is None:
+            self.ranking = []
+            for effect in explosion_group.sprites() + hiteffect_group.sprites():
+                self.rank_count += 1
+                priority = self.priority(effect.rect.center, effect.size)
+                self.ranking.append((priority, self.rank_count, effect))
+                self.ranked_priorities[effect] = priority
+            heapq.heapify(self.ranking)
+
+        while self.ranking:
+            least_priority, _, least_effect = self.ranking[0]
+            if not least_effect.alive() or self.ranked_priorities.get(least_effect) != least_priority:
+                heapq.heappop(self.ranking)         # Killed, or resized after ranked
+                continue
+            if least_priority >= new_priority:
+                return False
+            heapq.heappop(self.ranking)
+            del self.ranked_priorities[least_effect]
+            if least_effect in self.fresh_explosions:
+                self.fresh_explosions.remove(least_effect)
+            least_effect.kill()
+            return True
+        return False
+
+    def add_explosion(self, trigger_sprite, size, offset=(0, 0)):
+        """
+        Generate an explosion within the budget
+        :param trigger_sprite: projectile or enemy sprite generating this effect
+        :param size: size of explosion
+        :param offset: offset from the center of trigger sprite
+        :return: generated (or merged) Explosion instance, None if dropped
+        """
+
+        center = (trigger_sprite.rect.centerx + offset[0], trigger_sprite.rect.centery + offset[1])
+        live_count = self.live_count()
+        under_pressure = live_count >= self.max_effects * self.merge_ratio
+
+        # Merge into overlapping explosion generated in the same frame
+        if under_pressure:
+            for explosion in self.fresh_explosions:
+                if explosion.current_frame_num == 0 and \
+                        get_distance(explosion.rect.center, center) < (explosion.size[0] + size[0]) / 4:
+                    self.merge(explosion, center, size)
+                    self.merged_count += 1
+                    return explosion
+
+        # Check budget
+        new_priority = self.priority(center, size)
+        if live_count >= self.max_effects and not self.make_room(new_priority):
+            self.dropped_count += 1
+            return None
+
+        explosion = Explosion(trigger_sprite, size, offset)
+        explosion.shorten(round(explosion.n_frames * quality_governor.settings["explosion_frame_ratio"]))
+        if under_pressure and new_priority < size[0] * size[1]:
+            explosion.shorten(explosion.n_frames // 2)      # Off-screen explosion is shortened
+        self.fresh_explosions.append(explosion)
+        self.rank(explosion, new_priority)
+        return explosion
+
+    def add_hit_effect(self, trigger_sprite):
+        """
+        Generate a hiteffect within the budget
+        :param trigger_sprite: bullet sprite generating this effect
+        :return: generated HitEffect instance, None if dropped
+        """
+
+        # Generate only one of several hiteffects at low quality
+        self.skipped_hit_effects += 1
+        if self.skipped_hit_effects < quality_governor.settings["hit_effect_interval"]:
+            return None
+        self.skipped_hit_effects = 0
+
+        live_count = self.live_count()
+        new_priority = self.priority(trigger_sprite.rect.center, [48, 48])
+        if live_count >= self.max_effects and not self.make_room(new_priority):
+            self.dropped_count += 1
+            return None
+
+        hit_effect = HitEffect(trigger_sprite)
+        if live_count >= self.max_effects * self.merge_ratio and new_priority < 48 * 48:
+            hit_effect.shorten(hit_effect.n_frames // 2)    # Off-screen hiteffect is shortened
+        self.rank(hit_effect, new_priority)
+        return hit_effect
+
+    def merge(self, explosion, center, size):
+        """
+        Merge a new explosion into an existing one. Merged explosion covers the area of both explosions.
+        :param explosion: existing explosion to grow
+        :param center: center of new explosion on screen
+        :param size: size of new explosion
+        :return: None
+        """
+
+        # Area-weighted center of two explosions
+        old_area = explosion.size[0] * explosion.size[1]
+        new_area = size[0] * size[1]
+        merged_center = ((explosion.rect.centerx * old_area + center[0] * new_area) / (old_area + new_area),
+                         (explosion.rect.centery * old_area + center[1] * new_area) / (old_area + new_area))
+
+        # Merged explosion has the sum of areas of two explosions
+        merged_size = [min(self.max_merged_size, round(math.sqrt(explosion.size[i] ** 2 + size[i] ** 2))) for i in range(2)]
+        explosion.resize(merged_size, (round(merged_center[0]), round(merged_center[1])))
+        self.rank(explosion, self.priority(explosion.rect.center, explosion.size))
+
+    def clear(self):
+        """
+        Forget all explosions generated in current frame
+        :return: None
+        """
+
+        self.fresh_explosions.clear()
+        self.ranking = None
+        self.ranked_priorities.clear()
+
+
+class StraightLineMover(EntityAdapter):
     """
     Enemy sprite
     Moves only through stright line, does not attack player.
     """
 
+    # Field position and speed are moved by move_entities() in bulk. Sprites are placed, updated, drawn and
+    # collided in bulk too, by place_enemy_entities(), update_enemy_entities(), get_enemy_blit_list() and get_enemy_arrays()
+    archetype = "straight_line_mover"
+    x_pos = Component("position", 0)
+    y_pos = Component("position", 1)
+    x_speed = Component("velocity", 0)
+    y_speed = Component("velocity", 1)
+    moving = Component("moving", convert=bool)      # False while spawning or simulated in worker process
+    spawning = Component("spawning", convert=bool)
+    got_damaged = Component("got_damaged", convert=bool)
+    image = Component("image", convert=lambda image: image)
+
+    # Other attributes changed during game play are components too, so rewind snapshots copy component arrays
+    # instead of attributes of every sprite
+    hp = Component("hp")
+    blink_count = Component("blink_count", convert=int)
+    current_damage_animation_frame = Component("damage_animation_frame", convert=int)
+    current_imagenum = Component("imagenum", convert=int)
+    hp_bar = Component("hp_bar", convert=lambda hp_bar: hp_bar)
+
     def __init__(self, hp, speed, size, touch_damage, norm_image, hit_image, coin_amount, score):
         pygame.sprite.Sprite.__init__(self)
 
@@ -935,26 +2127,27 @@ class StraightLineMover(pygame.sprite.Sprite):
         self.frames_per_blink = FPS // 30       # Blinking animation will be displayed at 30fps
         self.current_damage_animation_frame = 0
         self.hp_bar = None                      # HP bar of this sprite (currently not displayed)
+        self.swarm_slot = None                  # Slot in swarm simulation, None if this sprite moves by itself
 
         # Position and speed attributes
         self.x_pos = self.y_pos = 0                             # Field position, will be determined after screen position is defined
         self.speed = speed                                      # Moves at a fixed random speed
-        self.direction = random.uniform(-math.pi, math.pi)      # Moves towards a fixed, random direction in radians
+        self.direction = random_streams.spawn.uniform(-math.pi, math.pi)      # Moves towards a fixed, random direction in radians
         self.x_speed = self.speed * math.cos(self.direction)    # Calculate x-direction speed using trigonometry
         self.y_speed = self.speed * math.sin(self.direction)    # Same as x_speed
 
         # Size & image attributes
         self.size = size
-        self.norm_image = pygame.transform.scale(norm_image, self.size)         # Normal image of StraightLineMover instance
-        self.hit_image = pygame.transform.scale(hit_image, self.size)           # Image displayed only when got damaged, slightly brighter than normal one
+        self.norm_image = scale_image(norm_image, self.size)                    # Normal image of StraightLineMover instance
+        self.hit_image = scale_image(hit_image, self.size)                      # Image displayed only when got damaged, slightly brighter than normal one
         self.image_list = [self.norm_image, self.hit_image]                     # Image list for faster image selection
         self.current_imagenum = 0
         self.image = self.image_list[self.current_imagenum]                     # Initially set current image to normal image
         self.rect = self.image.get_rect()
 
         # Define the sprite's screen position
-        self.rect.center = (random.randrange(0, field_width) + screen_width // 2 - field_width // 2,
-                            random.randrange(0, field_height) + screen_height // 2 - field_height // 2)
+        self.rect.center = (random_streams.spawn.randrange(0, field_width) + screen_width // 2 - field_width // 2,
+                            random_streams.spawn.randrange(0, field_height) + screen_height // 2 - field_height // 2)
 
         # Calculate field position using screen position and camera offset
         self.x_pos = self.rect.centerx + camera_offset[0]
@@ -970,18 +2163,19 @@ class StraightLineMover(pygame.sprite.Sprite):
         # Score attribute
         self.score = score
 
+        # Attribute to check whether spawneffect animation is complete
+        self.spawning = True
+        self.moving = False
+
         # Add this sprite to sprite groups
         all_sprites.add(self)
 
-        # Attribute to check whether spawneffect animation is complete
-        self.spawning = True
         self.spawneffect = SpawnEffect([self.x_pos, self.y_pos], self.size)   # Generate spawneffect
 
-    def update(self, curspos, mouse_button_down):
+    def update_state(self):
         """
-        Move sprite by updating position. Does nothing until spawneffect animation ends.
-        :param curspos: current cursor position on screen
-        :param mouse_button_down: variable to check holding mouse button
+        Start moving after spawneffect animation ends, and blink after got damaged.
+        Called by update_enemy_entities() only while spawning or blinking, instead of update() of every sprite.
         :return: None
         """
 
@@ -989,32 +2183,32 @@ class StraightLineMover(pygame.sprite.Sprite):
         if self.spawning:
             if self.spawneffect.complete:
                 self.spawning = False
-                all_enemies.add(self)       # Add sprite to enemy sprite group to draw
-        else:
-            # Deal with damage event
-            if self.got_damaged:
-                if self.current_damage_animation_frame % self.frames_per_blink == 0:
-                    self.current_imagenum = (self.current_imagenum + 1) % 2     # Change imagenum to 0 or 1
-                    self.blink_count -= 1                                       # Reduce remaining blinking counts
-                    self.image = self.image_list[self.current_imagenum]     # Set the image according to imagenum
+                self.moving = True              # Moved by move_entities() from next frame
+                defer(all_enemies.add, self)    # Add sprite to enemy sprite group to draw
+                defer(join_swarm, self)         # Start moving in swarm simulation if running
+        else:
+            # Deal with damage event
+            self.update_damage_animation()
 
-                self.current_damage_animation_frame += 1                    # Count frames passed from got damaged
+    def update_damage_animation(self):
+        """
+        Blink after got damaged
+        :return: None
+        """
 
-                # If blinking animation ends
-                if self.blink_count == 0:
-                    self.current_imagenum = 0       # Set the image to normal one
-                    self.got_damaged = False        # No blinking until getting another damage
-                    self.image = self.image_list[self.current_imagenum]     # Set the image according to imagenum
+        if self.got_damaged:
+            if self.current_damage_animation_frame % self.frames_per_blink == 0:
+                self.current_imagenum = (self.current_imagenum + 1) % 2     # Change imagenum to 0 or 1
+                self.blink_count -= 1                                       # Reduce remaining blinking counts
+                self.image = self.image_list[self.current_imagenum]     # Set the image according to imagenum
 
-            # Update position
-            self.x_pos += self.x_speed / FPS
-            self.y_pos += self.y_speed / FPS
+            self.current_damage_animation_frame += 1                    # Count frames passed from got damaged
 
-        # Update the sprite's screen position using field position and camera offset
-        x_offset = screen_width // 2 - field_width // 2
-        y_offset = screen_height // 2 - field_height // 2
-        self.rect.centerx = round(self.x_pos - camera_offset[0] - x_offset) % field_width + x_offset
-        self.rect.centery = round(self.y_pos - camera_offset[1] - y_offset) % field_height + y_offset
+            # If blinking animation ends
+            if self.blink_count == 0:
+                self.current_imagenum = 0       # Set the image to normal one
+                self.got_damaged = False        # No blinking until getting another damage
+                self.image = self.image_list[self.current_imagenum]     # Set the image according to imagenum
 
     def get_damage(self, damage):
         """
@@ -1029,14 +2223,34 @@ class StraightLineMover(pygame.sprite.Sprite):
 
         # Apply damage by reducing HP, or call death() if HP <= 0
         self.hp -= damage
-        # If HP bar already exists, delete it and generate new HP bar.
-        if self.hp_bar:
-            self.hp_bar.kill()
+        # Refresh HP bar, or delete it if HP <= 0
         if self.hp > 0:
-            self.hp_bar = HPBar(self)
+            self.hp_bar = refresh_hp_bar(self)
         else:
+            if self.hp_bar:
+                self.hp_bar.kill()
             self.death()
 
+    def register_entity(self):
+        """
+        Move attributes of this sprite into a new entity, which also refers to this sprite for placing it in batches
+        :return: None
+        """
+
+        EntityAdapter.register_entity(self)
+        entity_registry.set(self.entity, "sprite", self)
+        entity_registry.set(self.entity, "rect", tuple(self.rect))
+        entity_registry.set(self.entity, "swarm_slot", -1 if self.swarm_slot is None else self.swarm_slot)
+
+    def kill(self):
+        """
+        Remove this sprite from all groups and from swarm simulation
+        :return: None
+        """
+
+        leave_swarm(self)
+        EntityAdapter.kill(self)
+
     def death(self):
         """
         Generate explosion effect and coins/item, then delete sprite
@@ -1055,7 +2269,7 @@ class StraightLineMover(pygame.sprite.Sprite):
 
         # Generate explosion animation three times as big as self, then killed
         explode_size = [self.size[0] * 3, self.size[1] * 3]
-        Explosion(self, explode_size)
+        effect_manager.add_explosion(self, explode_size)
         self.kill()
 
 
@@ -1070,11 +2284,11 @@ class StraightLineMover1(StraightLineMover):
         StraightLineMover.__init__(
             self,
             hp=1,
-            speed=random.uniform(300, 500),
+            speed=random_streams.spawn.uniform(300, 500),
             size=[30, 30],
             touch_damage=15,
-            norm_image=straight_line_mover1_img,
-            hit_image=straight_line_mover1_hit_img,
+            norm_image=images.straight_line_mover1_img,
+            hit_image=images.straight_line_mover1_hit_img,
             coin_amount=15,
             score=10
         )
@@ -1092,11 +2306,11 @@ class StraightLineMover2(StraightLineMover):
         StraightLineMover.__init__(
             self,
             hp=5,
-            speed=random.uniform(200, 350),
+            speed=random_streams.spawn.uniform(200, 350),
             size=[50, 50],
             touch_damage=45,
-            norm_image=straight_line_mover2_img,
-            hit_image=straight_line_mover2_hit_img,
+            norm_image=images.straight_line_mover2_img,
+            hit_image=images.straight_line_mover2_hit_img,
             coin_amount=22,
             score=30
         )
@@ -1114,17 +2328,187 @@ class StraightLineMover3(StraightLineMover):
         StraightLineMover.__init__(
             self,
             hp=20,
-            speed=random.uniform(100, 250),
+            speed=random_streams.spawn.uniform(100, 250),
             size=[100, 100],
             touch_damage=143,
-            norm_image=straight_line_mover3_img,
-            hit_image=straight_line_mover3_hit_img,
+            norm_image=images.straight_line_mover3_img,
+            hit_image=images.straight_line_mover3_hit_img,
             coin_amount=43,
             score=100
         )
         StraightLineMover3.group.add(self)
 
 
+class SteeredMover(StraightLineMover):
+    """
+    Base class of enemy sprites steered in batches by a system (flock simulation, pursuit simulation).
+    """
+
+    # Maximum speed is a component too, steering clamps velocity of each sprite to it
+    speed = Component("speed")
+
+
+def place_entity_sprites(archetype):
+    """
+    Set screen positions of all sprites of an archetype at once, using field position and camera offset
+    in the same way as other sprites. Rect component is updated too, for drawing and collision checks in bulk.
+    :param archetype: archetype having position, rect and sprite components
+    :return: None
+    """
+
+    offset = np.array([screen_width // 2 - field_width // 2, screen_height // 2 - field_height // 2])
+    centers = (np.round(archetype.view("position") - camera_offset - offset) % (field_width, field_height) + offset).astype(int)
+    rects = archetype.view("rect")
+    rects[:, :2] = centers - rects[:, 2:] // 2      # Same as setting center of pygame.Rect
+    for sprite, topleft in zip(archetype.view("sprite").tolist(), rects[:, :2].tolist()):
+        sprite.rect.topleft = topleft
+
+
+class Flocker(SteeredMover):
+    """
+    Enemy sprite
+    Flies in a flock with other flockers (boids), keeping apart from, aligned with and close to its neighbors,
+    and chases player. All flockers are steered in batches by flock_simulation.
+    """
+    archetype = "flocker"
+
+
+class Flocker1(Flocker):
+    """
+    A child class that inherited Flocker class
+    Has 1 HP, 20x20 pixel size, -10 touch damage, and speed of 280~340 pixels/sec.
+    """
+    group = pygame.sprite.Group()       # Sprite group for Flocker1 sprites
+
+    def __init__(self):
+        Flocker.__init__(
+            self,
+            hp=1,
+            speed=random_streams.spawn.uniform(280, 340),
+            size=[20, 20],
+            touch_damage=10,
+            norm_image=images.straight_line_mover1_img,
+            hit_image=images.straight_line_mover1_hit_img,
+            coin_amount=10,
+            score=5
+        )
+        Flocker1.group.add(self)
+
+
+class Flocker2(Flocker):
+    """
+    A child class that inherited Flocker class
+    Has 3 HP, 34x34 pixel size, -30 touch damage, and speed of 220~280 pixels/sec.
+    """
+    group = pygame.sprite.Group()       # Sprite group for Flocker2 sprites
+
+    def __init__(self):
+        Flocker.__init__(
+            self,
+            hp=3,
+            speed=random_streams.spawn.uniform(220, 280),
+            size=[34, 34],
+            touch_damage=30,
+            norm_image=images.straight_line_mover2_img,
+            hit_image=images.straight_line_mover2_hit_img,
+            coin_amount=15,
+            score=20
+        )
+        Flocker2.group.add(self)
+
+
+class FlockSimulation:
+    """
+    System for all flockers, run once per frame after move_entities() moved them.
+
+    Steers velocities of all flockers for the next frame, using component arrays of the flocker archetype directly.
+    """
+
+    def __init__(self):
+        self.steering = FlockSteering((field_width, field_height))
+
+    def update(self, target):
+        """
+        Steer flockers
+        :param target: field position flockers chase (player position)
+        :return: None
+        """
+
+        archetype = entity_registry.archetypes["flocker"]
+        if not archetype.count:
+            return
+
+        # Steer flying flockers, spawning ones are neither steered nor seen by others
+        self.steering.steer(archetype.view("position"), archetype.view("velocity"), archetype.view("speed"),
+                            archetype.view("moving"), target, 1 / FPS)
+
+
+class Chaser(SteeredMover):
+    """
+    Enemy sprite
+    Chases player following the shared flow field, turning gradually. All chasers are steered in batches
+    by pursuit_simulation, each reading the direction of its flow field cell.
+    """
+    archetype = "chaser"
+
+
+class Chaser1(Chaser):
+    """
+    A child class that inherited Chaser class
+    Has 2 HP, 26x26 pixel size, -20 touch damage, and speed of 180~240 pixels/sec.
+    """
+    group = pygame.sprite.Group()       # Sprite group for Chaser1 sprites
+
+    def __init__(self):
+        Chaser.__init__(
+            self,
+            hp=2,
+            speed=random_streams.spawn.uniform(180, 240),
+            size=[26, 26],
+            touch_damage=20,
+            norm_image=images.wall_unit1_img,
+            hit_image=images.wall_unit1_hit_img,
+            coin_amount=12,
+            score=10
+        )
+        Chaser1.group.add(self)
+
+
+class PursuitSimulation:
+    """
+    System for all chasers, run once per frame after move_entities() moved them.
+
+    Direction toward player is computed once for each cell of a coarse flow field every few frames,
+    so the cost per chaser is only reading its cell and turning toward the direction, for all chasers at once.
+    """
+
+    def __init__(self, turn_rate=3.):
+        """
+        :param turn_rate: how fast chasers turn toward the flow direction, per second
+        """
+
+        self.flow_field = FlowField((field_width, field_height), cell_size=100, interval=4)
+        self.turn_rate = turn_rate
+
+    def update(self, target):
+        """
+        Update flow field toward target and steer chasers
+        :param target: field position chasers pursue (player position)
+        :return: None
+        """
+
+        archetype = entity_registry.archetypes["chaser"]
+        if not archetype.count:
+            return
+        self.flow_field.update(target)
+
+        # Turn moving chasers toward flow direction of their cells, at their maximum speed
+        moving = archetype.view("moving")
+        velocities = archetype.view("velocity")
+        desired = self.flow_field.sample(archetype.view("position")[moving]) * archetype.view("speed")[moving][:, None]
+        velocities[moving] += (desired - velocities[moving]) * min(1., self.turn_rate / FPS)
+
+
 class WallUnit(pygame.sprite.Sprite):
     """
     Enemy sprite
@@ -1133,6 +2517,10 @@ class WallUnit(pygame.sprite.Sprite):
 
     It does not attack player.
     """
+    update_stage = 1                    # Updated in a shard by ShardedUpdater
+    snapshot_fields = (("hp", "f8"), ("got_damaged", "?"), ("blink_count", "i4"), ("current_damage_animation_frame", "i4"),
+                       ("x_pos", "f8"), ("y_pos", "f8"), ("current_imagenum", "i4"))
+    snapshot_refs = ("hp_bar",)
 
     def __init__(self, hp, screen_pos, speed, direction, size, touch_damage, norm_image, hit_image, coin_amount, score):
         pygame.sprite.Sprite.__init__(self)
@@ -1145,6 +2533,7 @@ class WallUnit(pygame.sprite.Sprite):
         self.frames_per_blink = FPS // 30       # Blinking animation will be displayed at 30fps
         self.current_damage_animation_frame = 0
         self.hp_bar = None                      # HP bar of this sprite (currently not displayed)
+        self.swarm_slot = None                  # Slot in swarm simulation, None if this sprite moves by itself
 
         # Position and speed attributes
         self.x_pos = self.y_pos = 0                             # Field position, will be determined after screen position is defined
@@ -1167,8 +2556,8 @@ class WallUnit(pygame.sprite.Sprite):
 
         # Size & image attributes
         self.size = size
-        self.norm_image = pygame.transform.scale(norm_image, self.size)         # Normal image of StraightLineMover instance
-        self.hit_image = pygame.transform.scale(hit_image, self.size)           # Image displayed only when got damaged, slightly brighter than normal one
+        self.norm_image = scale_image(norm_image, self.size)                    # Normal image of StraightLineMover instance
+        self.hit_image = scale_image(hit_image, self.size)                      # Image displayed only when got damaged, slightly brighter than normal one
         self.image_list = [self.norm_image, self.hit_image]                     # Image list for faster image selection
         self.current_imagenum = 0
         self.image = self.image_list[self.current_imagenum]                     # Initially set current image to normal image
@@ -1194,6 +2583,7 @@ class WallUnit(pygame.sprite.Sprite):
         # Add this sprite to sprite groups
         all_sprites.add(self)
         all_enemies.add(self)       # Add sprite to enemy sprite group to draw
+        join_swarm(self)            # Move in swarm simulation if running
 
     def update(self, curspos, mouse_button_down):
         """
@@ -1218,9 +2608,12 @@ class WallUnit(pygame.sprite.Sprite):
                 self.got_damaged = False  # No blinking until getting another damage
                 self.image = self.image_list[self.current_imagenum]  # Set the image according to imagenum
 
-        # Update position
-        self.x_pos += self.x_speed / FPS
-        self.y_pos += self.y_speed / FPS
+        # Update position, or get it from worker process if this sprite is in swarm simulation
+        if self.swarm_slot is None:
+            self.x_pos += self.x_speed / FPS
+            self.y_pos += self.y_speed / FPS
+        else:
+            self.x_pos, self.y_pos = swarm_simulation.get_position(self.swarm_slot) or (self.x_pos, self.y_pos)
 
         # Update the sprite's screen position using field position and camera offset
         x_offset = screen_width // 2 - field_width // 2
@@ -1231,7 +2624,7 @@ class WallUnit(pygame.sprite.Sprite):
         # Kill this sprite if it goes out too far from player
         if not (-field_width // 2 < self.rect.centerx - screen_width // 2 < field_width // 2 and
                 -field_height // 2 < self.rect.centery - screen_height // 2 < field_height // 2):
-            self.kill()
+            defer(self.kill)
 
     def get_damage(self, damage):
         """
@@ -1246,14 +2639,23 @@ class WallUnit(pygame.sprite.Sprite):
 
         # Apply damage by reducing HP, or call death() if HP <= 0
         self.hp -= damage
-        # If HP bar already exists, delete it and generate new HP bar.
-        if self.hp_bar:
-            self.hp_bar.kill()
+        # Refresh HP bar, or delete it if HP <= 0
         if self.hp > 0:
-            self.hp_bar = HPBar(self)
+            self.hp_bar = refresh_hp_bar(self)
         else:
+            if self.hp_bar:
+                self.hp_bar.kill()
             self.death()
 
+    def kill(self):
+        """
+        Remove this sprite from all groups and from swarm simulation
+        :return: None
+        """
+
+        leave_swarm(self)
+        pygame.sprite.Sprite.kill(self)
+
     def death(self):
         """
         Generate explosion effect and coins/item, then delete sprite
@@ -1272,7 +2674,7 @@ class WallUnit(pygame.sprite.Sprite):
 
         # Generate explosion animation three times as big as self, then killed
         explode_size = [self.size[0] * 3, self.size[1] * 3]
-        Explosion(self, explode_size)
+        effect_manager.add_explosion(self, explode_size)
         self.kill()
 
 
@@ -1292,8 +2694,8 @@ class WallUnit1(WallUnit):
             direction=direction,
             size=(40, 40),
             touch_damage=15,
-            norm_image=wall_unit1_img,
-            hit_image=wall_unit1_hit_img,
+            norm_image=images.wall_unit1_img,
+            hit_image=images.wall_unit1_hit_img,
             coin_amount=10,
             score=5
         )
@@ -1316,8 +2718,8 @@ class WallUnit2(WallUnit):
             direction=direction,
             size=(40, 40),
             touch_damage=25,
-            norm_image=wall_unit2_img,
-            hit_image=wall_unit2_hit_img,
+            norm_image=images.wall_unit2_img,
+            hit_image=images.wall_unit2_hit_img,
             coin_amount=13,
             score=8
         )
@@ -1340,8 +2742,8 @@ class WallUnit3(WallUnit):
             direction=direction,
             size=(70, 70),
             touch_damage=56,
-            norm_image=wall_unit3_img,
-            hit_image=wall_unit3_hit_img,
+            norm_image=images.wall_unit3_img,
+            hit_image=images.wall_unit3_hit_img,
             coin_amount=30,
             score=25
         )
@@ -1361,38 +2763,38 @@ class Wall:
         if self.walltype == 1:
             self.wall_unit_type = WallUnit1
             self.grid_size = 40
-            self.speed = random.uniform(200, 300)
-            self.grid_hcnt, self.grid_vcnt = random.choice([(1, random.randrange(1, 35)),
-                                                            (random.randrange(1, 35), 1)])
+            self.speed = random_streams.spawn.uniform(200, 300)
+            self.grid_hcnt, self.grid_vcnt = random_streams.spawn.choice([(1, random_streams.spawn.randrange(1, 35)),
+                                                            (random_streams.spawn.randrange(1, 35), 1)])
 
         elif self.walltype == 2:
             self.wall_unit_type = WallUnit2
             self.grid_size = 40
-            self.speed = random.uniform(250, 350)
-            self.grid_hcnt, self.grid_vcnt = random.choice([(random.randrange(1, 3), random.randrange(1, 35)),
-                                                            (random.randrange(1, 35), random.randrange(1, 3))])
+            self.speed = random_streams.spawn.uniform(250, 350)
+            self.grid_hcnt, self.grid_vcnt = random_streams.spawn.choice([(random_streams.spawn.randrange(1, 3), random_streams.spawn.randrange(1, 35)),
+                                                            (random_streams.spawn.randrange(1, 35), random_streams.spawn.randrange(1, 3))])
 
         else:
             self.wall_unit_type = WallUnit3
             self.grid_size = 70
-            self.speed = random.uniform(50, 100)
-            self.grid_hcnt, self.grid_vcnt = random.choice([(random.randrange(1, 4), random.randrange(1, 20)),
-                                                            (random.randrange(1, 20), random.randrange(1, 4))])
+            self.speed = random_streams.spawn.uniform(50, 100)
+            self.grid_hcnt, self.grid_vcnt = random_streams.spawn.choice([(random_streams.spawn.randrange(1, 4), random_streams.spawn.randrange(1, 20)),
+                                                            (random_streams.spawn.randrange(1, 20), random_streams.spawn.randrange(1, 4))])
 
         self.width = self.grid_hcnt * self.grid_size
         self.height = self.grid_vcnt * self.grid_size
 
-        self.x = random.uniform(-field_width // 2, field_width // 2 - self.width) + screen_width // 2
+        self.x = random_streams.spawn.uniform(-field_width // 2, field_width // 2 - self.width) + screen_width // 2
         if -self.width <= self.x <= screen_width:
-            self.y = random.uniform(screen_height // 2 - field_height // 2, -self.height) if random.choice([1, 2]) == 1 \
-                else random.uniform(screen_height, screen_height // 2 + field_height // 2 - self.height)
+            self.y = random_streams.spawn.uniform(screen_height // 2 - field_height // 2, -self.height) if random_streams.spawn.choice([1, 2]) == 1 \
+                else random_streams.spawn.uniform(screen_height, screen_height // 2 + field_height // 2 - self.height)
 
         else:
-            self.y = random.uniform(-field_height // 2, field_height // 2 - self.height) + screen_height // 2
+            self.y = random_streams.spawn.uniform(-field_height // 2, field_height // 2 - self.height) + screen_height // 2
 
         self.topleft = (round(self.x), round(self.y))
 
-        direction = random.choice(["up", "down", "left", "right"])
+        direction = random_streams.spawn.choice(["up", "down", "left", "right"])
 
         for m in range(self.grid_vcnt):
             for n in range(self.grid_hcnt):
@@ -1452,7 +2854,22 @@ class BossLV1(pygame.sprite.Sprite):
 
     Boss Lv.1 has exactly same movement as StraightLineMover sprites,
     but has big size, high HP, slow speed.
+    Shoots bullet patterns, changing pattern every few seconds, and adds a reversed spiral below half HP.
     """
+    update_stage = 1                    # Updated in a shard by ShardedUpdater
+    snapshot_fields = (("hp", "f8"), ("got_damaged", "?"), ("blink_count", "i4"), ("current_damage_animation_frame", "i4"),
+                       ("x_pos", "f8"), ("y_pos", "f8"), ("current_imagenum", "i4"), ("dead", "?"), ("death_frame_count", "i4"),
+                       ("attack_frame_count", "i4"))
+    snapshot_refs = ("hp_bar",)
+
+    # Bullet patterns taking turns, each is a list of emitters firing together
+    attack_patterns = [[RingEmitter(interval=FPS * 2 // 3, speed=220, count=24)],
+                       [SpiralEmitter(interval=FPS // 15, speed=260, arms=4, spin=.17, kind=1)],
+                       [AimedBurstEmitter(interval=FPS // 8, speed=420, count=5, spread=.5, burst_length=4, rest_length=6,
+                                          kind=2, damage=6),
+                        RingEmitter(interval=FPS * 2, speed=160, count=16)]]
+    enraged_pattern = [SpiralEmitter(interval=FPS // 10, speed=200, arms=3, spin=-.23, kind=1)]     # Added below half HP
+    attack_pattern_duration = 6 * FPS       # Frames until changing to the next pattern
 
     def __init__(self):
         pygame.sprite.Sprite.__init__(self)
@@ -1467,18 +2884,19 @@ class BossLV1(pygame.sprite.Sprite):
         self.frames_per_blink = FPS // 30       # Blinking animation will be displayed at 30fps
         self.current_damage_animation_frame = 0
         self.hp_bar = None                      # HP bar of this sprite (currently not displayed)
+        self.swarm_slot = None                  # Slot in swarm simulation, None if this sprite moves by itself
 
         # Position and speed attributes
         self.x_pos = self.y_pos = 0                             # Field position, will be determined after screen position is defined
         self.speed = 100                                        # Moves at a fixed random speed
-        self.direction = random.uniform(-math.pi, math.pi)      # Moves towards a fixed, random direction in radians
+        self.direction = random_streams.spawn.uniform(-math.pi, math.pi)      # Moves towards a fixed, random direction in radians
         self.x_speed = self.speed * math.cos(self.direction)    # Calculate x-direction speed using trigonometry
         self.y_speed = self.speed * math.sin(self.direction)    # Same as x_speed
 
         # Size & image attributes
         self.size = [200, 200]
-        self.norm_image = pygame.transform.scale(boss_lv1_img, self.size)       # Normal image of StraightLineMover instance
-        self.hit_image = pygame.transform.scale(boss_lv1_hit_img, self.size)    # Image displayed only when got damaged, slightly brighter than normal one
+        self.norm_image = scale_image(images.boss_lv1_img, self.size)           # Normal image of StraightLineMover instance
+        self.hit_image = scale_image(images.boss_lv1_hit_img, self.size)        # Image displayed only when got damaged, slightly brighter than normal one
         self.image_list = [self.norm_image, self.hit_image]                     # Image list for faster image selection
         self.current_imagenum = 0
         self.image = self.image_list[self.current_imagenum]                     # Initially set current image to normal image
@@ -1487,19 +2905,19 @@ class BossLV1(pygame.sprite.Sprite):
         # Define the sprite's screen position
         # Boss sprite spawns out of screen, but not too far from player
         # One of four sides of screen will be selected to spawn on
-        spawn_pos_type = random.choice(["up", "down", "left", "right"])
+        spawn_pos_type = random_streams.spawn.choice(["up", "down", "left", "right"])
         if spawn_pos_type == "up":
-            self.rect.centerx = random.randrange(-self.size[0], screen_width + self.size[0])
+            self.rect.centerx = random_streams.spawn.randrange(-self.size[0], screen_width + self.size[0])
             self.rect.centery = -self.size[1]
         elif spawn_pos_type == "down":
-            self.rect.centerx = random.randrange(-self.size[0], screen_width + self.size[0])
+            self.rect.centerx = random_streams.spawn.randrange(-self.size[0], screen_width + self.size[0])
             self.rect.centery = screen_height + self.size[1]
         if spawn_pos_type == "left":
             self.rect.centerx = -self.size[0]
-            self.rect.centery = random.randrange(-self.size[1], screen_height + self.size[1])
+            self.rect.centery = random_streams.spawn.randrange(-self.size[1], screen_height + self.size[1])
         elif spawn_pos_type == "right":
             self.rect.centerx = screen_width + self.size[0]
-            self.rect.centery = random.randrange(-self.size[1], screen_height + self.size[0])
+            self.rect.centery = random_streams.spawn.randrange(-self.size[1], screen_height + self.size[0])
 
         # Calculate field position using screen position and camera offset
         self.x_pos = self.rect.centerx + camera_offset[0]
@@ -1515,9 +2933,13 @@ class BossLV1(pygame.sprite.Sprite):
         # Score attribute
         self.score = 2500
 
+        # Frames counted from spawning, determines current bullet pattern and its shots
+        self.attack_frame_count = 0
+
         # Add this sprite to sprite groups
         all_sprites.add(self)
         all_enemies.add(self)
+        join_swarm(self)            # Move in swarm simulation if running
 
     def update(self, curspos, mouse_button_down):
         """
@@ -1544,25 +2966,27 @@ class BossLV1(pygame.sprite.Sprite):
                     self.got_damaged = False        # No blinking until getting another damage
                     self.image = self.image_list[self.current_imagenum]     # Set the image according to imagenum
 
-            # Update position
-            self.x_pos += self.x_speed / FPS
-            self.y_pos += self.y_speed / FPS
+            # Update position, or get it from worker process if this sprite is in swarm simulation
+            if self.swarm_slot is None:
+                self.x_pos += self.x_speed / FPS
+                self.y_pos += self.y_speed / FPS
+            else:
+                self.x_pos, self.y_pos = swarm_simulation.get_position(self.swarm_slot) or (self.x_pos, self.y_pos)
+
+            # Shoot bullets of current pattern
+            defer(enemy_bullets.fire, self.get_attack_pattern(), self.attack_frame_count, (self.x_pos, self.y_pos))
+            self.attack_frame_count += 1
 
         # Generate sequential explosions for 2 seconds and then kill the boss sprite
         else:
             self.current_imagenum = (self.current_imagenum + 1) % 4     # Change imagenum to 0 or 1
             self.image = self.image_list[self.current_imagenum // 2]    # Set the image according to imagenum
 
-            if random.random() < .15:
-                size_multiplier = random.uniform(.4, 1.2)
-                explosion_size = [round(s * size_multiplier) for s in self.size]
-                explosion_x_offset = random.uniform(-self.rect.w, self.rect.w)
-                explosion_y_offset = random.uniform(-self.rect.h, self.rect.h)
-                Explosion(self, explosion_size, offset=(explosion_x_offset, explosion_y_offset))
+            defer(self.add_death_explosion)     # Random draws are deferred too, so they are in the same order every run
 
             self.death_frame_count -= 1
             if self.death_frame_count <= 0:
-                self.death()
+                defer(self.death)
 
         # Update the sprite's screen position using field position and camera offset
         x_offset = screen_width // 2 - field_width // 2
@@ -1570,6 +2994,30 @@ class BossLV1(pygame.sprite.Sprite):
         self.rect.centerx = round(self.x_pos - camera_offset[0] - x_offset) % field_width + x_offset
         self.rect.centery = round(self.y_pos - camera_offset[1] - y_offset) % field_height + y_offset
 
+    def add_death_explosion(self):
+        """
+        Generate an explosion of random size at random position over the boss, at a chance of 15% per frame
+        :return: None
+        """
+
+        if random_streams.effects.random() < .15:
+            size_multiplier = random_streams.effects.uniform(.4, 1.2)
+            explosion_size = [round(s * size_multiplier) for s in self.size]
+            explosion_x_offset = random_streams.effects.uniform(-self.rect.w, self.rect.w)
+            explosion_y_offset = random_streams.effects.uniform(-self.rect.h, self.rect.h)
+            effect_manager.add_explosion(self, explosion_size, offset=(explosion_x_offset, explosion_y_offset))
+
+    def get_attack_pattern(self):
+        """
+        Get emitters of current bullet pattern
+        :return: list of emitters
+        """
+
+        pattern = self.attack_patterns[self.attack_frame_count // self.attack_pattern_duration % len(self.attack_patterns)]
+        if self.hp < self.full_hp / 2:
+            pattern = pattern + self.enraged_pattern
+        return pattern
+
     def get_damage(self, damage):
         """
         Reduce HP when collided with projectile from player(attacked by player). Call death function when HP <= 0
@@ -1583,13 +3031,23 @@ class BossLV1(pygame.sprite.Sprite):
 
         # Apply damage by reducing HP, or call death() if HP <= 0
         self.hp -= damage
-        # If HP bar already exists, delete it and generate new HP bar.
-        if self.hp_bar:
-            self.hp_bar.kill()
+        # Refresh HP bar, or delete it if HP <= 0
         if self.hp > 0:
-            self.hp_bar = HPBar(self)
+            self.hp_bar = refresh_hp_bar(self)
         else:
+            if self.hp_bar:
+                self.hp_bar.kill()
             self.dead = True
+            leave_swarm(self)       # Stop moving during death effect
+
+    def kill(self):
+        """
+        Remove this sprite from all groups and from swarm simulation
+        :return: None
+        """
+
+        leave_swarm(self)
+        pygame.sprite.Sprite.kill(self)
 
     def death(self):
         """
@@ -1611,10 +3069,10 @@ class BossLV1(pygame.sprite.Sprite):
         explode_x_range = self.size[0] * 1.8
         explode_y_range = self.size[1] * 1.8
         for _ in range(round(explode_x_range * explode_y_range / 15000)):       # Number of explosions will be determined by the density of explosion
-            size_multiplier = random.uniform(1, 4)                             # Random size of explosion
-            x_offset = random.uniform(-explode_x_range, explode_x_range)        # Random position of explosion (offset from center)
-            y_offset = random.uniform(-explode_y_range, explode_y_range)
-            Explosion(self, [round(s * size_multiplier) for s in self.size], offset=(x_offset, y_offset))   # Generate explosion with offset
+            size_multiplier = random_streams.effects.uniform(1, 4)                             # Random size of explosion
+            x_offset = random_streams.effects.uniform(-explode_x_range, explode_x_range)        # Random position of explosion (offset from center)
+            y_offset = random_streams.effects.uniform(-explode_y_range, explode_y_range)
+            effect_manager.add_explosion(self, [round(s * size_multiplier) for s in self.size], offset=(x_offset, y_offset))    # Generate explosion with offset
 
         # Generate field shaking effect
         field_vibrator.initialize(30, 120, frequency=30, vibe_type="s")
@@ -1623,6 +3081,97 @@ class BossLV1(pygame.sprite.Sprite):
         self.kill()
 
 
+def make_bullet_image(radius, color):
+    """
+    Draw a round enemy bullet image, a bright core with a colored rim
+    :param radius: radius of bullet in pixels
+    :param color: color of rim
+    :return: bullet image
+    """
+
+    image = pygame.Surface([radius * 2, radius * 2], SRCALPHA)
+    pygame.draw.circle(image, color, (radius, radius), radius)
+    pygame.draw.circle(image, (255, 255, 255), (radius, radius), max(1, radius // 2))
+    return image
+
+
+class EnemyBulletSystem:
+    """
+    System for all enemy bullets, which are rows of a BulletPool instead of sprites.
+
+    Emitters of enemies spawn bullets in batches. Once per frame all bullets are moved, expired
+    and checked against player at once, and visible ones are drawn with a single blit list.
+    """
+
+    def __init__(self, player_radius=12):
+        """
+        :param player_radius: radius of player's hit circle, a bit smaller than player image
+        """
+
+        self.pool = BulletPool((field_width, field_height))
+        self.player_radius = player_radius
+        self.target = (0, 0)            # Player position, updated every frame
+
+        # Image of each bullet kind, and offset from bullet center to top left of the image
+        self.images = [make_bullet_image(6, (255, 70, 50)),         # Ring
+                       make_bullet_image(5, (255, 200, 50)),        # Spiral
+                       make_bullet_image(7, (190, 80, 255))]        # Aimed
+        self.image_offsets = np.array([[image.get_width() // 2, image.get_height() // 2] for image in self.images])
+
+    def fire(self, emitters, frame, origin):
+        """
+        Spawn bullets of emitters aimed at player
+        :param emitters: list of emitters
+        :param frame: frame count of the owner
+        :param origin: field position of the owner
+        :return: None
+        """
+
+        for emitter in emitters:
+            emitter.fire(self.pool, frame, origin, self.target)
+
+    def update(self, player):
+        """
+        Move all bullets, remove expired ones, and apply damage of bullets hitting player
+        :param player: player sprite
+        :return: None
+        """
+
+        self.target = player.get_pos()
+        self.pool.update(1 / FPS)
+        damage = self.pool.collide(self.target, self.player_radius)
+        if damage:
+            player.get_damage(damage)
+
+    def get_blit_list(self, screen_rect):
+        """
+        Get bullets to draw, only ones on the screen
+        :param screen_rect: rect of the screen
+        :return: list of (image, position) tuples to blit
+        """
+
+        if not self.pool.count:
+            return []
+
+        # Screen positions using field position and camera offset, same as sprites
+        offset = np.array([screen_width // 2 - field_width // 2, screen_height // 2 - field_height // 2])
+        centers = np.round(self.pool.view("position") - camera_offset - offset) % (field_width, field_height) + offset
+        kinds = self.pool.view("kind")
+        topleft = (centers - self.image_offsets[kinds]).astype(int)
+        visible = ((topleft[:, 0] > screen_rect.left - 20) & (topleft[:, 0] < screen_rect.right) &
+                   (topleft[:, 1] > screen_rect.top - 20) & (topleft[:, 1] < screen_rect.bottom))
+        images = self.images
+        return [(images[kind], position) for kind, position in zip(kinds[visible].tolist(), topleft[visible].tolist())]
+
+    def clear(self):
+        """
+        Remove all bullets
+        :return: None
+        """
+
+        self.pool.clear()
+
+
 class HPBar(pygame.sprite.Sprite):
     """
     A rectangular sprite class which represents remaining HP of enemy sprite.
@@ -1630,6 +3179,8 @@ class HPBar(pygame.sprite.Sprite):
     All enemy sprites has green HPBar sprite class displayed right above them.
     HPBar sprites are displayed when enemy sprite gets damaged, and lasts only 3 seconds.
     """
+    update_stage = 1                    # Updated in a shard by ShardedUpdater, with its parent sprite
+    snapshot_fields = (("width", "f8"), ("remaining_frames", "i4"))
 
     def __init__(self, parent_sprite):
         pygame.sprite.Sprite.__init__(self)
@@ -1667,7 +3218,7 @@ class HPBar(pygame.sprite.Sprite):
 
         # Delete HP bar after 3 seconds
         if self.remaining_frames <= 0:
-            self.kill()
+            defer(self.kill)
 
     def reset_timer(self):
         """
@@ -1692,10 +3243,14 @@ class Coin(pygame.sprite.Sprite):
     explosion. Then if player approaches near to them, they are attarcted to the player and increases the player.coin
     attribute. Coins have size attributes, and bigger coins deal more.
 
-    Initially generated coin has a fixed, random speed and direction.
+    Initially generated coin has a fixed, random speed and direction, drawn by scatter_coins() for all coins at once.
     """
+    update_stage = 1                    # Updated in a shard by ShardedUpdater
+    snapshot_fields = (("x_pos", "f8"), ("y_pos", "f8"), ("x_speed", "f8"), ("y_speed", "f8"), ("x_acc", "f8"), ("y_acc", "f8"),
+                       ("scattered", "?"), ("attracted", "?"), ("existed_frames", "i4"))
+    snapshot_refs = ("attaction_center",)
 
-    def __init__(self, enemy_sprite, coin_amount):
+    def __init__(self, enemy_sprite, coin_amount, speed, direction, duration):
         pygame.sprite.Sprite.__init__(self)
 
         # Size & image attributes
@@ -1708,10 +3263,9 @@ class Coin(pygame.sprite.Sprite):
 
         # Position speed, and acceleration attributes
         self.x_pos, self.y_pos = enemy_sprite.x_pos, enemy_sprite.y_pos     # Coin's field position given by killed enemy sprite
-        self.scatter_speed_min_max = (300 + 5 * self.coin_amount, 450 + 8 * self.coin_amount)
-        self.speed = random.uniform(*self.scatter_speed_min_max)            # Moves at a fixed random speed
+        self.speed = speed                                                  # Moves at a fixed random speed
         self.acc = -1500
-        self.direction = random.uniform(-math.pi, math.pi)                  # Moves towards a fixed, random direction in radians
+        self.direction = direction                                          # Moves towards a fixed, random direction in radians
         self.x_speed = self.speed * math.cos(self.direction)                # Calculate x-direction speed using trigonometry
         self.y_speed = self.speed * math.sin(self.direction)                # Same as x_speed
         self.x_acc = self.acc * math.cos(self.direction)
@@ -1729,7 +3283,7 @@ class Coin(pygame.sprite.Sprite):
 
         # For caluculating duration
         self.existed_frames = 0
-        self.duration = 6 * random.uniform(0.8, 1.2) * FPS
+        self.duration = duration
 
         # Add this sprite to sprite groups
         all_sprites.add(self)
@@ -1763,12 +3317,12 @@ class Coin(pygame.sprite.Sprite):
 
         # When collected by player
         if self.attaction_center and get_distance(self.rect.center, self.attaction_center) < 10:
-            self.kill()
+            defer(self.kill)
 
         # Kill coin after 6 secs (on average)
         self.existed_frames += 1
         if self.existed_frames > self.duration:
-            self.kill()
+            defer(self.kill)
 
     def attract(self, attraction_center):
         """
@@ -1790,6 +3344,147 @@ class Coin(pygame.sprite.Sprite):
         self.y_speed = 1000 * y_ratio
 
 
+def refresh_hp_bar(enemy_sprite):
+    """
+    Rebuild HP bar of an enemy sprite got damaged.
+    At low quality, existing HP bar is reused with its timer reset if its length changes less than hp_bar_step.
+    :param enemy_sprite: an enemy sprite got damaged
+    :return: HP bar of the enemy sprite
+    """
+
+    hp_bar = enemy_sprite.hp_bar
+    hp_bar_step = quality_governor.settings["hp_bar_step"]
+
+    # Reuse existing HP bar if the change of its length is small
+    if hp_bar and hp_bar.alive() and hp_bar_step > 1:
+        new_width = enemy_sprite.rect.w * (enemy_sprite.hp / enemy_sprite.full_hp)
+        if round(hp_bar.width) - round(new_width) < hp_bar_step:
+            hp_bar.remaining_frames = hp_bar.duration
+            return hp_bar
+
+    # Delete existing HP bar and generate new one
+    if hp_bar:
+        hp_bar.kill()
+    return HPBar(enemy_sprite)
+
+
+def join_swarm(sprite):
+    """
+    Let worker process move an enemy sprite, if swarm simulation is running
+    :param sprite: enemy sprite having field position and speed
+    :return: None
+    """
+
+    if isinstance(sprite, SteeredMover):
+        return          # Steered by flock or pursuit simulation
+    sprite.swarm_slot = swarm_simulation.spawn(sprite.x_pos, sprite.y_pos, sprite.x_speed, sprite.y_speed)
+    if sprite.__dict__.get("entity") is not None:
+        sprite.moving = sprite.swarm_slot is None   # Not moved by move_entities() while simulated in worker process
+        entity_registry.set(sprite.entity, "swarm_slot", -1 if sprite.swarm_slot is None else sprite.swarm_slot)
+
+
+def leave_swarm(sprite):
+    """
+    Remove an enemy sprite from swarm simulation, then it moves by itself
+    :param sprite: enemy sprite
+    :return: None
+    """
+
+    if sprite.swarm_slot is not None:
+        swarm_simulation.release(sprite.swarm_slot)
+        sprite.swarm_slot = None
+        if sprite.__dict__.get("entity") is not None:
+            entity_registry.set(sprite.entity, "swarm_slot", -1)
+
+
+def place_enemy_entities():
+    """
+    System for all enemies stored in entity registry, run once per frame after move_entities() moved them.
+    Positions of sprites simulated in worker process are copied from its latest frame at once,
+    then all sprites are placed on the screen at once.
+    :return: None
+    """
+
+    for archetype in entity_registry.query("position", "rect", "sprite"):
+        if swarm_simulation.running:
+            slots = archetype.view("swarm_slot")
+            rows = np.flatnonzero(slots >= 0)       # Rows of sprites in swarm simulation
+            positions, simulated = swarm_simulation.get_slot_positions(slots[rows])
+            archetype.view("position")[rows[simulated]] = positions[simulated]  # Others keep position until spawned in worker
+        place_entity_sprites(archetype)
+
+
+def update_enemy_entities():
+    """
+    System for all enemies stored in entity registry, instead of update() of every sprite.
+    Only spawning and blinking sprites are visited, and others need no update because they are moved in bulk.
+    :return: None
+    """
+
+    for archetype in entity_registry.query("spawning", "got_damaged", "sprite"):
+        busy = archetype.view("spawning") | archetype.view("got_damaged")
+        for sprite in archetype.view("sprite")[busy].tolist():
+            sprite.update_state()
+
+
+def get_enemy_blit_list():
+    """
+    Get all enemies to draw. Enemies stored in entity registry are read from component arrays in bulk,
+    and only other ones (wall units, boss) one by one.
+    :return: list of (image, position) tuples to blit
+    """
+
+    blit_list = []
+    for archetype in entity_registry.query("spawning", "image", "rect"):
+        spawned = ~archetype.view("spawning")       # Spawning enemies are not in all_enemies yet
+        blit_list += zip(archetype.view("image")[spawned].tolist(), archetype.view("rect")[spawned, :2].tolist())
+    blit_list += [(enemy.image, enemy.rect.topleft) for enemy in all_enemies.get_other_sprites()]
+    return blit_list
+
+
+def get_enemy_arrays():
+    """
+    Get all enemies with their rects and movements during a frame, for collision checks.
+    Enemies stored in entity registry are read from component arrays in bulk, and only other ones (wall units, boss)
+    one by one. Movements are in field coordinates, the same as on the screen except camera movement.
+    :return: (list of enemy sprites, (E, 4) array of rects, (E, 2) array of movements in pixels)
+    """
+
+    enemies, rects, velocities = [], [], []
+    for archetype in entity_registry.query("spawning", "rect", "velocity", "sprite"):
+        spawned = ~archetype.view("spawning")       # Spawning enemies are not in all_enemies yet
+        enemies += archetype.view("sprite")[spawned].tolist()
+        rects.append(archetype.view("rect")[spawned])
+        velocities.append(archetype.view("velocity")[spawned])
+
+    others = all_enemies.get_other_sprites()
+    enemies += others
+    rects.append(np.array([tuple(enemy.rect) for enemy in others], dtype=float).reshape(-1, 4))
+    velocities.append(np.array([(0, 0) if getattr(enemy, "dead", False) else (enemy.x_speed, enemy.y_speed)    # Dying boss does not move
+                                for enemy in others], dtype=float).reshape(-1, 2))
+    return enemies, np.concatenate(rects).astype(float), np.concatenate(velocities) / FPS
+
+
+def get_enemy_positions():
+    """
+    Get field positions of all enemies on the field at once, for an overview of the whole field (minimap).
+    Enemies stored in entity registry are read from component arrays in bulk, and enemies moved by worker process
+    from its latest frame. Only other ones (wall units moving by themselves) are read one by one.
+    Spawning enemies are not included.
+    :return: (n, 2) array of field positions
+    """
+
+    positions = [archetype.view("position")[archetype.view("moving")]
+                 for archetype in entity_registry.query("position", "moving")]
+    if swarm_simulation.running:
+        positions.append(swarm_simulation.get_positions())
+    wall_units = [(unit.x_pos, unit.y_pos) for group in [WallUnit1.group, WallUnit2.group, WallUnit3.group]
+                  for unit in group if unit.swarm_slot is None]
+    if wall_units:
+        positions.append(np.array(wall_units, dtype=float))
+    return np.concatenate(positions) if positions else np.zeros((0, 2))
+
+
 def scatter_coins(enemy_sprite):
     """
     Generates several coin sprites at a given point and scatter them at random speed and random direction.
@@ -1804,20 +3499,75 @@ def scatter_coins(enemy_sprite):
     coin_amount_min = total_coins_amount // 20 + 1
     coin_amount_max = total_coins_amount // 10
 
-    # Repeatedly generate Coin sprite until total amount of coins become 0
-    current_coin_amount = random.randint(coin_amount_min, coin_amount_max)
+    # Split total amount of coins into coins until it becomes 0
+    coin_amounts = []
+    current_coin_amount = random_streams.coins.randint(coin_amount_min, coin_amount_max)
     while total_coins_amount > current_coin_amount:
-        Coin(enemy_sprite, current_coin_amount)
+        coin_amounts.append(current_coin_amount)
         total_coins_amount -= current_coin_amount
-        current_coin_amount = random.randint(coin_amount_min, coin_amount_max)
-    Coin(enemy_sprite, total_coins_amount)
+        current_coin_amount = random_streams.coins.randint(coin_amount_min, coin_amount_max)
+    coin_amounts.append(total_coins_amount)
+
+    # Draw speeds, directions and durations of all coins at once, bigger coins scatter faster
+    amounts = np.array(coin_amounts)
+    speeds = random_streams.coins.uniform_array(300 + 5 * amounts, 450 + 8 * amounts, len(coin_amounts))
+    directions = random_streams.coins.uniform_array(-math.pi, math.pi, len(coin_amounts))
+    durations = 6 * random_streams.coins.uniform_array(0.8, 1.2, len(coin_amounts)) * FPS
+
+    for coin_amount, speed, direction, duration in zip(coin_amounts, speeds.tolist(), directions.tolist(), durations.tolist()):
+        Coin(enemy_sprite, coin_amount, speed, direction, duration)
+
 
+# Generate random streams of subsystems, seeded by --seed option to reproduce a run
+random_streams = RandomStreams()
 
 # Generate field vibrator
 field_vibrator = FieldVibrationController()
 
+# Generate quality governor, adjusts visual quality according to measured frame time
+quality_governor = QualityGovernor()
+
+# Generate damage buffer, resolved once per frame after updating all sprites
+damage_buffer = DamageBuffer()
+
+# Generate effect manager, limits the number of live effect sprites
+effect_manager = EffectManager(max_effects=150)
+
+# Generate sprite updater, updates sprites in shards on free-threaded Python builds
+sprite_updater = ShardedUpdater()
+
+# Generate swarm simulation, moves enemy sprites in a worker process after started
+swarm_simulation = SwarmSimulation(fps=FPS)
+
+# Generate entity registry, stores components of sprites migrated to archetype storage
+entity_registry = EntityRegistry()
+enemy_components = {"position": (np.float64, (2,)), "velocity": (np.float64, (2,)), "moving": (np.bool_, ()),
+                    "spawning": (np.bool_, ()), "got_damaged": (np.bool_, ()), "image": (object, ()),
+                    "rect": (np.int64, (4,)), "sprite": (object, ()), "swarm_slot": (np.int64, ()),
+                    "hp": (np.float64, ()), "blink_count": (np.int64, ()), "damage_animation_frame": (np.int64, ()),
+                    "imagenum": (np.int64, ()), "hp_bar": (object, ())}    # Components of all enemy archetypes, swarm slot is -1 if not in swarm
+entity_registry.register_archetype("straight_line_mover", **enemy_components)
+for steered_archetype in ("flocker", "chaser"):     # Steered movers also have maximum speed
+    entity_registry.register_archetype(steered_archetype, speed=(np.float64, ()), **enemy_components)
+
+# Generate uniform grid of enemies on the field, for casting player's beam
+enemy_grid = UniformGrid((field_width, field_height), cell_size=128,
+                         origin=(screen_width // 2 - field_width // 2, screen_height // 2 - field_height // 2))
+
+# Generate threat indicators, pointing to nearest big enemies and walls out of screen
+threat_indicators = ThreatIndicators([StraightLineMover3.group, WallUnit1.group, WallUnit2.group, WallUnit3.group])
+
+# Generate enemy bullet system, moves and collides all enemy bullets at once
+enemy_bullets = EnemyBulletSystem()
+
+# Generate flock simulation, steers all flockers at once
+flock_simulation = FlockSimulation()
+
+# Generate pursuit simulation, steers all chasers at once along a shared flow field toward player
+pursuit_simulation = PursuitSimulation()
+
 # Generate sprite groups
-all_sprites = pygame.sprite.Group()             # Contains all sprites subject to update every frame
+all_sprites = EntityGroup()                     # Contains all sprites subject to update every frame
 all_buttons = pygame.sprite.Group()             # All buttons to update and draw
 
 # Generate additional sprite groups to specify drawing order
@@ -1829,7 +3579,14 @@ spawneffect_group = pygame.sprite.Group()       # Sprite group for all spawn eff
 hiteffect_group = pygame.sprite.Group()         # Sprite group for all hit effects
 explosion_group = pygame.sprite.Group()         # Sprite group for all explosions
 
-all_enemies = pygame.sprite.Group()                 # Sprite group for all enemy sprites
+all_enemies = EntityGroup()                         # Sprite group for all enemy sprites
 
 hp_bar_group = pygame.sprite.Group()                # Sprite group for HPBar sprites
 coin_group = pygame.sprite.Group()                  # Sprite group for Coin sprites
+
+# All sprite groups, for removing all sprites at once
+all_groups = [all_sprites, player_group, target_pointer_group, all_enemies, player_projectiles,
+              spawneffect_group, hiteffect_group, explosion_group, hp_bar_group, coin_group,
+              StraightLineMover1.group, StraightLineMover2.group, StraightLineMover3.group,
+              WallUnit1.group, WallUnit2.group, WallUnit3.group, Flocker1.group, Flocker2.group,
+              Chaser1.group]
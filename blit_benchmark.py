@@ -0,0 +1,85 @@
+"""
+Blit microbenchmark for each asset category.
+
+Compares surfaces prepared in the previous way (colorkey without RLE acceleration, per-pixel alpha for hiteffects,
+per-instance scaled copies) with surfaces normalized by load_image() and scale_image() of initial_set_load.
+Run this file directly on the target machine: python blit_benchmark.py
+"""
+
+import random
+import time
+
+from initial_set_load import *
+
+
+def legacy_load(path, colorkey=None, alpha=False):
+    """
+    Load an image in the previous way, without RLE acceleration
+    :param path: path of image file
+    :param colorkey: color to make transparent
+    :param alpha: whether convert with per-pixel alpha
+    :return: loaded image
+    """
+
+    image = pygame.image.load(path)
+    image = image.convert_alpha() if alpha else image.convert()
+    if colorkey is not None:
+        image.set_colorkey(colorkey)
+    return image
+
+
+def measure_blits(image, n_blits):
+    """
+    Measure average time for blitting an image at random positions on the screen
+    :param image: image to blit
+    :param n_blits: number of blits
+    :return: average time per blit in microseconds
+    """
+
+    positions = [(random.randrange(-image.get_width(), screen_width), random.randrange(-image.get_height(), screen_height))
+                 for _ in range(n_blits)]
+
+    start_time = time.perf_counter()
+    for pos in positions:
+        screen.blit(image, pos)
+    return (time.perf_counter() - start_time) / n_blits * 1000000
+
+
+# Asset categories: (name, path, size to scale, legacy loading options, normalized loading options, number of blits)
+asset_categories = [
+    ("background", "img/background_grid.png", None, {}, {}, 20),
+    ("character", "img/character/straight_line_mover2.png", [50, 50], {}, {}, 20000),
+    ("target pointer", "img/target_pointer/target_pointer.png", [30, 30],
+     {"colorkey": (0, 0, 0)}, {"colorkey": (0, 0, 0)}, 20000),
+    ("projectile", "img/projectiles/player_normal_bullet0.png", None,
+     {"colorkey": (255, 255, 255)}, {"colorkey": (255, 255, 255)}, 20000),
+    ("spawneffect", "img/spawneffect/spawneffect_3_3.png", [50, 50],
+     {"colorkey": (0, 0, 0)}, {"colorkey": (0, 0, 0)}, 20000),
+    ("hiteffect", "img/hiteffect/hit_0004.png", [48, 48],
+     {"colorkey": (0, 0, 0), "alpha": True}, {"colorkey": (0, 0, 0)}, 20000),
+    ("shockwave", "img/explosion/shockwave.png", [180, 180],
+     {"colorkey": (255, 255, 255)}, {"colorkey": (255, 255, 255)}, 5000),
+    ("explosion", "img/explosion/expl_01_0004.png", None, {"alpha": True}, {"alpha": True}, 5000),
+]
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    print("{:<16}{:>14}{:>14}{:>10}".format("category", "legacy (us)", "normal (us)", "speedup"))
+
+    for name, path, size, legacy_options, normalized_options, n_blits in asset_categories:
+        legacy_image = legacy_load(path, **legacy_options)
+        normalized_image = load_image(path, **normalized_options)
+        if size:
+            legacy_image = pygame.transform.scale(legacy_image, size)       # Per-instance copy as before
+            normalized_image = scale_image(normalized_image, size)          # Shared RLE accelerated copy
+
+        # Warm up once (RLE encoding happens at the first blit)
+        measure_blits(legacy_image, 1)
+        measure_blits(normalized_image, 1)
+
+        legacy_time = measure_blits(legacy_image, n_blits)
+        normalized_time = measure_blits(normalized_image, n_blits)
+        print("{:<16}{:>14.2f}{:>14.2f}{:>9.2f}x".format(name, legacy_time, normalized_time, legacy_time / normalized_time))
+
+    pygame.quit()
@@ -0,0 +1,277 @@
+"""
+Python file for enemy bullets (bullet hell), stored and processed in batches with NumPy
+
+Bullets are not sprites. Positions, velocities and other attributes of all bullets are rows of NumPy arrays,
+so moving, expiring and colliding thousands of bullets is a few array operations per frame.
+Emitters generate directions of bullet patterns (rings, spirals, aimed bursts) to spawn many bullets at once.
+"""
+
+import math
+
+import numpy as np
+
+from flocking import wrap_delta
+
+
+class BulletPool:
+    """
+    Storage of all bullets on a wrapping field.
+
+    Rows 0 ~ count-1 are used. Expired and hit bullets are removed by compacting remaining rows,
+    so used rows are always contiguous. Arrays grow by doubling when full.
+    """
+
+    def __init__(self, field_size, capacity=1024):
+        """
+        :param field_size: (width, height) of wrapping field
+        :param capacity: initial number of rows
+        """
+
+        self.field_size = np.asarray(field_size, np.float64)
+        self.capacity = capacity
+        self.count = 0
+        self.arrays = {"position": np.zeros((capacity, 2)),         # Field position
+                       "velocity": np.zeros((capacity, 2)),         # Pixels per second
+                       "age": np.zeros(capacity),                   # Seconds since spawned
+                       "lifetime": np.zeros(capacity),              # Removed when age reaches lifetime
+                       "radius": np.zeros(capacity),                # Collision radius
+                       "damage": np.zeros(capacity),                # Damage dealt to player when hit
+                       "kind": np.zeros(capacity, np.int8)}         # Index of image to draw
+
+    def view(self, name):
+        """
+        Get used rows of an array (no copy)
+        :param name: name of array
+        :return: view of the array
+        """
+
+        return self.arrays[name][:self.count]
+
+    def spawn(self, positions, velocities, radius, damage, lifetime, kind=0):
+        """
+        Add bullets in bulk
+        :param positions: field positions, shape (n, 2), or a single position for all bullets
+        :param velocities: velocities, shape (n, 2)
+        :param radius: collision radius, scalar or array of n
+        :param damage: damage to player, scalar or array of n
+        :param lifetime: lifetime in seconds, scalar or array of n
+        :param kind: index of image, scalar or array of n
+        :return: None
+        """
+
+        n = len(velocities)
+        if n == 0:
+            return
+        if self.count + n > self.capacity:
+            while self.capacity < self.count + n:
+                self.capacity *= 2
+            for name, array in self.arrays.items():
+                grown = np.zeros((self.capacity,) + array.shape[1:], array.dtype)
+                grown[:self.count] = array[:self.count]
+                self.arrays[name] = grown
+
+        rows = slice(self.count, self.count + n)
+        self.arrays["position"][rows] = positions
+        self.arrays["velocity"][rows] = velocities
+        self.arrays["age"][rows] = 0
+        self.arrays["lifetime"][rows] = lifetime
+        self.arrays["radius"][rows] = radius
+        self.arrays["damage"][rows] = damage
+        self.arrays["kind"][rows] = kind
+        self.count += n
+
+    def remove(self, removed):
+        """
+        Remove bullets, keeping order of remaining ones
+        :param removed: boolean array of used rows, True for bullets to remove
+        :return: None
+        """
+
+        keep = np.flatnonzero(~removed)
+        if len(keep) == self.count:
+            return
+        for array in self.arrays.values():
+            array[:len(keep)] = array[keep]
+        self.count = len(keep)
+
+    def update(self, dt):
+        """
+        Move all bullets and remove expired ones
+        :param dt: elapsed time in seconds
+        :return: None
+        """
+
+        if not self.count:
+            return
+        self.view("position")[:] += self.view("velocity") * dt
+        self.view("position")[:] %= self.field_size        # Keep positions on the field so they stay precise
+        self.view("age")[:] += dt
+        self.remove(self.view("age") >= self.view("lifetime"))
+
+    def collide(self, center, radius):
+        """
+        Remove bullets touching a circle (player) and sum their damage
+        :param center: field position of circle
+        :param radius: radius of circle
+        :return: total damage of bullets hit
+        """
+
+        if not self.count:
+            return 0
+        deltas = wrap_delta(self.view("position") - center, self.field_size)
+        reach = self.view("radius") + radius
+        hit = np.einsum("ij,ij->i", deltas, deltas) < reach * reach
+        if not hit.any():
+            return 0
+        damage = float(self.view("damage")[hit].sum())
+        self.remove(hit)
+        return damage
+
+    def clear(self):
+        """
+        Remove all bullets at once
+        :return: None
+        """
+
+        self.count = 0
+
+    def get_state(self):
+        """
+        Copy used rows of all arrays, to restore later
+        :return: dict of array name and bytes
+        """
+
+        return {name: array[:self.count].tobytes() for name, array in self.arrays.items()}
+
+    def set_state(self, state):
+        """
+        Restore bullets copied by get_state()
+        :param state: dict of array name and bytes
+        :return: None
+        """
+
+        self.clear()
+        rows = {name: np.frombuffer(data, self.arrays[name].dtype).reshape((-1,) + self.arrays[name].shape[1:])
+                for name, data in state.items()}
+        self.spawn(rows["position"], rows["velocity"], rows["radius"], rows["damage"], rows["lifetime"], rows["kind"])
+        self.view("age")[:] = rows["age"]
+
+
+class Emitter:
+    """
+    Base class of bullet patterns, firing a single bullet aimed at the target.
+    Child classes change the pattern by overriding get_angles().
+
+    An emitter has no state of its own. Whether it fires and to which directions depend only on
+    the frame count of its owner, so rewinding the owner rewinds the pattern too.
+    """
+
+    def __init__(self, interval, speed, radius=6, damage=4, lifetime=6., kind=0, delay=0):
+        """
+        :param interval: number of frames between shots
+        :param speed: speed of bullets in pixels/sec
+        :param radius: collision radius of bullets
+        :param damage: damage of a bullet to player
+        :param lifetime: lifetime of bullets in seconds
+        :param kind: index of bullet image
+        :param delay: frame of the first shot
+        """
+
+        self.interval = interval
+        self.speed = speed
+        self.radius = radius
+        self.damage = damage
+        self.lifetime = lifetime
+        self.kind = kind
+        self.delay = delay
+
+    def get_angles(self, shot, to_target):
+        """
+        Directions of bullets of a shot
+        :param shot: number of shots fired before this one
+        :param to_target: shortest difference from the owner to target (player) on the wrapping field
+        :return: array of angles in radians
+        """
+
+        return np.array([math.atan2(to_target[1], to_target[0])])
+
+    def fire(self, pool, frame, origin, target):
+        """
+        Spawn bullets of a shot if it is time to fire
+        :param pool: BulletPool to spawn bullets into
+        :param frame: frame count of the owner
+        :param origin: field position of the owner
+        :param target: field position of target (player)
+        :return: None
+        """
+
+        if frame < self.delay or (frame - self.delay) % self.interval:
+            return
+        shot = (frame - self.delay) // self.interval
+        angles = self.get_angles(shot, wrap_delta(np.asarray(target, np.float64) - origin, pool.field_size))
+        velocities = np.stack([np.cos(angles), np.sin(angles)], axis=1) * self.speed
+        pool.spawn(origin, velocities, self.radius, self.damage, self.lifetime, self.kind)
+
+
+class RingEmitter(Emitter):
+    """
+    Bullets in every direction at equal angles. Each ring is rotated by half a gap from the previous one.
+    """
+
+    def __init__(self, interval, speed, count, **kwargs):
+        """
+        :param count: number of bullets in a ring
+        """
+
+        Emitter.__init__(self, interval, speed, **kwargs)
+        self.count = count
+
+    def get_angles(self, shot, to_target):
+        return (np.arange(self.count) + shot % 2 / 2) * (2 * math.pi / self.count)
+
+
+class SpiralEmitter(Emitter):
+    """
+    A few arms of bullets at equal angles, rotating a little every shot.
+    """
+
+    def __init__(self, interval, speed, arms, spin, **kwargs):
+        """
+        :param arms: number of bullets in a shot
+        :param spin: rotation per shot in radians, negative for counterclockwise
+        """
+
+        Emitter.__init__(self, interval, speed, **kwargs)
+        self.arms = arms
+        self.spin = spin
+
+    def get_angles(self, shot, to_target):
+        return np.arange(self.arms) * (2 * math.pi / self.arms) + self.spin * shot
+
+
+class AimedBurstEmitter(Emitter):
+    """
+    A fan of bullets aimed at the target, fired in bursts of several shots and then resting.
+    """
+
+    def __init__(self, interval, speed, count, spread, burst_length, rest_length, **kwargs):
+        """
+        :param count: number of bullets in a fan
+        :param spread: angle between both ends of the fan in radians
+        :param burst_length: number of shots in a burst
+        :param rest_length: number of shot intervals to rest after a burst
+        """
+
+        Emitter.__init__(self, interval, speed, **kwargs)
+        self.count = count
+        self.spread = spread
+        self.burst_length = burst_length
+        self.rest_length = rest_length
+
+    def fire(self, pool, frame, origin, target):
+        shot = (frame - self.delay) // self.interval
+        if shot % (self.burst_length + self.rest_length) < self.burst_length:
+            Emitter.fire(self, pool, frame, origin, target)
+
+    def get_angles(self, shot, to_target):
+        return math.atan2(to_target[1], to_target[0]) + np.linspace(-self.spread / 2, self.spread / 2, self.count)
@@ -0,0 +1,270 @@
+"""
+Python file for archetype-based entity registry
+
+Entities having the same set of components are stored together in an archetype, with each component
+in a contiguous NumPy array. Systems process all entities of matching archetypes at once, instead of
+calling update() of every sprite.
+"""
+
+import numpy as np
+
+
+class Archetype:
+    """
+    Storage of entities having the same set of components.
+
+    Each component is a NumPy array with one row per entity. Rows 0 ~ count-1 are used, and removed rows
+    are filled with the last rows, so used rows are always contiguous.
+    """
+
+    def __init__(self, name, components, capacity=64):
+        """
+        :param name: name of this archetype
+        :param components: dict of component name and (NumPy type, shape of a row)
+        :param capacity: initial number of rows
+        """
+
+        self.name = name
+        self.components = components
+        self.capacity = capacity
+        self.count = 0
+        self.ids = np.zeros(capacity, np.int64)         # Entity ID of each row
+        self.arrays = {component: np.zeros((capacity,) + tuple(shape), dtype)
+                       for component, (dtype, shape) in components.items()}
+
+    def view(self, component):
+        """
+        Get used rows of a component array (no copy)
+        :param component: name of component
+        :return: view of the array
+        """
+
+        return self.arrays[component][:self.count]
+
+    def reserve(self, n):
+        """
+        Grow arrays to hold n more entities
+        :param n: number of entities to add
+        :return: None
+        """
+
+        if self.count + n <= self.capacity:
+            return
+        while self.capacity < self.count + n:
+            self.capacity *= 2
+        self.ids = np.resize(self.ids, self.capacity)
+        for component, array in self.arrays.items():
+            grown = np.zeros((self.capacity,) + array.shape[1:], array.dtype)
+            grown[:self.count] = array[:self.count]
+            self.arrays[component] = grown
+
+    def append(self, ids, values):
+        """
+        Add entities at the end
+        :param ids: array of entity IDs
+        :param values: dict of component name and values (broadcast to all new rows)
+        :return: first row of added entities
+        """
+
+        n = len(ids)
+        self.reserve(n)
+        start = self.count
+        self.ids[start:start + n] = ids
+        for component, array in self.arrays.items():
+            array[start:start + n] = values.get(component, 0)
+        self.count += n
+        return start
+
+    def remove_rows(self, rows):
+        """
+        Remove entities of given rows, moving last rows into the holes
+        :param rows: rows to remove
+        :return: list of (entity ID, new row) of moved entities
+        """
+
+        moved = []
+        for row in sorted(rows, reverse=True):
+            last = self.count - 1
+            if row != last:
+                self.ids[row] = self.ids[last]
+                for array in self.arrays.values():
+                    array[row] = array[last]
+                moved.append((int(self.ids[row]), row))
+            for array in self.arrays.values():
+                if array.dtype == object:
+                    array[last] = None          # Do not keep references to removed objects
+            self.count -= 1
+        return moved
+
+
+class EntityRegistry:
+    """
+    Registry of all entities, grouped by archetypes.
+
+    Entities are integer IDs. Location (archetype, row) of each entity is kept up to date when rows move.
+    Spawning, despawning and clearing work on many entities at once.
+    """
+
+    def __init__(self):
+        self.archetypes = {}        # Archetypes by name
+        self.locations = {}         # (archetype, row) by entity ID
+        self.next_id = 1
+
+    def register_archetype(self, name, **components):
+        """
+        Add a new archetype
+        :param name: name of archetype
+        :param components: component name and (NumPy type, shape of a row) for each component
+        :return: the archetype
+        """
+
+        if name not in self.archetypes:
+            self.archetypes[name] = Archetype(name, components)
+        return self.archetypes[name]
+
+    def spawn(self, name, n=1, **values):
+        """
+        Create entities in bulk
+        :param name: name of archetype
+        :param n: number of entities to create
+        :param values: initial values of components, scalars or arrays of n rows
+        :return: list of new entity IDs
+        """
+
+        archetype = self.archetypes[name]
+        ids = list(range(self.next_id, self.next_id + n))
+        self.next_id += n
+        start = archetype.append(ids, values)
+        for offset, entity in enumerate(ids):
+            self.locations[entity] = (archetype, start + offset)
+        return ids
+
+    def despawn(self, ids):
+        """
+        Remove entities in bulk. Unknown IDs are ignored.
+        :param ids: entity IDs to remove
+        :return: None
+        """
+
+        rows_by_archetype = {}
+        for entity in ids:
+            location = self.locations.pop(entity, None)
+            if location:
+                rows_by_archetype.setdefault(location[0], []).append(location[1])
+
+        for archetype, rows in rows_by_archetype.items():
+            for entity, row in archetype.remove_rows(rows):
+                self.locations[entity] = (archetype, row)
+
+    def clear(self, name=None):
+        """
+        Remove all entities at once, of an archetype or of all archetypes
+        :param name: name of archetype, None for all archetypes
+        :return: None
+        """
+
+        archetypes = list(self.archetypes.values()) if name is None else [self.archetypes[name]]
+        for archetype in archetypes:
+            for entity in archetype.ids[:archetype.count].tolist():
+                del self.locations[entity]
+            for array in archetype.arrays.values():
+                if array.dtype == object:
+                    array[:archetype.count] = None
+            archetype.count = 0
+
+    def contains(self, entity):
+        """
+        Check whether an entity exists
+        :param entity: entity ID
+        :return: whether the entity exists
+        """
+
+        return entity in self.locations
+
+    def get(self, entity, component):
+        """
+        Get component value of an entity
+        :param entity: entity ID
+        :param component: name of component
+        :return: value (a row of the component array)
+        """
+
+        archetype, row = self.locations[entity]
+        return archetype.arrays[component][row]
+
+    def set(self, entity, component, value):
+        """
+        Set component value of an entity
+        :param entity: entity ID
+        :param component: name of component
+        :param value: new value
+        :return: None
+        """
+
+        archetype, row = self.locations[entity]
+        archetype.arrays[component][row] = value
+
+    def get_components(self, entity):
+        """
+        Copy all component values of an entity
+        :param entity: entity ID
+        :return: dict of component name and value
+        """
+
+        archetype, row = self.locations[entity]
+        return {component: array[row].copy() for component, array in archetype.arrays.items()}
+
+    def get_state(self):
+        """
+        Copy used rows of all component arrays, to restore later
+        :return: dict of archetype name and (entity IDs, dict of component name and array)
+        """
+
+        return {name: (archetype.ids[:archetype.count].copy(),
+                       {component: array[:archetype.count].copy() for component, array in archetype.arrays.items()})
+                for name, archetype in self.archetypes.items()}
+
+    def set_state(self, state):
+        """
+        Restore all entities copied by get_state(), in place. Entities spawned after copying are removed,
+        and removed ones come back with the same IDs and rows.
+        :param state: dict of archetype name and (entity IDs, dict of component name and array)
+        :return: None
+        """
+
+        for name, (ids, arrays) in state.items():
+            archetype = self.archetypes[name]
+            for entity in archetype.ids[:archetype.count].tolist():
+                del self.locations[entity]
+            count = len(ids)
+            archetype.reserve(count - archetype.count)
+            for component, array in archetype.arrays.items():
+                if array.dtype == object:
+                    array[count:archetype.count] = None     # Do not keep references to removed objects
+                array[:count] = arrays[component]
+            archetype.ids[:count] = ids
+            archetype.count = count
+            self.locations.update(zip(ids.tolist(), zip([archetype] * count, range(count))))
+
+    def query(self, *components):
+        """
+        Find archetypes having all given components
+        :param components: names of components
+        :return: list of archetypes
+        """
+
+        return [archetype for archetype in self.archetypes.values()
+                if archetype.count and all(component in archetype.arrays for component in components)]
+
+
+def move_entities(registry, dt):
+    """
+    Movement system. Moves all entities having position, velocity and moving flag at once.
+    :param registry: entity registry
+    :param dt: elapsed time in seconds
+    :return: None
+    """
+
+    for archetype in registry.query("position", "velocity", "moving"):
+        moving = archetype.view("moving")
+        archetype.view("position")[moving] += archetype.view("velocity")[moving] * dt
@@ -0,0 +1,154 @@
+"""
+Python file for flocking (boids) steering, computed in batches with NumPy
+
+Neighbors are found with uniform grids over the wrapping field. Counts, positions and velocities of agents are
+summed per grid cell with bincount, the sums of 3x3 cells around every cell are added up on the small cell grid,
+and each agent reads the sums of its own cell. So steering costs O(n) for n agents however dense the flock is,
+without any Python loop over agents or pairs of agents.
+"""
+
+import numpy as np
+
+
+def wrap_delta(delta, field_size):
+    """
+    Shortest difference of positions on a wrapping field
+    :param delta: array of differences, last axis is (x, y)
+    :param field_size: (width, height) of field
+    :return: wrapped differences, between -size/2 and size/2
+    """
+
+    field_size = np.asarray(field_size, np.float64)
+    return (delta + field_size / 2) % field_size - field_size / 2
+
+
+def sum_neighborhoods(positions, velocities, cell_size, field_size):
+    """
+    Sum other agents in 3x3 grid cells around each agent, on a wrapping field
+    :param positions: array of agent positions, shape (n, 2)
+    :param velocities: array of agent velocities, shape (n, 2), None if sums of velocities are not needed
+    :param cell_size: approximate size of grid cell, at most 1/3 of field size
+    :param field_size: (width, height) of field
+    :return: (number of other agents, sum of their positions relative to the agent, sum of their velocities or None)
+    """
+
+    # Grid cell of each agent, and offset of the agent from the corner of its cell
+    field_size = np.asarray(field_size, np.float64)
+    n_cells = np.maximum(3, (field_size // cell_size).astype(int))
+    cell_size = field_size / n_cells
+    wrapped_positions = positions % field_size
+    cells = np.minimum((wrapped_positions // cell_size).astype(int), n_cells - 1)
+    cell_ids = cells[:, 0] * n_cells[1] + cells[:, 1]
+    offsets = wrapped_positions - cells * cell_size
+
+    # Sums per cell, as 2D grids
+    n_total_cells = n_cells[0] * n_cells[1]
+    shape = tuple(n_cells)
+    counts = np.bincount(cell_ids, minlength=n_total_cells).reshape(shape).astype(np.float64)
+    offset_sums = [np.bincount(cell_ids, offsets[:, axis], n_total_cells).reshape(shape) for axis in range(2)]
+    velocity_sums = [np.bincount(cell_ids, velocities[:, axis], n_total_cells).reshape(shape)
+                     for axis in range(2)] if velocities is not None else None
+
+    # Sums of 3x3 cells around each cell. Positions of neighbor cells are relative to the corner of center cell.
+    box_counts = np.zeros(shape)
+    box_positions = [np.zeros(shape), np.zeros(shape)]
+    box_velocities = [np.zeros(shape), np.zeros(shape)]
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            shifted_counts = np.roll(counts, (-dx, -dy), (0, 1))
+            box_counts += shifted_counts
+            for axis, shift in enumerate((dx, dy)):
+                box_positions[axis] += np.roll(offset_sums[axis], (-dx, -dy), (0, 1)) + shifted_counts * shift * cell_size[axis]
+                if velocity_sums:
+                    box_velocities[axis] += np.roll(velocity_sums[axis], (-dx, -dy), (0, 1))
+
+    # Read sums of each agent's cell, excluding the agent itself
+    cell_x, cell_y = cells[:, 0], cells[:, 1]
+    neighbor_counts = box_counts[cell_x, cell_y] - 1
+    relative_positions = np.stack([box_positions[axis][cell_x, cell_y] for axis in range(2)], axis=1) - \
+        (neighbor_counts + 1)[:, None] * offsets
+    neighbor_velocities = None
+    if velocity_sums:
+        neighbor_velocities = np.stack([box_velocities[axis][cell_x, cell_y] for axis in range(2)], axis=1) - velocities
+    return neighbor_counts, relative_positions, neighbor_velocities
+
+
+class FlockSteering:
+    """
+    Boids steering of a flock: separation, alignment, cohesion and attraction to a target.
+
+    Alignment and cohesion use neighbors in a grid of radius-sized cells. Separation uses a finer grid of
+    separation_radius-sized cells, pushing each agent away from the center of neighbors crowded around it.
+    Velocities are changed in place for all agents at once.
+    """
+
+    def __init__(self, field_size, radius=150, separation_radius=40, separation=12., alignment=1.2, cohesion=.8,
+                 attraction=.6, min_speed_ratio=.4):
+        """
+        :param field_size: (width, height) of wrapping field
+        :param radius: approximate distance to see neighbors for alignment and cohesion
+        :param separation_radius: approximate distance to keep from neighbors
+        :param separation: weight of separation, per second
+        :param alignment: weight of alignment, per second
+        :param cohesion: weight of cohesion, per second
+        :param attraction: weight of attraction to target, per second
+        :param min_speed_ratio: minimum speed of an agent relative to its maximum speed
+        """
+
+        self.field_size = field_size
+        self.radius = radius
+        self.separation_radius = separation_radius
+        self.separation = separation
+        self.alignment = alignment
+        self.cohesion = cohesion
+        self.attraction = attraction
+        self.min_speed_ratio = min_speed_ratio
+
+    def steer(self, positions, velocities, max_speeds, active, target, dt):
+        """
+        Steer agents for a frame, changing their velocities in place
+        :param positions: array of positions, shape (n, 2)
+        :param velocities: array of velocities, shape (n, 2), changed in place
+        :param max_speeds: array of maximum speed of each agent
+        :param active: boolean array, inactive agents are neither steered nor seen as neighbors
+        :param target: position all agents are attracted to, None for no attraction
+        :param dt: elapsed time in seconds
+        :return: None
+        """
+
+        agents = np.flatnonzero(active)
+        if len(agents) == 0:
+            return
+        local_positions = positions[agents]
+        local_velocities = velocities[agents]
+        local_max_speeds = max_speeds[agents][:, None]
+
+        # Alignment and cohesion: average velocity and relative position of neighbors
+        counts, relative_positions, neighbor_velocities = sum_neighborhoods(local_positions, local_velocities,
+                                                                            self.radius, self.field_size)
+        has_neighbors = (counts > 0)[:, None]
+        divisors = np.maximum(counts, 1)[:, None]
+        alignment = np.where(has_neighbors, neighbor_velocities / divisors - local_velocities, 0)
+        cohesion = np.where(has_neighbors, relative_positions / divisors, 0)
+
+        # Separation: push away from center of crowded neighbors, stronger with more of them
+        counts, relative_positions, _ = sum_neighborhoods(local_positions, None, self.separation_radius, self.field_size)
+        crowd_centers = relative_positions / np.maximum(counts, 1)[:, None]
+        crowd_distances = np.maximum(np.hypot(crowd_centers[:, 0], crowd_centers[:, 1]), 1e-6)[:, None]
+        separation = -crowd_centers / crowd_distances * np.minimum(counts, 4)[:, None] / 4 * local_max_speeds
+
+        # Attraction: seek target at maximum speed
+        attraction = 0
+        if target is not None:
+            to_target = wrap_delta(np.asarray(target, np.float64) - local_positions, self.field_size)
+            target_distances = np.maximum(np.hypot(to_target[:, 0], to_target[:, 1]), 1e-6)[:, None]
+            attraction = to_target / target_distances * local_max_speeds - local_velocities
+
+        acceleration = (self.separation * separation + self.alignment * alignment + self.cohesion * cohesion +
+                        self.attraction * attraction)
+
+        # Keep speed between minimum and maximum
+        new_velocities = local_velocities + acceleration * dt
+        speeds = np.maximum(np.hypot(new_velocities[:, 0], new_velocities[:, 1]), 1e-6)[:, None]
+        clamped_speeds = np.clip(speeds, local_max_speeds * self.min_speed_ratio, local_max_speeds)
+        velocities[agents] = new_velocities * (clamped_speeds / speeds)
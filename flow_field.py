@@ -0,0 +1,144 @@
+"""
+Python file for flow field toward a target on a wrapping field, shared by all pursuing enemies
+
+The field is divided into a coarse grid, and a direction toward the target is computed for every cell at once,
+every few frames. Enemies read the direction of their cells in O(1) each, in batches.
+"""
+
+import math
+
+import numpy as np
+
+
+# Offsets to 8 neighbor cells, and cost of moving to them
+neighbor_offsets = np.array([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)])
+neighbor_costs = np.hypot(neighbor_offsets[:, 0], neighbor_offsets[:, 1])
+
+
+class FlowField:
+    """
+    Coarse grid of directions toward a target (player) on a wrapping field.
+
+    Without obstacles, each cell points straight to the target along the shortest wrapped path.
+    With obstacles (blocked cells), distances to the target are computed over the grid by repeated relaxation
+    of 8 neighbors, and each cell points to its neighbor closest to the target, so pursuers go around obstacles.
+    """
+
+    def __init__(self, field_size, cell_size=100, interval=4):
+        """
+        :param field_size: (width, height) of wrapping field
+        :param cell_size: approximate size of grid cell
+        :param interval: number of updates between recomputing directions
+        """
+
+        self.field_size = np.asarray(field_size, np.float64)
+        self.n_cells = np.maximum(3, (self.field_size // cell_size).astype(int))
+        self.cell_size = self.field_size / self.n_cells
+        self.interval = interval
+        self.update_count = 0
+
+        shape = tuple(self.n_cells)
+        self.blocked = np.zeros(shape, bool)                # Cells not passable
+        self.distances = np.zeros(shape)                    # Distance to target along the grid, in cells
+        self.directions = np.zeros(shape + (2,))            # Unit vector toward target of each cell
+        self.centers = (np.stack(np.indices(shape), axis=-1) + .5) * self.cell_size     # Field position of cell centers
+        self.target = None
+
+    def get_cells(self, positions):
+        """
+        Get grid cells of field positions
+        :param positions: array of field positions, shape (n, 2), may be outside the field (wrapped)
+        :return: (x indices, y indices) of cells
+        """
+
+        cells = np.minimum((np.asarray(positions) % self.field_size // self.cell_size).astype(int), self.n_cells - 1)
+        return cells[:, 0], cells[:, 1]
+
+    def block_rect(self, rect):
+        """
+        Mark cells overlapping a rectangle on the field as obstacles
+        :param rect: (left, top, width, height) in field position
+        :return: None
+        """
+
+        left, top, width, height = rect
+        x_cells = np.arange(math.floor(left / self.cell_size[0]), math.ceil((left + width) / self.cell_size[0]))
+        y_cells = np.arange(math.floor(top / self.cell_size[1]), math.ceil((top + height) / self.cell_size[1]))
+        self.blocked[np.ix_(x_cells % self.n_cells[0], y_cells % self.n_cells[1])] = True
+        self.update_count = 0           # Recompute at next update
+
+    def clear_obstacles(self):
+        """
+        Remove all obstacles
+        :return: None
+        """
+
+        self.blocked[:] = False
+        self.update_count = 0
+
+    def update(self, target):
+        """
+        Recompute directions toward target every interval. Called once per frame.
+        :param target: field position of target
+        :return: None
+        """
+
+        if self.update_count % self.interval == 0:
+            self.compute(target)
+        self.update_count += 1
+
+    def compute(self, target):
+        """
+        Compute directions of all cells toward target
+        :param target: field position of target
+        :return: None
+        """
+
+        self.target = np.asarray(target, np.float64) % self.field_size
+
+        # Straight to the target, along the shortest wrapped path
+        deltas = (self.target - self.centers + self.field_size / 2) % self.field_size - self.field_size / 2
+        lengths = np.maximum(np.hypot(deltas[..., 0], deltas[..., 1]), 1e-6)
+        self.directions = deltas / lengths[..., None]
+        self.distances = lengths / self.cell_size.mean()
+        if not self.blocked.any():
+            return
+
+        # Distances along the grid avoiding blocked cells, relaxing all cells at once until nothing changes
+        target_cell = tuple(c[0] for c in self.get_cells(self.target[None]))
+        distances = np.full(tuple(self.n_cells), np.inf)
+        distances[target_cell] = 0
+        for _ in range(self.n_cells.sum() * 2):
+            neighbor_distances = np.stack([np.roll(distances, tuple(-offset), (0, 1)) + cost
+                                           for offset, cost in zip(neighbor_offsets, neighbor_costs)])
+            relaxed = np.minimum(distances, neighbor_distances.min(axis=0))
+            relaxed[self.blocked] = np.inf
+            relaxed[target_cell] = 0
+            if np.array_equal(relaxed, distances):
+                break
+            distances = relaxed
+        self.distances = distances
+
+        # Point to the neighbor closest to the target, except near the target or where it is unreachable
+        neighbor_distances = np.stack([np.roll(distances, tuple(-offset), (0, 1)) for offset in neighbor_offsets])
+        best = neighbor_distances.argmin(axis=0)
+        detour = np.isfinite(distances) & (distances > 1.5)
+        steps = neighbor_offsets[best] / neighbor_costs[best][..., None]
+        self.directions = np.where(detour[..., None], steps, self.directions)
+
+    def sample(self, positions):
+        """
+        Get directions toward target at field positions.
+        Near the target, a direction from the cell center may point away from it, so positions there aim straight at it.
+        :param positions: array of field positions, shape (n, 2)
+        :return: array of unit vectors, shape (n, 2)
+        """
+
+        x_cells, y_cells = self.get_cells(positions)
+        directions = self.directions[x_cells, y_cells]
+        near = self.distances[x_cells, y_cells] < 1.5       # Same threshold as detours in compute()
+        if self.target is not None and near.any():
+            deltas = (self.target - np.asarray(positions)[near] + self.field_size / 2) % self.field_size - self.field_size / 2
+            lengths = np.maximum(np.hypot(deltas[:, 0], deltas[:, 1]), 1e-6)
+            directions[near] = deltas / lengths[:, None]
+        return directions
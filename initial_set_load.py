@@ -1,11 +1,13 @@
 """
-Python file for initializing screen and loading all images needed
+Python file for initializing screen and loading all images and fonts needed
 """
 
 import pygame
 from pygame.locals import *
 
+import io
 import os.path
+import threading
 
 import ctypes
 ctypes.windll.user32.SetProcessDPIAware()
@@ -35,107 +37,378 @@ fps_clock = pygame.time.Clock()
 # Allow only cretain events (for performance)
 pygame.event.set_allowed([pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP])
 
-# Load background image
-background_grid_img = pygame.image.load("img/background_grid.png").convert()
-
-# Load image for Player sprite
-player_img = pygame.image.load("img/character/player.png").convert()
-
-# Load target pointer image
-target_pointer_img = pygame.image.load("img/target_pointer/target_pointer.png").convert()
-target_pointer_img.set_colorkey((0, 0, 0))          # Make black background invisible(transparent)
-boss_pointer_img = pygame.image.load("img/target_pointer/boss_pointer.png").convert()
-boss_pointer_img.set_colorkey((255, 255, 255))      # Make white background invisible(transparent)
-
-# Load image for PlayerNormalBullet sprite
-player_normal_bullet_animation = []
-for i in range(4):
-    new_frame = pygame.image.load("img/projectiles/player_normal_bullet{}.png".format(i // 2)).convert()
-    new_frame.set_colorkey((255, 255, 255))         # Make white background invisible(transparent)
-    player_normal_bullet_animation.append(new_frame)
-
-# Load image for PlayerEnergyCannonBall sprite
-player_energy_cannonball_animation = []
-for i in range(4):
-    new_frame = pygame.image.load("img/projectiles/player_energy_cannonball{}.png".format(i // 2)).convert()
-    new_frame.set_colorkey((255, 255, 255))         # Make white background invisible(transparent)
-    player_energy_cannonball_animation.append(new_frame)
-
-# Load 64 image frames for animating spawneffect
-spawneffect_animation = []
-for i in range(8):
-    for j in range(8):
-        new_frame = pygame.image.load("img/spawneffect/spawneffect_{}_{}.png".format(i, j)).convert()
-        new_frame.set_colorkey((0, 0, 0))           # Set black background of all image frames as transparent
-        spawneffect_animation.append(new_frame)
-
-# Load 9 image frames for animating hiteffect
-hiteffect_animation = []
-for i in range(9):
-    new_frame = pygame.image.load("img/hiteffect/hit_000{}.png".format(i)).convert_alpha()
-    new_frame.set_colorkey((0, 0, 0))               # Set black background of all image frames as transparent
-    hiteffect_animation.append(new_frame)
-
-# Load image for shockwave
-shockwave_image = pygame.image.load("img/explosion/shockwave.png").convert()
-shockwave_image.set_colorkey((255, 255, 255))       # Set white background as transparent
-
-# Load image frames for animating explosions, all animations have shockwave image at the first frame
-explosion_animation_list_small = []         # For 32x32 images
-for i in [5, 7]:
-    explosion_animation = [shockwave_image]
-    j = 0
-    while True:
-        path = "img/explosion/expl_{:0>2}_{:0>4}.png".format(i, j)
-        if not os.path.exists(path):
-            break
-        new_frame = pygame.image.load(path).convert_alpha()
-        explosion_animation.append(new_frame)
-        j += 1
-    explosion_animation_list_small.append(explosion_animation)
-
-explosion_animation_list_medium = []        # For 64x64 images
-for i in [1, 2, 3, 4, 6, 8]:
-    explosion_animation = [shockwave_image]
-    j = 0
-    while True:
-        path = "img/explosion/expl_{:0>2}_{:0>4}.png".format(i, j)
-        if not os.path.exists(path):
-            break
-        new_frame = pygame.image.load(path).convert_alpha()
-        explosion_animation.append(new_frame)
-        j += 1
-    explosion_animation_list_medium.append(explosion_animation)
-
-explosion_animation_list_large = []        # For 96x96 and 128x128 images
-for i in [9, 10, 11]:
-    explosion_animation = [shockwave_image]
-    j = 0
-    while True:
-        path = "img/explosion/expl_{:0>2}_{:0>4}.png".format(i, j)
-        if not os.path.exists(path):
-            break
-        new_frame = pygame.image.load(path).convert_alpha()
-        explosion_animation.append(new_frame)
-        j += 1
-    explosion_animation_list_large.append(explosion_animation)
-
-# Load images for StraightLineMover sprites
-straight_line_mover1_img = pygame.image.load("img/character/straight_line_mover1.png").convert()
-straight_line_mover1_hit_img = pygame.image.load("img/character/straight_line_mover1_hit.png").convert()
-straight_line_mover2_img = pygame.image.load("img/character/straight_line_mover2.png").convert()
-straight_line_mover2_hit_img = pygame.image.load("img/character/straight_line_mover2_hit.png").convert()
-straight_line_mover3_img = pygame.image.load("img/character/straight_line_mover3.png").convert()
-straight_line_mover3_hit_img = pygame.image.load("img/character/straight_line_mover3_hit.png").convert()
-
-# Load images for WallUnit sprites
-wall_unit1_img = pygame.image.load("img/character/wall_unit1.png").convert()
-wall_unit1_hit_img = pygame.image.load("img/character/wall_unit1_hit.png").convert()
-wall_unit2_img = pygame.image.load("img/character/wall_unit2.png").convert()
-wall_unit2_hit_img = pygame.image.load("img/character/wall_unit2_hit.png").convert()
-wall_unit3_img = pygame.image.load("img/character/wall_unit3.png").convert()
-wall_unit3_hit_img = pygame.image.load("img/character/wall_unit3_hit.png").convert()
-
-# Load images for boss sprites
-boss_lv1_img = pygame.image.load("img/character/boss_lv1.png").convert()
-boss_lv1_hit_img = pygame.image.load("img/character/boss_lv1_hit.png").convert()
+
+def normalize_surface(surface, colorkey=None, alpha=False):
+    """
+    Convert a surface to the pixel format of display for fastest blitting.
+    Colorkeyed surfaces are RLE accelerated. Per-pixel alpha is kept only if alpha is True.
+    :param surface: surface to convert
+    :param colorkey: color to make transparent, None for opaque or per-pixel alpha surface
+    :param alpha: whether the surface needs per-pixel alpha
+    :return: converted surface
+    """
+
+    if alpha:
+        return surface.convert_alpha()
+
+    surface = surface.convert()
+    if colorkey is not None:
+        surface.set_colorkey(colorkey, RLEACCEL)
+    return surface
+
+
+def load_image(path, colorkey=None, alpha=False):
+    """
+    Load an image file and convert it to the pixel format of display
+    :param path: path of image file
+    :param colorkey: color to make transparent, None for opaque or per-pixel alpha image
+    :param alpha: whether the image needs per-pixel alpha
+    :return: loaded image
+    """
+
+    return normalize_surface(pygame.image.load(path), colorkey, alpha)
+
+
+scaled_image_cache = {}     # Scaled images shared by sprites, key: (original image, size)
+
+
+def scale_image(image, size):
+    """
+    Scale an image keeping the pixel format and colorkey (with RLE acceleration) of original image.
+    Scaled images are cached and shared, so the returned surface must not be modified.
+    :param image: original image
+    :param size: size to scale
+    :return: scaled image
+    """
+
+    key = (image, round(size[0]), round(size[1]))
+    scaled_image = scaled_image_cache.get(key)
+    if scaled_image is None:
+        scaled_image = pygame.transform.scale(image, key[1:])
+        colorkey = image.get_colorkey()
+        if colorkey is not None:
+            scaled_image.set_colorkey(colorkey, RLEACCEL)
+        scaled_image_cache[key] = scaled_image
+    return scaled_image
+
+
+rotation_step = 2           # Angles of rotated images are quantized by this degrees
+rotated_image_cache = {}    # Rotated images shared by sprites, key: (original image, quantized angle, scale)
+
+
+def rotate_image(image, angle, scale=1):
+    """
+    Rotate an image by quantized angle and scale the rotated image, keeping colorkey (with RLE acceleration).
+    Rotated images are cached and shared, so the returned surface must not be modified.
+    :param image: original image
+    :param angle: angle to rotate counterclockwise in degrees
+    :param scale: ratio to scale the rotated image
+    :return: rotated image
+    """
+
+    key = (image, round(angle / rotation_step) * rotation_step % 360, scale)
+    rotated_image = rotated_image_cache.get(key)
+    if rotated_image is None:
+        rotated_image = pygame.transform.rotate(image, key[1])
+        if scale != 1:
+            rotated_image = pygame.transform.scale(rotated_image, [int(rotated_image.get_width() * scale),
+                                                                   int(rotated_image.get_height() * scale)])
+        colorkey = image.get_colorkey()
+        if colorkey is not None:
+            rotated_image.set_colorkey(colorkey, RLEACCEL)
+        rotated_image_cache[key] = rotated_image
+    return rotated_image
+
+
+class GameImages:
+    """
+    All images of game play, loaded at first use instead of at import.
+
+    Images are loaded by groups. Accessing any image of a group loads the whole group, and loaded images are
+    kept as attributes, so only the first access costs loading. This lets main menu appear before game play
+    images exist, and load_next() can load remaining groups one by one while main menu is shown.
+    """
+
+    # Loading method of each image name
+    loaders = {"background_grid_img": "load_background",
+               "player_img": "load_player", "target_pointer_img": "load_player", "boss_pointer_img": "load_player",
+               "player_normal_bullet_animation": "load_projectiles",
+               "player_energy_cannonball_animation": "load_projectiles",
+               "spawneffect_animation": "load_effects", "hiteffect_animation": "load_effects",
+               "shockwave_image": "load_effects", "explosion_animation_list_small": "load_effects",
+               "explosion_animation_list_medium": "load_effects", "explosion_animation_list_large": "load_effects",
+               "straight_line_mover1_img": "load_enemies", "straight_line_mover1_hit_img": "load_enemies",
+               "straight_line_mover2_img": "load_enemies", "straight_line_mover2_hit_img": "load_enemies",
+               "straight_line_mover3_img": "load_enemies", "straight_line_mover3_hit_img": "load_enemies",
+               "wall_unit1_img": "load_enemies", "wall_unit1_hit_img": "load_enemies",
+               "wall_unit2_img": "load_enemies", "wall_unit2_hit_img": "load_enemies",
+               "wall_unit3_img": "load_enemies", "wall_unit3_hit_img": "load_enemies",
+               "boss_lv1_img": "load_enemies", "boss_lv1_hit_img": "load_enemies"}
+
+    def __init__(self):
+        self.loaded = set()         # Names of loading methods already done
+
+    def __getattr__(self, name):
+        """
+        Load the group of an image not loaded yet. Called only when the attribute does not exist.
+        :param name: image name
+        :return: loaded image
+        """
+
+        loader = GameImages.loaders.get(name)
+        if loader is None or loader in self.__dict__.get("loaded", ()):
+            raise AttributeError(name)
+        self.load(loader)
+        return self.__dict__[name]
+
+    def load(self, loader):
+        """
+        Run a loading method once
+        :param loader: name of loading method
+        :return: None
+        """
+
+        if loader not in self.loaded:
+            getattr(self, loader)()
+            self.loaded.add(loader)
+
+    def load_next(self):
+        """
+        Load one group of images not loaded yet
+        :return: False if all images are already loaded, True otherwise
+        """
+
+        for loader in dict.fromkeys(GameImages.loaders.values()):
+            if loader not in self.loaded:
+                self.load(loader)
+                return True
+        return False
+
+    def load_all(self):
+        """
+        Load all images not loaded yet
+        :return: None
+        """
+
+        while self.load_next():
+            pass
+
+    def load_background(self):
+        """
+        Load background image
+        :return: None
+        """
+
+        self.background_grid_img = load_image("img/background_grid.png")
+
+    def load_player(self):
+        """
+        Load images of player and pointers
+        :return: None
+        """
+
+        # Load image for Player sprite
+        self.player_img = load_image("img/character/player.png")
+
+        # Load target pointer image
+        self.target_pointer_img = load_image("img/target_pointer/target_pointer.png", colorkey=(0, 0, 0))         # Make black background invisible(transparent)
+        self.boss_pointer_img = load_image("img/target_pointer/boss_pointer.png", colorkey=(255, 255, 255))       # Make white background invisible(transparent)
+
+    def load_projectiles(self):
+        """
+        Load image frames of player projectiles
+        :return: None
+        """
+
+        # Load image for PlayerNormalBullet sprite
+        self.player_normal_bullet_animation = []
+        for i in range(4):
+            new_frame = load_image("img/projectiles/player_normal_bullet{}.png".format(i // 2), colorkey=(255, 255, 255))       # Make white background invisible(transparent)
+            self.player_normal_bullet_animation.append(new_frame)
+
+        # Load image for PlayerEnergyCannonBall sprite
+        self.player_energy_cannonball_animation = []
+        for i in range(4):
+            new_frame = load_image("img/projectiles/player_energy_cannonball{}.png".format(i // 2), colorkey=(255, 255, 255))   # Make white background invisible(transparent)
+            self.player_energy_cannonball_animation.append(new_frame)
+
+    def load_effects(self):
+        """
+        Load image frames of spawn effects, hit effects and explosions
+        :return: None
+        """
+
+        # Load 64 image frames for animating spawneffect
+        self.spawneffect_animation = []
+        for i in range(8):
+            for j in range(8):
+                new_frame = load_image("img/spawneffect/spawneffect_{}_{}.png".format(i, j), colorkey=(0, 0, 0))    # Set black background of all image frames as transparent
+                self.spawneffect_animation.append(new_frame)
+
+        # Load 9 image frames for animating hiteffect
+        # Black background is transparent, so colorkey is enough and per-pixel alpha is not needed
+        self.hiteffect_animation = []
+        for i in range(9):
+            new_frame = load_image("img/hiteffect/hit_000{}.png".format(i), colorkey=(0, 0, 0))     # Set black background of all image frames as transparent
+            self.hiteffect_animation.append(new_frame)
+
+        # Load image for shockwave
+        self.shockwave_image = load_image("img/explosion/shockwave.png", colorkey=(255, 255, 255))     # Set white background as transparent
+
+        # Load image frames for animating explosions, all animations have shockwave image at the first frame
+        self.explosion_animation_list_small = self.load_explosions([5, 7])                 # For 32x32 images
+        self.explosion_animation_list_medium = self.load_explosions([1, 2, 3, 4, 6, 8])    # For 64x64 images
+        self.explosion_animation_list_large = self.load_explosions([9, 10, 11])            # For 96x96 and 128x128 images
+
+    def load_explosions(self, numbers):
+        """
+        Load image frames of explosion animations, starting with shockwave image
+        :param numbers: numbers of explosion animations to load
+        :return: list of animations (lists of image frames)
+        """
+
+        explosion_animation_list = []
+        for i in numbers:
+            explosion_animation = [self.shockwave_image]
+            j = 0
+            while True:
+                path = "img/explosion/expl_{:0>2}_{:0>4}.png".format(i, j)
+                if not os.path.exists(path):
+                    break
+                new_frame = load_image(path, alpha=True)
+                explosion_animation.append(new_frame)
+                j += 1
+            explosion_animation_list.append(explosion_animation)
+        return explosion_animation_list
+
+    def load_enemies(self):
+        """
+        Load images of enemy sprites
+        :return: None
+        """
+
+        # Load images for StraightLineMover sprites
+        self.straight_line_mover1_img = load_image("img/character/straight_line_mover1.png")
+        self.straight_line_mover1_hit_img = load_image("img/character/straight_line_mover1_hit.png")
+        self.straight_line_mover2_img = load_image("img/character/straight_line_mover2.png")
+        self.straight_line_mover2_hit_img = load_image("img/character/straight_line_mover2_hit.png")
+        self.straight_line_mover3_img = load_image("img/character/straight_line_mover3.png")
+        self.straight_line_mover3_hit_img = load_image("img/character/straight_line_mover3_hit.png")
+
+        # Load images for WallUnit sprites
+        self.wall_unit1_img = load_image("img/character/wall_unit1.png")
+        self.wall_unit1_hit_img = load_image("img/character/wall_unit1_hit.png")
+        self.wall_unit2_img = load_image("img/character/wall_unit2.png")
+        self.wall_unit2_hit_img = load_image("img/character/wall_unit2_hit.png")
+        self.wall_unit3_img = load_image("img/character/wall_unit3.png")
+        self.wall_unit3_hit_img = load_image("img/character/wall_unit3_hit.png")
+
+        # Load images for boss sprites
+        self.boss_lv1_img = load_image("img/character/boss_lv1.png")
+        self.boss_lv1_hit_img = load_image("img/character/boss_lv1_hit.png")
+
+
+# Game play images, loaded at first use
+images = GameImages()
+
+
+class FontRegistry:
+    """
+    Process-wide cache of fonts.
+
+    Each font family is resolved to a font file only once, with the same rules as pygame.font.SysFont(),
+    and Font objects are shared by (family, size, bold, italic). Families not installed on the system use
+    the fallback font file. Fonts can be preloaded from a manifest, optionally on a background thread
+    which resolves families and reads font files, while Font objects are always created on the calling thread.
+    """
+
+    def __init__(self, fallback=None):
+        """
+        :param fallback: path of bundled font file used when a family is not found, None for pygame default font
+        """
+
+        self.fallback = fallback
+        self.fonts = {}             # Font objects, key: (family, size, bold, italic)
+        self.resolved = {}          # (font file path, fake bold, fake italic), key: (family, bold, italic)
+        self.data = {}              # Contents of font files, key: path
+        self.lock = threading.Lock()                # Guards entry_locks
+        self.entry_locks = {}                       # Lock of each resolved entry, key: (family, bold, italic)
+        self.system_fonts_lock = threading.Lock()   # SysFont() scans system fonts at first call, once
+        self.preload_thread = None
+
+    def resolve(self, family, bold=False, italic=False):
+        """
+        Find font file of a family, once
+        :param family: font family name, or comma-separated names to search in order
+        :param bold: whether bold style is needed
+        :param italic: whether italic style is needed
+        :return: (font file path or None if not found, whether bold must be faked, whether italic must be faked)
+        """
+
+        key = (family.lower(), bold, italic)
+        resolved = self.resolved.get(key)
+        if resolved is not None:
+            return resolved
+
+        # Wait only for the same entry being resolved by another thread, not for the others
+        with self.lock:
+            entry_lock = self.entry_locks.setdefault(key, threading.Lock())
+        with entry_lock:
+            if key not in self.resolved:
+                # SysFont searches system fonts and passes the result to constructor, so no font is opened here
+                with self.system_fonts_lock:
+                    path, fake_bold, fake_italic = pygame.font.SysFont(family, 1, bold, italic,
+                                                                       constructor=lambda *result: result[:1] + result[2:])
+                path = path or self.fallback
+                if path and path not in self.data:
+                    try:
+                        with open(path, "rb") as font_file:
+                            self.data[path] = font_file.read()
+                    except OSError:
+                        path = self.fallback if path != self.fallback else None
+                self.resolved[key] = (path, fake_bold, fake_italic)
+            return self.resolved[key]
+
+    def get(self, family, size, bold=False, italic=False):
+        """
+        Get a shared font. The returned font must not be changed (bold, italic, underline and so on).
+        :param family: font family name, or comma-separated names to search in order
+        :param size: font size in pixels
+        :param bold: whether bold style is needed
+        :param italic: whether italic style is needed
+        :return: Font object
+        """
+
+        key = (family.lower(), size, bold, italic)
+        font = self.fonts.get(key)
+        if font is None:
+            path, fake_bold, fake_italic = self.resolve(family, bold, italic)
+            data = self.data.get(path)
+            font = pygame.font.Font(io.BytesIO(data) if data is not None else path, size)
+            font.set_bold(fake_bold)
+            font.set_italic(fake_italic)
+            self.fonts[key] = font
+        return font
+
+    def preload(self, manifest, background=False):
+        """
+        Resolve families and read font files of a manifest in advance
+        :param manifest: list of (family,) or (family, bold, italic) tuples
+        :param background: whether do it on a background thread
+        :return: None
+        """
+
+        if background:
+            self.preload_thread = threading.Thread(target=self.preload, args=(manifest,), name="font preload", daemon=True)
+            self.preload_thread.start()
+            return
+
+        for family, *style in manifest:
+            self.resolve(family, *style)
+
+
+# Font families used by screens, preloaded at startup. Sizes are not needed, a font file serves every size.
+font_manifest = [("verdana",)]
+
+# Shared fonts, falls back to the font file bundled with pygame
+fonts = FontRegistry()
@@ -1,6 +1,124 @@
 from all_sprites_and_groups import *
 
 
+class SpawnAdmission:
+    """
+    Admission control of enemy spawns, keeping the frame loop within its budget.
+
+    Phases ask how many enemies of a kind may be spawned in current frame, instead of spawning one
+    whenever the enemy count is short:
+     - Number of live enemies, including ones still spawning, is capped at max_live_enemies.
+       Coins, effects and HP bars are not counted, so a burst of coins does not block refills.
+     - If recent frames exceeded the frame budget, refills are thinned to one spawn every thin_interval frames
+       for all kinds together, so refill waves do not pile up on frames already busy with coins and explosions.
+       Kinds take turns to be asked first, so the thinned spawns are shared by all kinds.
+     - Recent frame times are read from quality_governor, which measures every frame.
+       In a seeded game, frame times are not used, so only the cap on live enemies limits spawns
+       and the game is reproduced on any machine.
+     - Spawns denied in this way are counted as deferred for each kind, and paid back with extra spawns
+       while recent frames are well below the budget, so difficulty of the phase stays fair.
+    """
+
+    def __init__(self, max_live_enemies=1500, window=8, thin_interval=4, catch_up_rate=2, headroom_ratio=.8):
+        self.frame_budget = 1 / FPS                 # Time allowed for a frame in seconds
+        self.window = window                        # Number of recent frames to average
+        self.max_live_enemies = max_live_enemies    # Maximum number of enemies, spawned or spawning
+        self.thin_interval = thin_interval          # Frames between spawns while over budget
+        self.catch_up_rate = catch_up_rate          # Maximum extra spawns of a kind per frame for deferred ones
+        self.headroom_ratio = headroom_ratio        # Catch up only if average frame time < budget * headroom_ratio
+
+        self.enabled = True
+        self.use_frame_time = True                  # False in seeded games, so decisions do not depend on machine speed
+        self.frame_count = 0
+        self.over_budget = False
+        self.has_headroom = False
+        self.remaining_enemies = max_live_enemies   # Number of enemies allowed to spawn in current frame
+        self.thinned_spawns = 0                     # Number of spawns allowed in current frame while over budget
+        self.deferred_spawns = {}                   # Number of deferred spawns of each enemy class
+
+    def update(self):
+        """
+        Start admission of a new frame, after quality_governor measured the last frame
+        :return: None
+        """
+
+        if self.use_frame_time:
+            average_frame_time = quality_governor.get_average_frame_time(self.window)
+            self.over_budget = average_frame_time > self.frame_budget
+            self.has_headroom = average_frame_time < self.frame_budget * self.headroom_ratio
+
+        self.frame_count += 1
+        # Every spawning enemy has a spawn effect, and joins all_enemies when the effect ends
+        self.remaining_enemies = self.max_live_enemies - len(all_enemies) - len(spawneffect_group)
+        self.thinned_spawns = 1 if self.frame_count % self.thin_interval == 0 else 0
+
+    def admit(self, enemy_class, shortage):
+        """
+        Decide how many enemies of a kind to spawn in current frame
+        :param enemy_class: class of enemy to spawn
+        :param shortage: number of enemies short of the count required by the phase
+        :return: number of enemies to spawn
+        """
+
+        if shortage <= 0:
+            self.deferred_spawns.pop(enemy_class, None)
+            return 0
+        if not self.enabled:
+            return 1
+
+        deferred = self.deferred_spawns.get(enemy_class, 0)
+        count = 1       # One spawn per kind per frame normally
+        if self.over_budget:
+            count = self.thinned_spawns
+            self.thinned_spawns = 0
+        elif self.has_headroom and deferred:
+            count += min(deferred, self.catch_up_rate, shortage - 1)
+        count = max(0, min(count, self.remaining_enemies))
+        self.remaining_enemies -= count
+
+        # Count deferred spawns, never more than the shortage
+        deferred = min(shortage, deferred + 1 - count)
+        if deferred > 0:
+            self.deferred_spawns[enemy_class] = deferred
+        else:
+            self.deferred_spawns.pop(enemy_class, None)
+        return count
+
+    def spawn(self, phase):
+        """
+        Spawn enemies of a phase, as many of each kind as admitted in current frame.
+        Kinds are asked starting from a different one every thin interval of the phase.
+        :param phase: NormalPhase or BossPhase
+        :return: None
+        """
+
+        first_kind = phase.frames_to_clear // self.thin_interval
+        for i in range(phase.num_enemy_kinds):
+            e = (first_kind + i) % phase.num_enemy_kinds
+            enemy_class = phase.enemy_type[e]
+            for _ in range(self.admit(enemy_class, phase.enemy_count[e] - len(enemy_class.group))):
+                enemy_class()
+
+    @staticmethod
+    def get_queue_depth(phase):
+        """
+        Count enemies to be spawned to reach the enemy counts of a phase
+        :param phase: NormalPhase or BossPhase
+        :return: number of enemies not spawned yet
+        """
+
+        return sum(max(0, count - len(enemy_class.group)) for enemy_class, count in zip(phase.enemy_type, phase.enemy_count))
+
+    def clear(self):
+        """
+        Forget deferred spawns and restart counting frames
+        :return: None
+        """
+
+        self.frame_count = 0
+        self.deferred_spawns.clear()
+
+
 class Level:
     """
     A level class that player should clear.
@@ -20,6 +138,10 @@ class Level:
     In boss phase, player should fight with a boss sprite, hard to defeat.
     If player succeeds, then go to the next level, starting from phase 1 again.
     """
+    snapshot_fields = (("phase_num", "i4"), ("current_phase_required_score", "i8"), ("current_phase_score", "i8"),
+                       ("frames_to_clear", "i4"), ("time_to_clear", "f8"), ("cleared", "?"), ("start_score", "i8"), ("score", "i8"),
+                       ("time_average_score", "f8"))
+    snapshot_refs = ("current_phase",)
 
     def __init__(self):
         self.all_phases = []        # List of all phases
@@ -123,6 +245,8 @@ class NormalPhase:
     Normal phase which is the 1st, 2nd, 3rd phase of each level.
     Player should fulfill score requirements to go to the next phase.
     """
+    snapshot_fields = (("current_score", "i8"), ("score_offset", "i8"), ("frames_to_clear", "i4"), ("elapsed_time", "f8"),
+                       ("cleared", "?"))
 
     def __init__(self, required_score, enemy_count_dict):
         self.required_score = required_score    # Score requirement to clear this phase
@@ -158,10 +282,8 @@ class NormalPhase:
         :return: None
         """
 
-        # Generate enemies of given types and count
-        for e in range(self.num_enemy_kinds):
-            if len(self.enemy_type[e].group) < self.enemy_count[e]:
-                self.enemy_type[e]()
+        # Generate enemies of given types and count, as many as admitted in this frame
+        spawn_admission.spawn(self)
 
         # Update current score got in this phase
         self.current_score = player_score[0] - self.score_offset
@@ -188,6 +310,9 @@ class BossPhase:
     The last phase of each level.
     Player should defeat boss of the level.
     """
+    snapshot_fields = (("current_score", "i8"), ("score_offset", "i8"), ("frames_to_clear", "i4"), ("elapsed_time", "f8"),
+                       ("cleared", "?"))
+    snapshot_refs = ("boss",)
 
     def __init__(self, boss_class, enemy_count_dict):
         self.current_score = 0      # Current score to compare with requirement
@@ -229,10 +354,8 @@ class BossPhase:
         :return: None
         """
 
-        # Generate enemies of given types and count
-        for e in range(self.num_enemy_kinds):
-            if len(self.enemy_type[e].group) < self.enemy_count[e]:
-                self.enemy_type[e]()
+        # Generate enemies of given types and count, as many as admitted in this frame
+        spawn_admission.spawn(self)
 
         # Update current score got in this phase
         self.current_score = player_score[0] - self.score_offset
@@ -255,31 +378,45 @@ class BossPhase:
         return self.cleared
 
 
-all_levels = []         # List of all levels
-
-# Define level 1
-level_1 = Level()
-
-level_1.add_phase(NormalPhase(required_score=300,           # Phase 1
-                              enemy_count_dict={"enemy_type": [StraightLineMover1],
-                                                "enemy_count": [120]}))
-"""
-level_1.add_phase(NormalPhase(required_score=3000000,           # Phase 1
-                              enemy_count_dict={"enemy_type": [Wall2],
-                                                "enemy_count": [300]}))
-"""
-level_1.add_phase(NormalPhase(required_score=600,           # Phase 2
-                              enemy_count_dict={"enemy_type": [StraightLineMover1,
-                                                               StraightLineMover2],
-                                                "enemy_count": [160, 40]}))
-level_1.add_phase(NormalPhase(required_score=1500,          # Phase 3
-                              enemy_count_dict={"enemy_type": [StraightLineMover1,
-                                                               StraightLineMover2,
-                                                               StraightLineMover3],
-                                                "enemy_count": [200, 70, 30]}))
-level_1.add_phase(BossPhase(boss_class=BossLV1,             # Phase 5 (boss)
-                            enemy_count_dict={"enemy_type": [StraightLineMover1,
-                                                             StraightLineMover2,
-                                                             StraightLineMover3],
-                                              "enemy_count": [200, 70, 30]}))
-all_levels.append(level_1)
+# Generate spawn admission controller, limits enemy spawns of phases
+spawn_admission = SpawnAdmission()
+
+all_levels = []         # List of all levels, built by build_levels()
+
+
+def build_levels():
+    """
+    Build all levels, once. Called when game play is loaded, not at import.
+    :return: list of all levels
+    """
+
+    if all_levels:
+        return all_levels
+
+    # Define level 1
+    level_1 = Level()
+
+    level_1.add_phase(NormalPhase(required_score=300,           # Phase 1
+                                  enemy_count_dict={"enemy_type": [StraightLineMover1],
+                                                    "enemy_count": [120]}))
+    """
+    level_1.add_phase(NormalPhase(required_score=3000000,           # Phase 1
+                                  enemy_count_dict={"enemy_type": [Wall2],
+                                                    "enemy_count": [300]}))
+    """
+    level_1.add_phase(NormalPhase(required_score=600,           # Phase 2
+                                  enemy_count_dict={"enemy_type": [StraightLineMover1,
+                                                                   StraightLineMover2],
+                                                    "enemy_count": [160, 40]}))
+    level_1.add_phase(NormalPhase(required_score=1500,          # Phase 3
+                                  enemy_count_dict={"enemy_type": [StraightLineMover1,
+                                                                   StraightLineMover2,
+                                                                   StraightLineMover3],
+                                                    "enemy_count": [200, 70, 30]}))
+    level_1.add_phase(BossPhase(boss_class=BossLV1,             # Phase 5 (boss)
+                                enemy_count_dict={"enemy_type": [StraightLineMover1,
+                                                                 StraightLineMover2,
+                                                                 StraightLineMover3],
+                                                  "enemy_count": [200, 70, 30]}))
+    all_levels.append(level_1)
+    return all_levels
@@ -1,10 +1,70 @@
+import sys
+import time
+
+import screens
+from metrics import FrameMetrics, LatencyTracker, MetricsServer
 from screens import *
 
 
-main_menu.show()
+# Show main menu first, game play is loaded while main menu is shown or when the game starts
+main_menu = bootstrap()
+
+# Pipelined rendering: game play screen is drawn on a render thread while the next frame is updated
+pipelined = "--pipelined" in sys.argv
+if pipelined:
+    render_pipeline.start()
+
+# Sharded sprite updates on a thread pool, enabled by default only on free-threaded Python builds
+if "--sharded-update" in sys.argv:
+    sprite_updater.enabled = True
+
+# Enemy movement simulated in a worker process, sharing positions through shared memory
+if "--swarm-worker" in sys.argv:
+    swarm_simulation.start()
+
+# Seeded random streams: the same seed reproduces the same game, "--seed=<integer>"
+# Quality and spawns are not adjusted by measured frame time then, which differs by machine and run
+for arg in sys.argv:
+    if arg.startswith("--seed="):
+        random_streams.seed(int(arg.partition("=")[2]))
+        quality_governor.enabled = False
+        spawn_admission.use_frame_time = False
+
+# Pixel-accurate collision: projectiles colliding by rect are checked again with image masks
+if "--pixel-collision" in sys.argv:
+    pixel_accurate_collision[0] = True
+
+# Background cache: composed background is scrolled, and only newly exposed strips are redrawn
+if "--background-cache" in sys.argv:
+    background_cache[0] = True
+
+# Rewind: snapshots of game play are recorded every few frames, and holding R key rewinds it
+if "--rewind" in sys.argv:
+    rewind_buffer.enabled = True
+
+# Late latch: cursor position is sampled again just before drawing game play screen
+late_latch = "--late-latch" in sys.argv
+
+# Input-to-display latency, reported at exit with "--latency" and served with metrics
+input_latency = LatencyTracker()
+
+# Local metrics endpoint in Prometheus text format, "--metrics" or "--metrics=<port>"
+frame_metrics = metrics_server = None
+for arg in sys.argv:
+    if arg.startswith("--metrics"):
+        frame_metrics = FrameMetrics(groups={"all_sprites": all_sprites, "all_enemies": all_enemies,
+                                             "player_projectiles": player_projectiles, "coin_group": coin_group,
+                                             "spawneffect_group": spawneffect_group, "hiteffect_group": hiteffect_group,
+                                             "explosion_group": explosion_group, "hp_bar_group": hp_bar_group},
+                                     spawn_queue_depth=lambda: spawn_admission.get_queue_depth(screens.play_screen.current_level.current_phase)
+                                     if screens.play_screen else 0,
+                                     latency=input_latency)
+        metrics_server = MetricsServer(frame_metrics, int(arg.partition("=")[2] or 9464))
+        metrics_server.start()
 
 # Main game loop
 mouse_button_down = False   # Variable to check mouse button click event
+frame_start = time.perf_counter()
 while not is_terminated():
 
     # Get all events occurred during the game
@@ -20,21 +80,67 @@ while not is_terminated():
 
     # Get cursor position on the screen
     curspos_screen = pygame.mouse.get_pos()        # Position displayed on screen
+    input_latency.sample_input()
 
-    # Update and draw main menu screen
-    if main_menu.now_display:
-        main_menu.update(curspos_screen, mouse_button_down)
-        main_menu.draw(screen)
+    update_time = draw_time = 0     # Time spent for updating and drawing screens in this frame
+    play_screen = screens.play_screen   # None until game play is loaded
 
-    # Update and draw game play screen
-    if play_screen.now_display:
+    if pipelined and play_screen and play_screen.now_display:
+        # Update frame N while render thread draws frame N-1
+        stage_start = time.perf_counter()
         play_screen.update(curspos_screen, mouse_button_down)
-        play_screen.draw(screen)
+        update_time = time.perf_counter() - stage_start
+
+        render_pipeline.wait()          # Wait until frame N-1 is drawn
+        render_pipeline.present()       # Copy frame N-1 to the display
+        pygame.display.update()         # Show frame N-1
+        input_latency.present(frames_in_flight=1)
+
+        # Hand over frame N to render thread, unless game play screen is closed during the update
+        stage_start = time.perf_counter()
+        if play_screen.now_display:
+            if late_latch:
+                play_screen.late_latch()
+                input_latency.resample_input()
+            render_pipeline.submit(play_screen.make_snapshot())
+        draw_time = time.perf_counter() - stage_start
+
+    else:
+        render_pipeline.wait()          # Frame submitted last is not needed anymore, but let render thread finish it
 
-    # Update and draw game over screen
-    if game_over_screen.now_display:
-        game_over_screen.update(curspos_screen, mouse_button_down)
-        game_over_screen.draw(screen)
+        # Update and draw main menu, game play, and game over screen
+        for current_screen in get_screens():
+            if current_screen.now_display:
+                stage_start = time.perf_counter()
+                current_screen.update(curspos_screen, mouse_button_down)
+                if late_latch and current_screen is play_screen and current_screen.now_display:
+                    current_screen.late_latch()
+                    input_latency.resample_input()
+                stage_end = time.perf_counter()
+                current_screen.draw(screen)
+                update_time += stage_end - stage_start
+                draw_time += time.perf_counter() - stage_end
+
+        pygame.display.update()     # update all display changes and show them
+        input_latency.present()
+
+        # Load game play images little by little while main menu is shown
+        if main_menu.now_display:
+            preload_game_play()
 
-    pygame.display.update()     # update all display changes and show them
     fps_clock.tick(FPS)         # make program never run at more than "FPS" frames per second
+
+    # Record frame statistics for metrics endpoint
+    if frame_metrics:
+        frame_end = time.perf_counter()
+        frame_metrics.record_frame(frame_end - frame_start, update_time, draw_time)
+        frame_start = frame_end
+
+if pipelined:
+    render_pipeline.stop()
+sprite_updater.shutdown()
+swarm_simulation.stop()
+if metrics_server:
+    metrics_server.stop()
+if "--latency" in sys.argv:
+    print(input_latency.report())
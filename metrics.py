@@ -0,0 +1,362 @@
+"""
+Python file for serving live game statistics in Prometheus text format over a local HTTP endpoint
+"""
+
+import gc
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+# Upper bounds of histogram buckets in seconds
+frame_time_buckets = (.004, .008, .012, .0167, .02, .025, .0333, .05, .1, .25)
+gc_pause_buckets = (.0001, .0005, .001, .002, .005, .01, .02, .05, .1)
+latency_buckets = (.008, .016, .025, .033, .05, .067, .083, .1, .15, .25)
+
+
+class Histogram:
+    """
+    Prometheus histogram with fixed buckets.
+
+    Observing a value only increments a bucket count and the sum, so it costs almost nothing on the game thread.
+    Counts are read by the HTTP thread without a lock, so a scrape may see one observation in progress.
+    """
+
+    def __init__(self, name, description, buckets, labels=""):
+        """
+        :param name: metric name
+        :param description: help text
+        :param buckets: upper bounds of buckets in increasing order
+        :param labels: label string like 'stage="update"', empty for no label
+        """
+
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.labels = labels
+        self.counts = [0] * (len(buckets) + 1)      # Last one is for values over the largest bound
+        self.sum = 0.
+
+    def observe(self, value):
+        """
+        Count a value
+        :param value: observed value
+        :return: None
+        """
+
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, header=True):
+        """
+        Get text lines of this histogram
+        :param header: whether include HELP and TYPE lines
+        :return: list of lines
+        """
+
+        lines = []
+        if header:
+            lines.append("# HELP {} {}".format(self.name, self.description))
+            lines.append("# TYPE {} histogram".format(self.name))
+        prefix = self.labels + "," if self.labels else ""
+        suffix = "{" + self.labels + "}" if self.labels else ""
+
+        counts = list(self.counts)
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            lines.append('{}_bucket{{{}le="{}"}} {}'.format(self.name, prefix, bound, cumulative))
+        cumulative += counts[-1]
+        lines.append('{}_bucket{{{}le="+Inf"}} {}'.format(self.name, prefix, cumulative))
+        lines.append("{}_sum{} {}".format(self.name, suffix, self.sum))
+        lines.append("{}_count{} {}".format(self.name, suffix, cumulative))
+        return lines
+
+
+def get_rss_bytes():
+    """
+    Get resident set size of this process
+    :return: RSS in bytes, None if not available
+    """
+
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class ProcessMemoryCounters(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                     ctypes.byref(counters), counters.cb)
+            return counters.WorkingSetSize
+
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, AttributeError, ValueError):
+        return None
+
+
+class LatencyTracker:
+    """
+    Input-to-display latency: time from sampling player input to showing the frame using it.
+
+    Input time of each frame is kept until the frame is presented by display update.
+    With pipelined rendering, a frame is presented one loop later, so sample times wait in a short queue.
+    Latencies of recent frames are kept for percentiles, and all of them are counted in a histogram.
+    """
+
+    def __init__(self, window=600, prefix="slay_the_swarm"):
+        """
+        :param window: number of recent frames used for percentiles
+        :param prefix: prefix of metric names
+        """
+
+        self.pending = deque()                      # Input sample times of frames not presented yet
+        self.latencies = deque(maxlen=window)       # Latencies of recent frames in seconds
+        self.histogram = Histogram(prefix + "_input_latency_seconds",
+                                   "Time from sampling input to presenting the frame.", latency_buckets)
+
+    def sample_input(self):
+        """
+        Record input sample time of a new frame. Called when input is read at the start of a frame.
+        :return: None
+        """
+
+        self.pending.append(time.perf_counter())
+
+    def resample_input(self):
+        """
+        Replace input sample time of the newest frame, when input is read again late in the frame
+        :return: None
+        """
+
+        if self.pending:
+            self.pending[-1] = time.perf_counter()
+
+    def present(self, frames_in_flight=0):
+        """
+        Record latency of the frame just presented. Called right after display update.
+        :param frames_in_flight: number of newer frames sampled but not presented yet (1 when pipelined)
+        :return: None
+        """
+
+        now = time.perf_counter()
+        while len(self.pending) > frames_in_flight + 1:
+            self.pending.popleft()          # Frames never presented, like ones skipped when switching screens
+        if len(self.pending) > frames_in_flight:
+            latency = now - self.pending.popleft()
+            self.latencies.append(latency)
+            self.histogram.observe(latency)
+
+    def percentiles(self, quantiles=(.5, .9, .99)):
+        """
+        Get latency percentiles of recent frames
+        :param quantiles: quantiles to get, between 0 and 1
+        :return: list of latencies in seconds, empty if no frame is presented yet
+        """
+
+        if not self.latencies:
+            return []
+        latencies = sorted(self.latencies)
+        return [latencies[min(len(latencies) - 1, int(quantile * len(latencies)))] for quantile in quantiles]
+
+    def report(self):
+        """
+        Get a line of latency percentiles in milliseconds
+        :return: text of report
+        """
+
+        values = self.percentiles()
+        if not values:
+            return "input latency: no frames presented"
+        return "input latency over {} frames: p50 {:.1f} ms, p90 {:.1f} ms, p99 {:.1f} ms".format(
+            len(self.latencies), *[value * 1000 for value in values])
+
+    def render(self):
+        """
+        Get text lines of latency histogram and percentiles in Prometheus text format
+        :return: list of lines
+        """
+
+        name = self.histogram.name
+        lines = self.histogram.render()
+        lines.append("# HELP {}_recent Input latency percentiles of recent frames.".format(name))
+        lines.append("# TYPE {}_recent summary".format(name))
+        quantiles = (.5, .9, .99)
+        for quantile, value in zip(quantiles, self.percentiles(quantiles)):
+            lines.append('{}_recent{{quantile="{}"}} {}'.format(name, quantile, value))
+        return lines
+
+
+class FrameMetrics:
+    """
+    Live statistics of the game: frame time, update/draw split, GC pauses, input latency, sprite counts,
+    spawn queue and memory.
+
+    The game thread only records times once per frame. Sprite counts, spawn queue depth and memory
+    are read when metrics are requested, on the HTTP thread.
+    """
+
+    def __init__(self, groups, spawn_queue_depth=None, latency=None, prefix="slay_the_swarm"):
+        """
+        :param groups: dict of group name and sprite group to count
+        :param spawn_queue_depth: function returning the number of enemies waiting to be spawned
+        :param latency: LatencyTracker instance to serve, None for no latency metrics
+        :param prefix: prefix of metric names
+        """
+
+        self.groups = groups
+        self.spawn_queue_depth = spawn_queue_depth
+        self.latency = latency
+        self.prefix = prefix
+
+        self.frame_time = Histogram(prefix + "_frame_seconds", "Time between two frames.", frame_time_buckets)
+        self.stage_times = [Histogram(prefix + "_stage_seconds", "Time spent in each stage of a frame.",
+                                      frame_time_buckets, 'stage="{}"'.format(stage)) for stage in ["update", "draw"]]
+        self.gc_pause = Histogram(prefix + "_gc_pause_seconds", "Pause time of garbage collection.", gc_pause_buckets)
+        self.gc_collections = [0, 0, 0]     # Number of collections of each generation
+        self.gc_start = 0.
+        self.start_time = time.time()
+
+    def record_frame(self, frame_time, update_time, draw_time):
+        """
+        Record times of a frame. Called once per frame on the game thread.
+        :param frame_time: time from previous frame in seconds
+        :param update_time: time spent for updating in seconds
+        :param draw_time: time spent for drawing in seconds
+        :return: None
+        """
+
+        self.frame_time.observe(frame_time)
+        self.stage_times[0].observe(update_time)
+        self.stage_times[1].observe(draw_time)
+
+    def watch_gc(self):
+        """
+        Start measuring pauses of garbage collection
+        :return: None
+        """
+
+        if self.on_gc not in gc.callbacks:
+            gc.callbacks.append(self.on_gc)
+
+    def on_gc(self, phase, info):
+        """
+        Callback of garbage collector, measures pause time
+        :param phase: "start" or "stop"
+        :param info: dict containing generation
+        :return: None
+        """
+
+        if phase == "start":
+            self.gc_start = time.perf_counter()
+        else:
+            self.gc_pause.observe(time.perf_counter() - self.gc_start)
+            self.gc_collections[info["generation"]] += 1
+
+    def render(self):
+        """
+        Get all metrics in Prometheus text format
+        :return: text of all metrics
+        """
+
+        prefix = self.prefix
+        lines = self.frame_time.render()
+        lines += self.stage_times[0].render() + self.stage_times[1].render(header=False)
+        lines += self.gc_pause.render()
+        if self.latency:
+            lines += self.latency.render()
+
+        lines.append("# HELP {}_gc_collections_total Number of garbage collections.".format(prefix))
+        lines.append("# TYPE {}_gc_collections_total counter".format(prefix))
+        for generation, count in enumerate(self.gc_collections):
+            lines.append('{}_gc_collections_total{{generation="{}"}} {}'.format(prefix, generation, count))
+
+        lines.append("# HELP {}_sprites Number of live sprites in each group.".format(prefix))
+        lines.append("# TYPE {}_sprites gauge".format(prefix))
+        for name, group in self.groups.items():
+            lines.append('{}_sprites{{group="{}"}} {}'.format(prefix, name, len(group)))
+
+        if self.spawn_queue_depth:
+            lines.append("# HELP {}_spawn_queue_depth Number of enemies waiting to be spawned.".format(prefix))
+            lines.append("# TYPE {}_spawn_queue_depth gauge".format(prefix))
+            lines.append("{}_spawn_queue_depth {}".format(prefix, self.spawn_queue_depth()))
+
+        rss = get_rss_bytes()
+        if rss is not None:
+            lines.append("# HELP process_resident_memory_bytes Resident memory size in bytes.")
+            lines.append("# TYPE process_resident_memory_bytes gauge")
+            lines.append("process_resident_memory_bytes {}".format(rss))
+
+        lines.append("# HELP process_start_time_seconds Start time of the process since unix epoch in seconds.")
+        lines.append("# TYPE process_start_time_seconds gauge")
+        lines.append("process_start_time_seconds {}".format(self.start_time))
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Local HTTP server providing metrics at /metrics, running on a background thread
+    """
+
+    def __init__(self, metrics, port=9464, host="127.0.0.1"):
+        """
+        :param metrics: FrameMetrics instance to serve
+        :param port: port to listen
+        :param host: address to bind, local only by default
+        """
+
+        self.metrics = metrics
+        self.address = (host, port)
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        """
+        Start serving on a daemon thread
+        :return: None
+        """
+
+        metrics = self.metrics
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass        # Do not print every request
+
+        self.metrics.watch_gc()
+        self.server = HTTPServer(self.address, MetricsHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop serving
+        :return: None
+        """
+
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
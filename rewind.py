@@ -0,0 +1,263 @@
+"""
+Python file for rewinding game play to recent states using compact snapshots
+"""
+
+from collections import deque
+from operator import attrgetter
+
+from levels_phases import *
+
+
+# Sprite groups whose memberships are saved in snapshots
+snapshot_groups = all_groups
+
+snapshot_dtype_cache = {}       # NumPy structured type of each class, key: class
+
+
+def get_snapshot_dtype(cls):
+    """
+    Get NumPy structured type packing numerical attributes (class attribute "snapshot_fields") of a class
+    :param cls: class of objects to save
+    :return: (structured type, getter of numerical attributes, getter of references)
+    """
+
+    if cls not in snapshot_dtype_cache:
+        fields = getattr(cls, "snapshot_fields", ())
+        refs = getattr(cls, "snapshot_refs", ())
+        dtype = np.dtype(list(fields))
+        field_getter = attrgetter(*dtype.names) if fields else None
+        ref_getter = attrgetter(*refs) if refs else None
+        snapshot_dtype_cache[cls] = (dtype, field_getter, ref_getter)
+    return snapshot_dtype_cache[cls]
+
+
+def pack_fields(objects, dtype, field_getter):
+    """
+    Pack numerical attributes of objects of a class into a structured array
+    :param objects: objects of the same class
+    :param dtype: structured type of the class
+    :param field_getter: getter of all numerical attributes
+    :return: structured array
+    """
+
+    records = [field_getter(obj) for obj in objects]
+    if len(dtype.names) == 1:
+        records = [(record,) for record in records]
+    return np.array(records, dtype)
+
+
+def set_group_members(group, sprites):
+    """
+    Make a group contain given sprites in given order. Only sprites added or removed since are added or removed,
+    so sprites kept in the group are not registered in entity registry again.
+    :param group: sprite group
+    :param sprites: list of sprites in order
+    :return: None
+    """
+
+    group.remove(*(group.spritedict.keys() - set(sprites)))
+    group.add(*[sprite for sprite in sprites if sprite not in group.spritedict])
+    if group.sprites() != sprites:      # Update order matters for reproducing the game
+        group.spritedict = {sprite: group.spritedict[sprite] for sprite in sprites}
+        if isinstance(group, EntityGroup):
+            group.other_sprites = dict.fromkeys(sprite for sprite in sprites if sprite in group.other_sprites)
+
+
+class WorldSnapshot:
+    """
+    Compact snapshot of full game state at a frame.
+
+    Enemies are saved by copying component arrays of entity registry at once.
+    Numerical attributes of other sprites and game objects (positions, speeds, HP, animation frames, timers)
+    are packed into bytes of NumPy structured arrays, one per class.
+    Sprites, images and other objects are kept only as references, never copied or pickled.
+    So a killed sprite can be revived by restoring its attributes and adding it to its groups again.
+    """
+
+    def __init__(self, extra_objects):
+        """
+        Take a snapshot of current game state
+        :param extra_objects: game objects to save other than sprites, weapons, levels and phases
+        """
+
+        # Group memberships in update order, and all components of enemies
+        self.members = [group.sprites() for group in snapshot_groups]
+        self.entities = entity_registry.get_state()
+
+        # Other sprites with screen position and image. Sprites are stored in entity registry only while in all_sprites
+        outside = [sprite for group in snapshot_groups for sprite in set(group.spritedict).difference(all_sprites.spritedict)]
+        self.sprites = list(dict.fromkeys(all_sprites.get_other_sprites() + outside))
+        self.rects = np.array([tuple(sprite.rect) for sprite in self.sprites], np.int32).tobytes()
+        self.images = [sprite.image for sprite in self.sprites]
+
+        # Attributes of all other objects, grouped by class
+        objects = self.sprites + extra_objects + [field_vibrator]
+        for sprite in player_group:
+            objects += [sprite.automatic_weapon, sprite.manual_weapon, sprite.beam_weapon]
+        for level in all_levels:
+            objects += [level] + level.all_phases
+
+        objects_by_class = {}
+        for obj in objects:
+            objects_by_class.setdefault(type(obj), []).append(obj)
+
+        self.tables = []            # List of (objects, packed numerical attributes, references)
+        for cls, class_objects in objects_by_class.items():
+            dtype, field_getter, ref_getter = get_snapshot_dtype(cls)
+            if field_getter is None and ref_getter is None:
+                continue
+            data = b""
+            if field_getter:
+                data = pack_fields(class_objects, dtype, field_getter).tobytes()
+            refs = [ref_getter(obj) for obj in class_objects] if ref_getter else None
+            self.tables.append((class_objects, data, refs))
+
+        # Enemy bullets, as bytes of their arrays
+        self.enemy_bullets = enemy_bullets.pool.get_state()
+
+        # Global state
+        self.player_score = player_score[0]
+        self.camera_offset = list(camera_offset)
+        self.random_state = random_streams.getstate()
+
+    def restore(self):
+        """
+        Bring back the game to the state of this snapshot
+        :return: None
+        """
+
+        # Group memberships, then components of enemies in place
+        for group, members in zip(snapshot_groups, self.members):
+            set_group_members(group, members)
+        entity_registry.set_state(self.entities)
+        for ids, arrays in self.entities.values():
+            for sprite, entity in zip(arrays["sprite"].tolist() if "sprite" in arrays else [], ids.tolist()):
+                sprite.__dict__["entity"] = entity      # Revived sprites get back their entities
+
+        # Numerical attributes and references
+        for class_objects, data, refs in self.tables:
+            dtype = get_snapshot_dtype(type(class_objects[0]))[0]
+            if data:
+                table = np.frombuffer(data, dtype)
+                for name in dtype.names:
+                    for obj, value in zip(class_objects, table[name].tolist()):
+                        setattr(obj, name, value)
+            if refs:
+                ref_names = type(class_objects[0]).snapshot_refs
+                if len(ref_names) == 1:
+                    refs = [(ref,) for ref in refs]
+                for obj, values in zip(class_objects, refs):
+                    for name, value in zip(ref_names, values):
+                        setattr(obj, name, value)
+
+        # Other sprites: screen position and image
+        rects = np.frombuffer(self.rects, np.int32).reshape(-1, 4).tolist()
+        for sprite, rect, image in zip(self.sprites, rects, self.images):
+            sprite.rect = pygame.Rect(rect)
+            sprite.image = image
+
+        # Enemy bullets
+        enemy_bullets.pool.set_state(self.enemy_bullets)
+
+        # Global state
+        player_score[0] = self.player_score
+        camera_offset[:] = self.camera_offset
+        random_streams.setstate(self.random_state)
+
+        # Screen positions of enemies
+        for archetype in entity_registry.query("position", "rect", "sprite"):
+            place_entity_sprites(archetype)
+
+        # Forget events of the frames after this snapshot
+        damage_buffer.clear()
+        effect_manager.clear()
+
+        # Simulated positions in worker process are newer than this snapshot, so spawn enemies again
+        if swarm_simulation.running:
+            swarm_simulation.clear()
+            for enemy in all_enemies:
+                if hasattr(enemy, "swarm_slot"):
+                    enemy.swarm_slot = None
+                    join_swarm(enemy)
+
+
+class RewindBuffer:
+    """
+    Ring buffer of recent snapshots, taken at a fixed interval of frames.
+    Oldest snapshots are dropped when full, so the buffer holds the last few seconds of game play.
+    Disabled by default: no snapshot is taken until enabled.
+    """
+
+    def __init__(self, seconds=10, interval=6):
+        """
+        :param seconds: length of game play to hold in seconds
+        :param interval: number of frames between snapshots
+        """
+
+        self.interval = interval
+        self.snapshots = deque(maxlen=max(1, seconds * FPS // interval))
+        self.frame_count = 0
+        self.step_cooldown = 0          # Frames left until step_back() restores next snapshot
+        self.enabled = False
+
+    def record(self, extra_objects):
+        """
+        Count a frame, and take a snapshot every interval. Called once per frame after updating all sprites.
+        :param extra_objects: game objects to save other than sprites, weapons, levels and phases
+        :return: None
+        """
+
+        if not self.enabled:
+            return
+        self.step_cooldown = 0
+        if self.frame_count % self.interval == 0:
+            self.snapshots.append(WorldSnapshot(extra_objects))
+        self.frame_count += 1
+
+    def rewind(self, seconds):
+        """
+        Restore the snapshot taken a given time ago (or the oldest one), dropping all newer snapshots
+        :param seconds: time to go back in seconds
+        :return: False if no snapshot is held, True otherwise
+        """
+
+        if not self.snapshots:
+            return False
+        steps = min(len(self.snapshots), max(1, round(seconds * FPS / self.interval)))
+        for _ in range(steps - 1):
+            self.snapshots.pop()
+        self.snapshots[-1].restore()
+        self.frame_count = 1            # Next snapshot after an interval
+        return True
+
+    def step_back(self):
+        """
+        Restore the latest snapshot and drop it, so game play goes back by an interval.
+        Called every frame while rewinding, but restores once per interval of frames,
+        so game play is rewound at the speed it was played.
+        :return: False if no snapshot is held, True otherwise
+        """
+
+        if not self.snapshots:
+            return False
+        if self.step_cooldown > 0:
+            self.step_cooldown -= 1
+            return True
+        self.snapshots.pop().restore()
+        self.frame_count = 0
+        self.step_cooldown = self.interval - 1
+        return True
+
+    def clear(self):
+        """
+        Drop all snapshots
+        :return: None
+        """
+
+        self.snapshots.clear()
+        self.frame_count = 0
+        self.step_cooldown = 0
+
+
+# Generate rewind buffer, holds snapshots of last 10 seconds
+rewind_buffer = RewindBuffer(seconds=10, interval=6)
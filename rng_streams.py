@@ -0,0 +1,192 @@
+"""
+Python file for seedable random number streams, one per subsystem
+
+Each subsystem (spawning, combat, effects, coins) draws from its own stream, so adding or removing draws in one
+subsystem does not change sequences of the others. Streams are NumPy generators seeded from one seed, and values
+are drawn in batches, so a single draw is just reading the next value of a list.
+With the same seed, every run produces exactly the same sequences.
+"""
+
+import math
+
+import numpy as np
+
+
+class RandomStream:
+    """
+    Random number stream drawing uniform values in [0, 1) from a NumPy generator in batches.
+    Has the same methods as the random module used by the game, all computed from the next uniform value.
+    """
+
+    def __init__(self, seed_sequence, batch_size=4096):
+        """
+        :param seed_sequence: NumPy SeedSequence of this stream
+        :param batch_size: number of values drawn at once
+        """
+
+        self.generator = np.random.Generator(np.random.PCG64(seed_sequence))
+        self.batch_size = batch_size
+        self.batch_state = None         # State of generator before drawing current batch, to restore the stream
+        self.batch = []                 # Current batch of uniform values
+        self.index = 0                  # Index of next value in current batch
+        self.draw_batch()
+
+    def draw_batch(self):
+        """
+        Draw next batch of uniform values
+        :return: None
+        """
+
+        self.batch_state = self.generator.bit_generator.state
+        self.batch = self.generator.random(self.batch_size).tolist()
+        self.index = 0
+
+    def random(self):
+        """
+        Get next uniform value
+        :return: float in [0, 1)
+        """
+
+        if self.index == self.batch_size:
+            self.draw_batch()
+        value = self.batch[self.index]
+        self.index += 1
+        return value
+
+    def uniform(self, a, b):
+        """
+        Get a uniform value between a and b
+        :param a: one end of range
+        :param b: the other end of range
+        :return: float between a and b
+        """
+
+        if self.index == self.batch_size:       # Called most often, so reads the batch directly
+            self.draw_batch()
+        value = self.batch[self.index]
+        self.index += 1
+        return a + (b - a) * value
+
+    def randrange(self, start, stop=None):
+        """
+        Get a random integer in range(start, stop), or range(start) if stop is not given
+        :param start: start of range
+        :param stop: end of range (excluded)
+        :return: integer
+        """
+
+        if stop is None:
+            start, stop = 0, start
+        if stop <= start:
+            raise ValueError("empty range for randrange() ({}, {})".format(start, stop))
+        return start + math.floor((stop - start) * self.random())
+
+    def randint(self, a, b):
+        """
+        Get a random integer between a and b, both included
+        :param a: minimum
+        :param b: maximum
+        :return: integer
+        """
+
+        return self.randrange(a, b + 1)
+
+    def choice(self, sequence):
+        """
+        Get a random element of a sequence
+        :param sequence: non-empty sequence
+        :return: an element
+        """
+
+        return sequence[math.floor(len(sequence) * self.random())]
+
+    def uniform_array(self, low, high, n):
+        """
+        Get n uniform values at once, the same values as n calls of uniform()
+        :param low: one end of range, scalar or array broadcast to n values
+        :param high: the other end of range, scalar or array broadcast to n values
+        :param n: number of values
+        :return: array of n floats
+        """
+
+        values = self.batch[self.index:self.index + n]
+        self.index += len(values)
+        while len(values) < n:
+            self.draw_batch()
+            self.index = min(n - len(values), self.batch_size)
+            values += self.batch[:self.index]
+        return np.asarray(low) + (np.asarray(high) - np.asarray(low)) * np.array(values)
+
+    def getstate(self):
+        """
+        Get state of this stream, to restore later
+        :return: state
+        """
+
+        return self.batch_state, self.index
+
+    def setstate(self, state):
+        """
+        Restore state taken by getstate()
+        :param state: state of this stream
+        :return: None
+        """
+
+        batch_state, index = state
+        self.generator.bit_generator.state = batch_state
+        self.draw_batch()
+        self.index = index                      # Skip values drawn before the state was taken
+
+
+class RandomStreams:
+    """
+    Independent random streams of all subsystems, spawned from one seed.
+    Each stream is an attribute named after its subsystem (random_streams.spawn.uniform(...), etc.).
+    """
+    names = ("spawn", "combat", "effects", "coins")
+
+    def __init__(self, seed=None):
+        """
+        :param seed: integer seed, None for a new random seed every time streams are reset
+        """
+
+        self.seed_value = seed
+        self.reset()
+
+    def seed(self, seed):
+        """
+        Change seed and restart all streams
+        :param seed: integer seed, None for a new random seed every time streams are reset
+        :return: None
+        """
+
+        self.seed_value = seed
+        self.reset()
+
+    def reset(self):
+        """
+        Restart all streams from the seed, so the same sequences are drawn again
+        :return: None
+        """
+
+        seed_sequences = np.random.SeedSequence(self.seed_value).spawn(len(self.names))
+        for name, seed_sequence in zip(self.names, seed_sequences):
+            setattr(self, name, RandomStream(seed_sequence))
+
+    def getstate(self):
+        """
+        Get states of all streams
+        :return: dict of stream name and state
+        """
+
+        return {name: getattr(self, name).getstate() for name in self.names}
+
+    def setstate(self, states):
+        """
+        Restore states of all streams taken by getstate()
+        :param states: dict of stream name and state
+        :return: None
+        """
+
+        for name, state in states.items():
+            getattr(self, name).setstate(state)
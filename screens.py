@@ -1,6 +1,10 @@
+import copy
+import threading
+
 import pygame.draw
+import pygame.surfarray
 
-from levels_phases import *
+from rewind import *
 
 
 class Text:
@@ -11,7 +15,7 @@ class Text:
     def __init__(self, text, font, font_size, pos, fixpoint="topleft", color=(255, 255, 255)):
         self.text = text                                                    # Content to display
         self.font_size = font_size                                          # Size of this text
-        self.font = pygame.font.SysFont(font, self.font_size)               # Create font
+        self.font = fonts.get(font, self.font_size)                         # Get shared font
         self.color = color                                                  # Color of this text
         self.text_surface = self.font.render(self.text, True, self.color)   # Create text surface
         self.rect = self.text_surface.get_rect()                            # Surface rect
@@ -99,7 +103,7 @@ class Button(pygame.sprite.Sprite):
 
         # Color attrubutes
         self.active_color = color
-        self.font = pygame.font.SysFont(self.text_font, self.text_font_size)
+        self.font = fonts.get(self.text_font, self.text_font_size)
         self.text_surface = self.font.render(self.text, True, self.active_color)
         self.text_surface_rect = self.text_surface.get_rect(center=self.rect.center)
 
@@ -273,9 +277,9 @@ class StartButton(Button):
         :return: None
         """
 
-        # Hide main menu and show game play screen
+        # Hide main menu and show game play screen, loading game play at first start
         main_menu.hide()
-        play_screen.show()
+        load_game_play().show()
 
         # Hide mouse cursor
         pygame.mouse.set_visible(False)
@@ -319,7 +323,7 @@ class MainMenuScreen:
         self.title_text = Text("SLAY THE SWARM", "verdana", 80, (960, 100), "center")
 
         # Main image
-        self.main_image = pygame.image.load("img/icon/icon.png")
+        self.main_image = load_image("img/icon/icon.png", alpha=True)
         self.main_image_rect = self.main_image.get_rect(center=(960, 540))
 
         # Start and quit button
@@ -376,38 +380,116 @@ class MainMenuScreen:
 class Background:
     """
     Background movement control & display class.
-    5000px x 5000px background is splitted into 4 2500px x 2500px subbackground and controlled individually
-    to implement infinitly scrolled background.
+    Background image is a tile repeated over the entire field to implement infinitly scrolled background.
+    Only the parts of tiles visible on the screen are blitted, using "area" argument of blit.
+
+    If use_cache is True, the composed screen-sized background is cached.
+    When camera moves only by a few pixels, the cache is copied shifted into a second cache surface
+    and only newly exposed strips are redrawn. The two surfaces take turns, so a cache handed over
+    to render thread is not modified while the next frame is updated.
     """
 
-    def __init__(self, image, screen_size, camera):
+    def __init__(self, image, screen_size, camera, use_cache=False):
         self.image = image
         self.part_width, self.part_height = self.image.get_size()
         self.screen_w, self.screen_h = screen_size
         self.camera_offset = camera
 
-        # Define four part of background
-        self.part00_rect = self.image.get_rect()        # upper left part
-        self.part10_rect = self.image.get_rect()        # upper right part
-        self.part01_rect = self.image.get_rect()        # lower left part
-        self.part11_rect = self.image.get_rect()        # lower right part
+        # Screen position of the upper left tile, always in (-tile size, 0]
+        self.origin_x = self.origin_y = 0
+
+        # Attributes for caching composed background
+        self.use_cache = use_cache
+        self.caches = [pygame.Surface(screen_size).convert(self.image) for _ in range(2)] if self.use_cache else None
+        self.cache = self.caches[0] if self.use_cache else None     # Cache of current frame
+        self.cache_valid = False
+        self.cached_camera_pos = (0, 0)             # Integer camera position when the cache was composed
+        self.max_scroll = min(screen_size) // 4     # Recompose entire cache if camera moves more than this
 
     def update(self):
         """
-        Move the background image at opposite direction of camera(player) movement.
-        Using remainder operation, the part of background too far from camera can be moved in front of the direction of camera movement.
+        Move the background tiles at opposite direction of camera(player) movement.
+        Using remainder operation, tiles are always placed to cover the screen.
+        :return: None
+        """
+
+        camera_x, camera_y = round(self.camera_offset[0]), round(self.camera_offset[1])
+        self.origin_x = (self.screen_w // 2 - camera_x) % self.part_width - self.part_width
+        self.origin_y = (self.screen_h // 2 - camera_y) % self.part_height - self.part_height
+
+        if self.use_cache:
+            self.update_cache(camera_x, camera_y)
+
+    def update_cache(self, camera_x, camera_y):
+        """
+        Shift cached background by camera movement into the other cache and redraw only newly exposed strips.
+        :param camera_x: current camera x position rounded to integer
+        :param camera_y: current camera y position rounded to integer
         :return: None
         """
 
-        self.part00_rect.centerx = self.part01_rect.centerx = \
-            self.screen_w // 2 + (1.5 * self.part_width - self.camera_offset[0]) % (2 * self.part_width) - self.part_width
-        self.part10_rect.centerx = self.part11_rect.centerx = \
-            self.screen_w // 2 + (2.5 * self.part_width - self.camera_offset[0]) % (2 * self.part_width) - self.part_width
+        dx = camera_x - self.cached_camera_pos[0]
+        dy = camera_y - self.cached_camera_pos[1]
+        self.cached_camera_pos = (camera_x, camera_y)
+
+        if self.cache_valid and dx == 0 and dy == 0:
+            return
+        previous_cache = self.cache
+        self.cache = self.caches[1] if self.cache is self.caches[0] else self.caches[0]
+
+        # Recompose entire cache if it is not valid or camera moved too far
+        if not self.cache_valid or abs(dx) > self.max_scroll or abs(dy) > self.max_scroll:
+            self.compose(self.cache, self.cache.get_rect())
+            self.cache_valid = True
+            return
+
+        # Shift at opposite direction of camera movement
+        self.cache.blit(previous_cache, (-dx, -dy))
 
-        self.part00_rect.centery = self.part10_rect.centery = \
-            self.screen_h // 2 + (1.5 * self.part_height - self.camera_offset[1]) % (2 * self.part_height) - self.part_height
-        self.part01_rect.centery = self.part11_rect.centery = \
-            self.screen_h // 2 + (2.5 * self.part_height - self.camera_offset[1]) % (2 * self.part_height) - self.part_height
+        # Redraw newly exposed vertical and horizontal strips
+        if dx > 0:
+            self.compose(self.cache, pygame.Rect(self.screen_w - dx, 0, dx, self.screen_h))
+        elif dx < 0:
+            self.compose(self.cache, pygame.Rect(0, 0, -dx, self.screen_h))
+        if dy > 0:
+            self.compose(self.cache, pygame.Rect(0, self.screen_h - dy, self.screen_w, dy))
+        elif dy < 0:
+            self.compose(self.cache, pygame.Rect(0, 0, self.screen_w, -dy))
+
+    def compose(self, surface, clip_rect):
+        """
+        Blit visible parts of tiles within a given rect of surface
+        :param surface: surface to draw tiles on
+        :param clip_rect: area of surface to be covered by tiles
+        :return: None
+        """
+
+        surface.blits(self.get_blit_list(clip_rect), False)
+
+    def get_blit_list(self, clip_rect=None):
+        """
+        Get visible parts of tiles within a given rect of screen
+        :param clip_rect: area of screen to be covered by tiles, entire screen if None
+        :return: list of (image, position, area) tuples to blit
+        """
+
+        if clip_rect is None:
+            clip_rect = pygame.Rect(0, 0, self.screen_w, self.screen_h)
+
+        blit_list = []
+        for tile_y in range(self.origin_y, clip_rect.bottom, self.part_height):
+            if tile_y + self.part_height <= clip_rect.top:
+                continue
+            for tile_x in range(self.origin_x, clip_rect.right, self.part_width):
+                if tile_x + self.part_width <= clip_rect.left:
+                    continue
+
+                # Only the area of tile overlapping with clip rect is blitted
+                visible_rect = clip_rect.clip(tile_x, tile_y, self.part_width, self.part_height)
+                area = visible_rect.move(-tile_x, -tile_y)
+                blit_list.append((self.image, visible_rect.topleft, area))
+
+        return blit_list
 
     def draw(self, surface):
         """
@@ -416,10 +498,18 @@ class Background:
         :return: None
         """
 
-        surface.blit(self.image, self.part00_rect)
-        surface.blit(self.image, self.part10_rect)
-        surface.blit(self.image, self.part01_rect)
-        surface.blit(self.image, self.part11_rect)
+        if self.use_cache:
+            surface.blit(self.cache, (0, 0))
+        else:
+            self.compose(surface, pygame.Rect(0, 0, self.screen_w, self.screen_h))
+
+    def invalidate(self):
+        """
+        Force recomposing cached background at next update (e.g. after camera jumps)
+        :return: None
+        """
+
+        self.cache_valid = False
 
 
 class BoundedBar:
@@ -502,6 +592,102 @@ class PhaseProgressBar(BoundedBar):
         self.target_value = target_value
 
 
+class Minimap:
+    """
+    Radar of the whole field, centered on player, displayed at the corner of the screen.
+
+    Enemy positions are binned into a coarse 2D histogram with NumPy, and density levels are blitted with surfarray
+    into a small 8-bit surface whose palette colors them. It is scaled up to the size of the minimap.
+    No sprite is drawn one by one. Player, visible area of the screen and boss are drawn over the density.
+    The density is refreshed every few frames, so the cost does not depend on the number of enemies on most frames.
+    """
+
+    def __init__(self, rect: pygame.Rect, grid_size=(100, 100), refresh_interval=4):
+        """
+        :param rect: position and size of minimap on the screen
+        :param grid_size: number of histogram cells in (x, y) directions
+        :param refresh_interval: number of frames between refreshing the density
+        """
+
+        self.rect = rect
+        self.grid_size = np.array(grid_size)
+        self.cells_per_pixel = self.grid_size / (field_width, field_height)
+        self.refresh_interval = refresh_interval
+        self.frame_count = 0
+
+        # Color of each density level, from empty (dark blue) to crowded (yellow)
+        levels = np.linspace(0, 1, 16)[:, np.newaxis]
+        palette = np.where(levels < .5, [[10, 14, 40]] + levels * 2 * [[200, 30, -10]],
+                           [[210, 44, 30]] + (levels - .5) * 2 * [[45, 211, 0]])
+        max_level = len(palette) - 1
+
+        # Density level of each enemy count in a cell, on a log scale so that a single enemy is visible
+        self.count_levels = np.round(max_level * np.log1p(np.arange(33)) / np.log1p(32)).astype(np.uint8)
+
+        self.grid_surface = pygame.Surface(grid_size, 0, 8)         # One pixel per histogram cell
+        self.grid_surface.set_palette([tuple(color) for color in np.round(palette).astype(int).tolist()])
+        self.image = None           # Scaled density, converted to display format for fast blitting
+        self.render_image()
+
+        # Screen positions of markers on the minimap
+        self.scale = (self.rect.w / field_width, self.rect.h / field_height)
+        self.view_rect = pygame.Rect(0, 0, round(screen_width * self.scale[0]), round(screen_height * self.scale[1]))
+        self.view_rect.center = self.rect.center
+        self.boss_pos = None
+
+    def update(self, player_pos, boss_pos=None):
+        """
+        Count a frame, and refresh density and markers every refresh interval
+        :param player_pos: field position of player, at the center of minimap
+        :param boss_pos: field position of boss, None if no boss
+        :return: None
+        """
+
+        self.frame_count += 1
+        if self.frame_count % self.refresh_interval:
+            return
+
+        # Histogram of enemy positions relative to player, cells wrapped so that player is at the center
+        corner = np.subtract(player_pos, (field_width / 2, field_height / 2))
+        cells = np.floor((get_enemy_positions() - corner) * self.cells_per_pixel).astype(int) % self.grid_size
+        counts = np.bincount(cells[:, 0] * self.grid_size[1] + cells[:, 1], minlength=self.grid_size.prod())
+
+        # Blit density levels of all cells at once, colored by palette
+        levels = self.count_levels[np.minimum(counts, len(self.count_levels) - 1)].reshape(tuple(self.grid_size))
+        pygame.surfarray.blit_array(self.grid_surface, levels)
+        self.render_image()
+
+        # Boss marker
+        self.boss_pos = None
+        if boss_pos is not None:
+            boss_relative = (np.subtract(boss_pos, player_pos) + (field_width / 2, field_height / 2)) % (field_width, field_height)
+            self.boss_pos = (round(self.rect.x + boss_relative[0] * self.scale[0]),
+                             round(self.rect.y + boss_relative[1] * self.scale[1]))
+
+    def render_image(self):
+        """
+        Scale density surface to the size of minimap
+        :return: None
+        """
+
+        self.image = pygame.transform.scale(self.grid_surface, self.rect.size).convert()
+        self.image.set_alpha(200)
+
+    def draw(self, surface):
+        """
+        Draw density, markers and boundary
+        :param surface: surface to draw on
+        :return: None
+        """
+
+        surface.blit(self.image, self.rect)
+        pygame.draw.rect(surface, (120, 120, 160), self.view_rect, 1)            # Visible area of the screen
+        pygame.draw.circle(surface, (0, 255, 0), self.rect.center, 3)            # Player
+        if self.boss_pos:
+            pygame.draw.circle(surface, (255, 0, 255), self.boss_pos, 6)         # Boss
+        pygame.draw.rect(surface, (255, 255, 255), self.rect, 3)
+
+
 class GameQuitButton(Button):
     """
     A specific type of Button class which quits the game when paused
@@ -547,12 +733,175 @@ class PauseWindow(PopupWindow):
         self.quit_button.draw(surface)
 
 
+def freeze(drawable):
+    """
+    Make a copy of a HUD object (Text, BoundedBar, PauseWindow, etc.) which can be drawn while the original one is updated.
+    Rects are copied, and objects drawn as parts of it (texts and buttons of a window) are frozen too.
+    Other attributes (surfaces, colors) are shared because they are replaced, not modified.
+    :param drawable: object having draw(surface) method
+    :return: frozen copy of the object
+    """
+
+    frozen = copy.copy(drawable)
+    for name, value in vars(frozen).items():
+        if isinstance(value, pygame.Rect):
+            setattr(frozen, name, value.copy())
+        elif hasattr(value, "draw") and not isinstance(value, pygame.sprite.AbstractGroup):
+            setattr(frozen, name, freeze(value))
+    return frozen
+
+
+class RenderSnapshot:
+    """
+    Everything needed to draw a frame of game play screen, taken right after updating the frame.
+
+    Contains layers in drawing order. Each layer is a list of (image, position[, area]) tuples to blit,
+    or a frozen HUD object to draw. Snapshot is never modified after taken,
+    so it can be drawn on another thread while sprites are updated for the next frame.
+    """
+
+    def __init__(self):
+        self.layers = []        # Blit lists or drawable objects in drawing order
+
+    def add_blits(self, blit_list):
+        """
+        Add a layer of images to blit
+        :param blit_list: list of (image, position[, area]) tuples
+        :return: None
+        """
+
+        self.layers.append(blit_list)
+
+    def add_drawable(self, drawable):
+        """
+        Add a layer of object having draw(surface) method
+        :param drawable: object to draw, should not be modified after added
+        :return: None
+        """
+
+        self.layers.append(drawable)
+
+    def draw(self, surface):
+        """
+        Draw all layers on a given surface
+        :param surface: surface to draw on
+        :return: None
+        """
+
+        for layer in self.layers:
+            if isinstance(layer, list):
+                surface.blits(layer, False)
+            else:
+                layer.draw(surface)
+
+
+class RenderPipeline:
+    """
+    Optional pipelined rendering of game play screen.
+
+    A render thread draws the snapshot of frame N-1 on an offscreen surface while the main thread updates frame N.
+    Pygame blits release the GIL, so drawing and updating run on different cores.
+    Snapshots are double buffered: one slot is being drawn while the other one is filled.
+    Latency is bounded to one frame, because a new snapshot is submitted only after the previous one is drawn.
+    Only the main thread touches the display: it copies the drawn frame to the display surface and updates the display
+    between two snapshots.
+    """
+
+    def __init__(self, display_surface):
+        self.display_surface = display_surface                                      # Surface of the display
+        self.surface = pygame.Surface(display_surface.get_size()).convert(display_surface)     # Snapshots are drawn here
+        self.snapshots = [None, None]           # Double buffer of snapshots
+        self.write_index = 0                    # Slot to put next snapshot
+        self.read_index = 0                     # Slot being drawn by render thread
+
+        self.snapshot_submitted = threading.Event()     # Set when a snapshot is ready to draw
+        self.snapshot_drawn = threading.Event()         # Set when render thread is idle
+        self.snapshot_drawn.set()
+
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """
+        Start render thread
+        :return: None
+        """
+
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="render", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop render thread after drawing submitted snapshot
+        :return: None
+        """
+
+        if not self.running:
+            return
+        self.wait()
+        self.running = False
+        self.snapshot_submitted.set()
+        self.thread.join()
+
+    def submit(self, snapshot):
+        """
+        Hand over a snapshot to render thread. Waits until the previous snapshot is drawn.
+        :param snapshot: RenderSnapshot of the frame just updated
+        :return: None
+        """
+
+        self.wait()
+        self.snapshots[self.write_index] = snapshot
+        self.read_index = self.write_index
+        self.write_index = 1 - self.write_index     # Next snapshot goes to the other slot
+
+        self.snapshot_drawn.clear()
+        self.snapshot_submitted.set()
+
+    def wait(self):
+        """
+        Wait until render thread finishes drawing the submitted snapshot
+        :return: None
+        """
+
+        self.snapshot_drawn.wait()
+
+    def present(self):
+        """
+        Copy the drawn frame to the display surface, on the main thread. Call after wait() and before submit().
+        :return: None
+        """
+
+        self.display_surface.blit(self.surface, (0, 0))
+
+    def run(self):
+        """
+        Main function of render thread
+        :return: None
+        """
+
+        while True:
+            self.snapshot_submitted.wait()
+            self.snapshot_submitted.clear()
+            if not self.running:
+                break
+
+            self.snapshots[self.read_index].draw(self.surface)
+            self.snapshots[self.read_index] = None      # Release sprite images of drawn frame
+            self.snapshot_drawn.set()
+
+
 class GamePlayScreen:
     """
     A screen class to display game play screen
 
     This displays main game progress. It updates and draws all sprites and background.
     """
+    snapshot_fields = (("level", "i4"), ("field_offset", "f8"))
+    snapshot_refs = ("current_level", "player", "target_pointer", "boss_pointer")
 
     def __init__(self):
         # All levels list
@@ -563,7 +912,8 @@ class GamePlayScreen:
         self.current_level.initialize_level()
 
         # Background instance
-        self.background = Background(background_grid_img, [screen_width, screen_height], camera_offset)
+        self.background = Background(images.background_grid_img, [screen_width, screen_height], camera_offset,
+                                     use_cache=background_cache[0])
 
         # Field offset attribute, used for vibrating entire field
         self.field_offset = 0
@@ -594,9 +944,23 @@ class GamePlayScreen:
         self.level_playtime_text = Text("PLAYTIME: {0:0.4f} sec".format(self.current_level.time_to_clear), "verdana", 20, (screen_width - 30, 60), "topright")
         self.level_time_avg_score_text = Text("TIME-AVG SCORE: {0:0.4f} pts/sec".format(self.current_level.time_average_score), "verdana", 20, (screen_width - 30, 90), "topright")
 
+        # Minimap of the whole field at bottom right corner, density refreshed every 4 frames
+        self.minimap = Minimap(pygame.Rect([screen_width - 280, screen_height - 280, 250, 250]), refresh_interval=4)
+
+        # HUD objects drawn over sprites, in drawing order
+        self.hud_items = [self.player_hp_bar, self.player_mp_bar, self.player_manual_weapon_cooltime_bar,
+                          self.phase_progress_bar,
+                          self.player_hp_text, self.player_mp_text, self.level_phase_text, self.phase_score_text,
+                          self.total_score_text, self.level_score_text, self.level_playtime_text,
+                          self.level_time_avg_score_text, self.minimap]
+
         # Boolean attribute whether display game play screen or not
         self.now_display = False
 
+        # Attributes for frame counting and visible area
+        self.frame_count = 0
+        self.screen_rect = pygame.Rect(0, 0, screen_width, screen_height)
+
         # Attributes for pause control
         self.p_pressed = False
         self.p_released = False
@@ -628,6 +992,20 @@ class GamePlayScreen:
             self.pause_window.update(curspos, mouse_button_down)
             return
 
+        # Rewind game play while R key is held, going back by a snapshot interval per interval of frames
+        if keys[pygame.K_r] and rewind_buffer.step_back():
+            self.background.invalidate()        # Camera jumps back to the snapshot
+            self.background.update()
+            self.update_bars()
+            self.update_texts()
+            self.update_minimap()
+            return
+
+        # Adjust visual quality using time spent for previous frame
+        quality_governor.update(fps_clock.get_rawtime() / 1000)
+        spawn_admission.update()
+        self.frame_count += 1
+
         # Generate boss pointer when during boss phase
         if isinstance(self.current_level.current_phase, BossPhase) and not self.boss_pointer:
             self.boss_pointer = BossPointer(self.player, self.current_level.current_phase.boss)
@@ -652,10 +1030,25 @@ class GamePlayScreen:
         # Update background position with respect to screen
         self.background.update()
 
+        # Get enemy positions simulated by worker process, waiting for the step sent in previous frame
+        swarm_simulation.sync()
+
         # Update all sprites
-        all_sprites.update(curspos, mouse_button_down)
+        effect_manager.update()             # Start new frame of effect budget
+        move_entities(entity_registry, 1 / FPS)     # Move all entities in archetype storage at once
+        place_enemy_entities()              # Place all enemies in archetype storage at once
+        flock_simulation.update(self.player.get_pos())      # Steer all flockers at once
+        pursuit_simulation.update(self.player.get_pos())    # Steer all chasers at once
+        update_enemy_entities()             # Spawning and blinking enemies in archetype storage
+        sprite_updater.update(all_sprites, curspos, mouse_button_down)     # Sharded on free-threaded builds
+        check_projectile_collisions()       # Collision check of all projectiles at once
+        check_beam_collisions()             # Collision check of player's beam, through cells it passes
+        damage_buffer.resolve()             # Apply all damage dealt in this frame at once
+        swarm_simulation.step()             # Worker process moves enemies for next frame while this frame is drawn
+        enemy_bullets.update(self.player)   # Move, expire and collide all enemy bullets at once
         self.player.aim(curspos)
         self.target_pointer.update(curspos)
+        threat_indicators.update(self.player.get_pos())     # Arrows to nearest threats out of screen
 
         # Update field vibrating effect
         self.field_offset = field_vibrator.update()
@@ -665,7 +1058,44 @@ class GamePlayScreen:
         camera_offset[0] = player_x_pos - screen_width // 2
         camera_offset[1] = player_y_pos - screen_height // 2 + self.field_offset    # Vibrate camera vertically
 
-        # Update player HP, MP & manual weapon cooltime bars
+        # Update player HP, MP & manual weapon cooltime bars, and phase progress bar
+        self.update_bars()
+        self.update_minimap()
+
+        # Update texts containing numerical value, less frequently at low quality
+        if self.frame_count % quality_governor.settings["hud_refresh_interval"] == 0:
+            self.update_texts()
+
+        # Save current state for rewinding
+        rewind_buffer.record([self])
+
+        # Show game over screen if player dies
+        if self.player.dead:
+            self.hide()
+            game_over_screen.show()
+            pygame.mouse.set_visible(True)      # Show mouse cursor
+            self.initialize()
+
+    def late_latch(self):
+        """
+        Sample cursor position again just before drawing, so that target pointer and aim of next shots
+        follow the latest mouse movement instead of the one read before updating
+        :return: None
+        """
+
+        if self.paused:
+            return
+        pygame.event.pump()                 # Get mouse movement occurred during the update
+        curspos = pygame.mouse.get_pos()
+        self.player.aim(curspos)
+        self.target_pointer.update(curspos)
+
+    def update_bars(self):
+        """
+        Update player HP, MP & manual weapon cooltime bars, and phase progress bar
+        :return: None
+        """
+
         self.player_hp_bar.update(self.player.hp)
         self.player_mp_bar.update(self.player.mp)
         self.player_manual_weapon_cooltime_bar.update(self.player.manual_weapon.remaining_cooltime_frames)
@@ -676,7 +1106,21 @@ class GamePlayScreen:
         # Update phase progress bar
         self.phase_progress_bar.update(self.current_level.current_phase_score)
 
-        # Update texts containing numerical value
+    def update_minimap(self):
+        """
+        Update minimap with positions of player and boss
+        :return: None
+        """
+
+        boss = getattr(self.current_level.current_phase, "boss", None)
+        self.minimap.update(self.player.get_pos(), (boss.x_pos, boss.y_pos) if boss and boss.alive() else None)
+
+    def update_texts(self):
+        """
+        Rerender all texts containing numerical value
+        :return: None
+        """
+
         self.player_hp_text.update_text("{}/{} HP".format(round(self.player.hp), self.player.full_hp))
         self.player_mp_text.update_text("{}/{} MP".format(round(self.player.mp), self.player.full_mp))
 
@@ -693,13 +1137,6 @@ class GamePlayScreen:
         self.level_playtime_text.update_text("PLAYTIME: {0:0.4f} sec".format(self.current_level.time_to_clear))
         self.level_time_avg_score_text.update_text("TIME-AVG SCORE: {0:0.4f} pts/sec".format(self.current_level.time_average_score))
 
-        # Show game over screen if player dies
-        if self.player.dead:
-            self.hide()
-            game_over_screen.show()
-            pygame.mouse.set_visible(True)      # Show mouse cursor
-            self.initialize()
-
     def draw(self, surface):
         """
         Draw background and all sprites on the screen during gameplay
@@ -709,39 +1146,82 @@ class GamePlayScreen:
         # Draw background gridlines
         self.background.draw(surface)
 
-        # Draw all sprites
-        coin_group.draw(surface)            # Draw all coins
-        spawneffect_group.draw(surface)     # Draw all spawneffects
-        player_group.draw(surface)          # Draw player
-        all_enemies.draw(surface)           # Draw all enemies
-        player_projectiles.draw(surface)    # Draw all projectiles shot from player
-        hiteffect_group.draw(surface)       # Draw all hiteffects
-        explosion_group.draw(surface)       # Draw all explosions
-        hp_bar_group.draw(surface)          # Draw all HP bar of enemy sprites
-        target_pointer_group.draw(surface)  # Draw target pointer
-
-        # Draw player HP, MP & manual weapon cooltime bars
-        self.player_hp_bar.draw(surface)
-        self.player_mp_bar.draw(surface)
-        self.player_manual_weapon_cooltime_bar.draw(surface)
-
-        # Draw phase progress bar
-        self.phase_progress_bar.draw(surface)
-
-        # Draw all texts
-        self.player_hp_text.draw(surface)
-        self.player_mp_text.draw(surface)
-        self.level_phase_text.draw(surface)
-        self.phase_score_text.draw(surface)
-        self.total_score_text.draw(surface)
-        self.level_score_text.draw(surface)
-        self.level_playtime_text.draw(surface)
-        self.level_time_avg_score_text.draw(surface)
+        # Draw all sprites, in the same order as make_snapshot()
+        surface.blits(self.get_coin_blit_list(), False)                 # Draw all coins
+        spawneffect_group.draw(surface)                                 # Draw all spawneffects
+        player_group.draw(surface)                                      # Draw player
+        surface.blits(get_enemy_blit_list(), False)                     # Draw all enemies
+        player_projectiles.draw(surface)                                # Draw all projectiles shot from player
+        if self.player.beam_weapon.firing:
+            self.player.beam_weapon.draw(surface)                       # Draw player's beam
+        surface.blits(enemy_bullets.get_blit_list(self.screen_rect), False)     # Draw all enemy bullets at once
+        hiteffect_group.draw(surface)                                   # Draw all hiteffects
+        explosion_group.draw(surface)                                   # Draw all explosions
+        hp_bar_group.draw(surface)                                      # Draw all HP bar of enemy sprites
+        target_pointer_group.draw(surface)                              # Draw target pointer
+        surface.blits(threat_indicators.get_blit_list(), False)         # Draw arrows to threats out of screen
+
+        # Draw player HP, MP & manual weapon cooltime bars, phase progress bar, and all texts
+        for hud_item in self.hud_items:
+            hud_item.draw(surface)
 
         # Draw pause window if game is paused
         if self.paused:
             self.pause_window.draw(surface)
 
+    def get_coin_blit_list(self):
+        """
+        Get coins to draw. At low quality, only coins on the screen are drawn.
+        :return: list of (image, position) tuples to blit
+        """
+
+        coins = coin_group.sprites()
+        if quality_governor.settings["cull_coins"]:
+            visible_indices = self.screen_rect.collidelistall([coin.rect for coin in coins])
+            return [(coins[i].image, coins[i].rect.topleft) for i in visible_indices]
+        return [(coin.image, coin.rect.topleft) for coin in coins]
+
+    def make_snapshot(self):
+        """
+        Take a snapshot of everything to draw in current frame, to be drawn on render thread
+        :return: RenderSnapshot instance
+        """
+
+        snapshot = RenderSnapshot()
+
+        # Background gridlines
+        if self.background.use_cache:
+            snapshot.add_blits([(self.background.cache, (0, 0))])      # Not modified until the frame after next
+        else:
+            snapshot.add_blits(self.background.get_blit_list())
+
+        # All sprites, in drawing order
+        snapshot.add_blits(self.get_coin_blit_list())                                   # All coins
+        for group in [spawneffect_group,            # All spawneffects
+                      player_group]:                # Player
+            snapshot.add_blits([(sprite.image, sprite.rect.topleft) for sprite in group])
+        snapshot.add_blits(get_enemy_blit_list())                               # All enemies
+        snapshot.add_blits([(sprite.image, sprite.rect.topleft) for sprite in player_projectiles])   # All projectiles shot from player
+        if self.player.beam_weapon.firing:
+            snapshot.add_drawable(freeze(self.player.beam_weapon))             # Player's beam
+        snapshot.add_blits(enemy_bullets.get_blit_list(self.screen_rect))     # All enemy bullets at once
+        for group in [hiteffect_group,              # All hiteffects
+                      explosion_group,              # All explosions
+                      hp_bar_group,                 # All HP bar of enemy sprites
+                      target_pointer_group]:        # Target pointer
+            snapshot.add_blits([(sprite.image, sprite.rect.topleft) for sprite in group])
+        snapshot.add_blits(threat_indicators.get_blit_list())                  # Arrows to threats out of screen
+
+        # Player HP, MP & manual weapon cooltime bars, phase progress bar, and all texts
+        for hud_item in self.hud_items:
+            snapshot.add_drawable(freeze(hud_item))
+
+        # Pause window if game is paused
+        if self.paused:
+            snapshot.add_drawable(freeze(self.pause_window))
+
+        return snapshot
+
     def show(self):
         """
         Show this screen
@@ -767,10 +1247,24 @@ class GamePlayScreen:
         # Reser field offset
         field_vibrator.__init__()
         self.field_offset = 0
+        self.background.invalidate()        # Camera goes back to the start
+
+        # Discard damage events not resolved yet
+        damage_buffer.clear()
+        effect_manager.clear()
+        enemy_bullets.clear()
+        threat_indicators.clear()
+        rewind_buffer.clear()
+        spawn_admission.clear()
 
-        # Kill all sprites including player
-        for sprite in all_sprites:
-            sprite.kill()
+        # Remove all sprites including player at once
+        swarm_simulation.clear()
+        entity_registry.clear()
+        for group in all_groups:
+            group.empty()
+
+        # Restart random streams, so a seeded game plays the same again
+        random_streams.reset()
 
         # Go back to level 1
         self.current_level = all_levels[0]
@@ -804,7 +1298,7 @@ class GameOverScreen:
         self.gameover_text = Text("GAME OVER", "verdana", 80, (960, 100), "center")
 
         # Main image
-        self.main_image = pygame.image.load("img/icon/gameover_icon.png")
+        self.main_image = load_image("img/icon/gameover_icon.png", alpha=True)
         self.main_image_rect = self.main_image.get_rect(center=(960, 540))
 
         # Restart button
@@ -852,6 +1346,63 @@ class GameOverScreen:
         self.now_display = False
 
 
-main_menu = MainMenuScreen()            # Main menu instance
-play_screen = GamePlayScreen()          # Game play screen instance
-game_over_screen = GameOverScreen()     # Game over screen instance
+def bootstrap():
+    """
+    Start the application with main menu only. Game play images, levels and screens are not loaded here,
+    they are loaded by load_game_play() while main menu is shown or when the game starts.
+    :return: main menu instance
+    """
+
+    global main_menu
+
+    if main_menu is None:
+        fonts.preload(font_manifest, background=True)       # Font files are read while main menu is created
+        main_menu = MainMenuScreen()
+    main_menu.show()
+    return main_menu
+
+
+def preload_game_play():
+    """
+    Load a part of game play images. Called once per frame while main menu is shown,
+    so that starting the game does not wait for all images.
+    :return: None
+    """
+
+    images.load_next()
+
+
+def load_game_play():
+    """
+    Load all game play images and levels, and create game play and game over screens, once
+    :return: game play screen instance
+    """
+
+    global play_screen, game_over_screen
+
+    if play_screen is None:
+        images.load_all()
+        build_levels()
+        play_screen = GamePlayScreen()
+        game_over_screen = GameOverScreen()
+    return play_screen
+
+
+def get_screens():
+    """
+    Get all screens created so far, in updating order
+    :return: list of screen instances
+    """
+
+    return [current_screen for current_screen in [main_menu, play_screen, game_over_screen] if current_screen]
+
+
+render_pipeline = RenderPipeline(screen)    # Render thread for pipelined mode
+
+# Global variable for caching composed background and scrolling it, instead of blitting tiles every frame
+background_cache = [False]
+
+# Screens, created by bootstrap() and load_game_play() instead of at import
+main_menu = None            # Main menu instance
+play_screen = None          # Game play screen instance
+game_over_screen = None     # Game over screen instance
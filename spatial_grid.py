@@ -0,0 +1,139 @@
+"""
+Python file for uniform grid over a wrapping field, and ray casting through it with DDA traversal
+
+Rects are binned into every grid cell they overlap, all at once with NumPy. A ray (line segment) visits only
+the cells it passes through, found by a digital differential analyzer (Amanatides & Woo), so only rects
+in those cells need to be tested against it, however many rects are on the field.
+"""
+
+import math
+
+import numpy as np
+
+
+def traverse_cells(start, end, cell_size, origin=(0, 0)):
+    """
+    Find all grid cells a line segment passes through, in order from start to end.
+    Cell indices are not wrapped, so a segment crossing the field boundary continues into the next copy of the field.
+    :param start: (x, y) start point of segment
+    :param end: (x, y) end point of segment
+    :param cell_size: (width, height) of a cell
+    :param origin: (x, y) position of the corner of cell (0, 0)
+    :return: list of (x index, y index) of cells
+    """
+
+    x, y = (start[0] - origin[0]) / cell_size[0], (start[1] - origin[1]) / cell_size[1]       # In units of cells
+    dx, dy = (end[0] - start[0]) / cell_size[0], (end[1] - start[1]) / cell_size[1]
+    cell_x, cell_y = math.floor(x), math.floor(y)
+    end_cell_x, end_cell_y = math.floor(x + dx), math.floor(y + dy)
+
+    # Step direction, parameter t (0~1 along the segment) of crossing the next cell border, and t between borders
+    step_x = 1 if dx > 0 else -1
+    step_y = 1 if dy > 0 else -1
+    t_delta_x = abs(1 / dx) if dx else math.inf
+    t_delta_y = abs(1 / dy) if dy else math.inf
+    t_max_x = ((cell_x + 1 - x) if dx > 0 else (x - cell_x)) * t_delta_x if dx else math.inf
+    t_max_y = ((cell_y + 1 - y) if dy > 0 else (y - cell_y)) * t_delta_y if dy else math.inf
+
+    cells = [(cell_x, cell_y)]
+    for _ in range(abs(end_cell_x - cell_x) + abs(end_cell_y - cell_y)):
+        if t_max_x < t_max_y:
+            cell_x += step_x
+            t_max_x += t_delta_x
+        else:
+            cell_y += step_y
+            t_max_y += t_delta_y
+        cells.append((cell_x, cell_y))
+    return cells
+
+
+class UniformGrid:
+    """
+    Grid of equal cells covering a wrapping field, holding indices of rects overlapping each cell.
+
+    Entries are sorted by cell, so rects of a cell are a contiguous slice (like a CSR matrix).
+    A rect crossing the field boundary is also put in cells on the other side, with the shift of a field size,
+    so it is found from both sides at its right position.
+    """
+
+    def __init__(self, field_size, cell_size=128, origin=(0, 0)):
+        """
+        :param field_size: (width, height) of wrapping field
+        :param cell_size: approximate size of grid cell
+        :param origin: (x, y) position of the corner of the field
+        """
+
+        self.field_size = np.asarray(field_size, np.float64)
+        self.n_cells = np.maximum(1, (self.field_size // cell_size).astype(int))
+        self.cell_size = self.field_size / self.n_cells
+        self.origin = np.asarray(origin, np.float64)
+
+        self.rects = np.zeros((0, 4))                           # All rects binned
+        self.cell_starts = np.zeros(self.n_cells.prod() + 1, int)     # Entries of cell i from cell_starts[i]
+        self.entry_rects = np.zeros(0, int)                     # Index of rect of each entry
+        self.entry_shifts = np.zeros((0, 2))                    # Shift of rect to the copy of field of the cell
+
+    def build(self, rects, margin=0):
+        """
+        Bin rects into cells they overlap, replacing previous ones
+        :param rects: (n, 4) array of rects (x, y, w, h) in field position
+        :param margin: distance to expand rects on every side, e.g. half width of rays to cast
+        :return: None
+        """
+
+        self.rects = rects = np.asarray(rects, np.float64).reshape(-1, 4)
+
+        # Range of cells overlapped by each rect, not wrapped yet
+        lower = np.floor((rects[:, :2] - margin - self.origin) / self.cell_size).astype(int)
+        upper = np.floor((rects[:, :2] + rects[:, 2:] + margin - self.origin) / self.cell_size).astype(int)
+        upper = np.minimum(upper, lower + self.n_cells - 1)         # A rect wider than the field covers each cell once
+        spans = upper - lower + 1
+        counts = spans[:, 0] * spans[:, 1]
+
+        # Expand into (rect, cell) entries
+        entry_rects = np.repeat(np.arange(len(rects)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells_x = lower[entry_rects, 0] + offsets // spans[entry_rects, 1]
+        cells_y = lower[entry_rects, 1] + offsets % spans[entry_rects, 1]
+
+        # Wrap cells into the field, remembering how far the rect is from the copy of field holding the cell
+        tiles = np.stack([cells_x // self.n_cells[0], cells_y // self.n_cells[1]], axis=1)
+        cell_ids = (cells_x % self.n_cells[0]) * self.n_cells[1] + cells_y % self.n_cells[1]
+
+        order = np.argsort(cell_ids, kind="stable")
+        self.entry_rects = entry_rects[order]
+        self.entry_shifts = -tiles[order] * self.field_size
+        self.cell_starts = np.concatenate([[0], np.cumsum(np.bincount(cell_ids, minlength=self.n_cells.prod()))])
+
+    def query_cells(self, cells):
+        """
+        Get rects binned in given cells
+        :param cells: list of (x index, y index) of cells, may be outside the field (next copies of the field)
+        :return: (indices of rects, rects shifted to the copy of field of each cell), a rect may appear more than once
+        """
+
+        cells = np.asarray(cells, int).reshape(-1, 2)
+        tiles = cells // self.n_cells
+        cell_ids = (cells[:, 0] % self.n_cells[0]) * self.n_cells[1] + cells[:, 1] % self.n_cells[1]
+
+        # Expand slices of entries of cells
+        firsts = self.cell_starts[cell_ids]
+        counts = self.cell_starts[cell_ids + 1] - firsts
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        entries = np.repeat(firsts, counts) + offsets
+        entry_tiles = np.repeat(tiles, counts, axis=0)
+
+        indices = self.entry_rects[entries]
+        rects = self.rects[indices].copy()
+        rects[:, :2] += self.entry_shifts[entries] + entry_tiles * self.field_size
+        return indices, rects
+
+    def query_segment(self, start, end):
+        """
+        Get rects in cells a line segment passes through, candidates to test against the segment
+        :param start: (x, y) start point of segment
+        :param end: (x, y) end point of segment, may be outside the field
+        :return: (indices of rects, rects shifted to the copy of field of each cell), a rect may appear more than once
+        """
+
+        return self.query_cells(traverse_cells(start, end, self.cell_size, self.origin))
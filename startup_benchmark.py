@@ -0,0 +1,106 @@
+"""
+Startup time benchmark with a budget.
+
+Runs a fresh interpreter with "-X importtime" which imports the game modules and shows the first frame of main menu,
+like main.py does before its game loop. Prints the slowest imports and the time to the first menu frame,
+and exits with status 1 if any of them is over the budget below, so the result can be tracked on every change.
+Run this file directly on the target machine: python startup_benchmark.py [number of runs]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+
+# Budget in milliseconds. Imports are cumulative times reported by "-X importtime" (median of runs).
+startup_budget = {"import numpy": 250,
+                  "import pygame": 300,
+                  "import screens": 1200,           # All game modules, including numpy and pygame
+                  "first menu frame": 1500}         # From interpreter start to the first main menu frame shown
+
+# Code run in the measured interpreter, prints wall clock time (seconds since epoch) of the first main menu frame.
+# Launch time is taken by the benchmark before starting the interpreter, so interpreter startup is measured too.
+startup_code = """
+from screens import *
+main_menu = bootstrap()
+main_menu.draw(screen)
+pygame.display.update()
+import time
+print(repr(time.time()))
+pygame.quit()
+"""
+
+
+def parse_importtime(text):
+    """
+    Parse output of "-X importtime"
+    :param text: standard error of the interpreter
+    :return: dict of module name and (self time, cumulative time) in milliseconds
+    """
+
+    import_times = {}
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, cumulative_time, module = line[len("import time:"):].split("|")
+        import_times[module.strip()] = (int(self_time) / 1000, int(cumulative_time) / 1000)
+    return import_times
+
+
+def measure_startup():
+    """
+    Start a new interpreter importing the game and showing main menu
+    :return: (dict of module name and (self time, cumulative time), time to first menu frame) in milliseconds
+    """
+
+    launch_time = time.time()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", startup_code],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return parse_importtime(result.stderr), (float(result.stdout.split()[-1]) - launch_time) * 1000
+
+
+def median(values):
+    """
+    Get median of values
+    :param values: list of numbers
+    :return: median, None if there is no value
+    """
+
+    if not values:
+        return None
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+if __name__ == "__main__":
+    n_runs = max(1, int(sys.argv[1])) if len(sys.argv) > 1 else 5
+    runs = [measure_startup() for _ in range(n_runs)]
+
+    # Slowest modules by self time in the last run
+    import_times = runs[-1][0]
+    print("{:<40}{:>12}{:>16}".format("module", "self (ms)", "cumulative (ms)"))
+    for module, (self_time, cumulative_time) in sorted(import_times.items(), key=lambda item: -item[1][0])[:15]:
+        print("{:<40}{:>12.1f}{:>16.1f}".format(module, self_time, cumulative_time))
+
+    # Median of all runs against budget
+    results = {"first menu frame": median([first_frame_time for _, first_frame_time in runs])}
+    for name in startup_budget:
+        if name.startswith("import "):
+            module = name[len("import "):]
+            results[name] = median([import_times[module][1] for import_times, _ in runs if module in import_times])
+
+    print()
+    print("{:<24}{:>12}{:>14}".format("stage", "time (ms)", "budget (ms)"))
+    over_budget = False
+    for name, budget in startup_budget.items():
+        if results[name] is None:
+            print("{:<24}{:>12}{:>14}".format(name, "not imported", budget))    # Module is not imported by the game
+            continue
+        status = "" if results[name] <= budget else "  OVER BUDGET"
+        over_budget = over_budget or bool(status)
+        print("{:<24}{:>12.1f}{:>14}{}".format(name, results[name], budget, status))
+
+    sys.exit(1 if over_budget else 0)
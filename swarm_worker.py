@@ -0,0 +1,466 @@
+"""
+Python file for simulating enemy swarm in a separate process
+
+The worker process moves enemy sprites, writing their positions into a shared memory block.
+The game process reads the state zero-copy through NumPy views, and sends commands (spawn, kill, step)
+over a lock-free ring buffer in another shared memory block.
+The worker moves sprites only when the game process sends a step command for a game frame, so the swarm stays
+in game time: it stops while the game is paused or rewound, and slows down with the game.
+A step is sent at the end of a frame and waited for at the start of the next one, so the worker moves the swarm
+while the game process draws, and positions read by the game are never a frame behind.
+Damage, death and player projectiles stay in the game process, where collisions are checked.
+This file imports only NumPy, so the worker process never initializes pygame or the screen.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# Columns of swarm state
+X, Y, X_SPEED, Y_SPEED, TAG = range(5)
+N_COLUMNS = 5
+
+# Flags of swarm state
+ALIVE = 1           # Slot is occupied by a moving sprite
+
+# Header of swarm state block
+PUBLISHED, READING, FRAME, STEPS = range(4)     # STEPS + i: number of steps simulated in buffer i
+N_HEADER = 8
+N_BUFFERS = 3       # Triple buffer: one published, one being read, one being written
+
+# Commands sent from game process to worker process
+SPAWN, KILL, CLEAR, STOP, STEP = range(1, 6)
+COMMAND_SIZE = 8    # (sequence number, command, slot, argument 1~5)
+
+
+def attach_shared_memory(name):
+    """
+    Attach a shared memory block created by another process, without letting this process unlink it on exit
+    :param name: name of shared memory block
+    :return: SharedMemory instance
+    """
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13, attached blocks are registered to resource tracker, which unlinks them on exit
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(block._name, "shared_memory")
+        except Exception:
+            pass
+        return block
+
+
+class SwarmState:
+    """
+    Positions, speeds and flags of all swarm slots in a shared memory block.
+
+    The state is triple buffered. The worker writes a whole frame into a buffer which is neither published nor
+    being read, then publishes it. The reader marks the published buffer as being read before using it,
+    so a buffer is never overwritten while it is read and no lock is needed.
+    """
+
+    def __init__(self, capacity, name=None):
+        """
+        Create a new shared memory block, or attach an existing one
+        :param capacity: maximum number of sprites in the swarm
+        :param name: name of existing block to attach, None to create a new one
+        """
+
+        self.capacity = capacity
+        values_size = capacity * N_COLUMNS * 8
+        buffer_size = values_size + capacity
+        size = N_HEADER * 8 + N_BUFFERS * buffer_size
+
+        if name is None:
+            self.block = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.block = attach_shared_memory(name)
+            self.owner = False
+        self.name = self.block.name
+
+        # Views of shared memory (no copy)
+        self.header = np.ndarray((N_HEADER,), np.float64, self.block.buf)
+        self.values = []        # Float columns of each buffer
+        self.flags = []         # Flags of each buffer
+        for i in range(N_BUFFERS):
+            offset = N_HEADER * 8 + i * buffer_size
+            self.values.append(np.ndarray((capacity, N_COLUMNS), np.float64, self.block.buf, offset))
+            self.flags.append(np.ndarray((capacity,), np.uint8, self.block.buf, offset + values_size))
+
+        if self.owner:
+            self.header[:] = 0
+            self.header[READING] = -1
+            for i in range(N_BUFFERS):
+                self.values[i][:] = 0
+                self.flags[i][:] = 0
+
+    def acquire(self):
+        """
+        Get the latest published frame for reading. Views stay unchanged until next acquire().
+        :return: (values, flags) views of the frame, and number of steps simulated in it
+        """
+
+        while True:
+            index = int(self.header[PUBLISHED])
+            self.header[READING] = index
+            if int(self.header[PUBLISHED]) == index:        # Not republished while marking
+                return self.values[index], self.flags[index], int(self.header[STEPS + index])
+
+    def publish(self, values, flags, steps):
+        """
+        Write a frame into a free buffer and publish it (worker side)
+        :param values: float columns of all slots
+        :param flags: flags of all slots
+        :param steps: number of steps simulated so far
+        :return: None
+        """
+
+        published = int(self.header[PUBLISHED])
+        reading = int(self.header[READING])
+        index = next(i for i in range(N_BUFFERS) if i != published and i != reading)
+        self.values[index][:] = values
+        self.flags[index][:] = flags
+        self.header[STEPS + index] = steps
+        self.header[FRAME] += 1
+        self.header[PUBLISHED] = index          # Publish the buffer after it is written
+
+    def close(self):
+        """
+        Release views and close the block. The creator also unlinks it.
+        :return: None
+        """
+
+        del self.header, self.values, self.flags
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+
+
+class CommandRing:
+    """
+    Lock-free ring buffer of fixed size commands in a shared memory block.
+
+    Only one process writes (game process) and only one process reads (worker process).
+    The writer advances head only after the command is written, and the reader advances tail only after
+    the command is read, so each index is written by a single process and no lock is needed.
+    Each command also carries a sequence number (its index + 1) written after the rest of the command,
+    and the reader takes a command only when its sequence number is there, so a command is never read
+    half written even if the head index becomes visible before it.
+    """
+
+    def __init__(self, capacity, name=None):
+        """
+        Create a new shared memory block, or attach an existing one
+        :param capacity: maximum number of commands waiting in the ring
+        :param name: name of existing block to attach, None to create a new one
+        """
+
+        self.capacity = capacity
+        size = 2 * 8 + capacity * COMMAND_SIZE * 8
+
+        if name is None:
+            self.block = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.block = attach_shared_memory(name)
+            self.owner = False
+        self.name = self.block.name
+
+        self.indices = np.ndarray((2,), np.int64, self.block.buf)                                   # Head, tail
+        self.commands = np.ndarray((capacity, COMMAND_SIZE), np.float64, self.block.buf, 2 * 8)
+        if self.owner:
+            self.indices[:] = 0
+
+    def push(self, command, slot=0, *args):
+        """
+        Write a command (writer side)
+        :param command: command number
+        :param slot: swarm slot the command is applied to
+        :param args: up to 5 numerical arguments
+        :return: False if the ring is full, True otherwise
+        """
+
+        head, tail = int(self.indices[0]), int(self.indices[1])
+        if head - tail >= self.capacity:
+            return False
+        record = self.commands[head % self.capacity]
+        record[1] = command
+        record[2] = slot
+        record[3:3 + len(args)] = args
+        record[0] = head + 1                # Sequence number marks the command as written
+        self.indices[0] = head + 1          # Publish the command after it is written
+        return True
+
+    def pop_all(self):
+        """
+        Read all waiting commands (reader side)
+        :return: (N, COMMAND_SIZE) array of commands in order
+        """
+
+        head, tail = int(self.indices[0]), int(self.indices[1])
+        if head == tail:
+            return self.commands[:0]
+        sequence = np.arange(tail, head)
+        commands = self.commands[sequence % self.capacity]     # Fancy indexing copies, so the slots can be reused right after
+        written = commands[:, 0] == sequence + 1
+        if not written.all():
+            commands = commands[:np.argmin(written)]            # Stop at the first command not fully written yet
+        self.indices[1] = tail + len(commands)
+        return commands
+
+    def close(self):
+        """
+        Release views and close the block. The creator also unlinks it.
+        :return: None
+        """
+
+        del self.indices, self.commands
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+
+
+def run_worker(state_name, ring_name, capacity, ring_capacity):
+    """
+    Main function of worker process. Applies commands in order and moves all sprites by a frame at each step command.
+    Movement is the same as StraightLineMover, WallUnit and BossLV1 (constant speed in pixel/sec).
+    :param state_name: name of swarm state block
+    :param ring_name: name of command ring block
+    :param capacity: maximum number of sprites in the swarm
+    :param ring_capacity: maximum number of commands waiting in the ring
+    :return: None
+    """
+
+    state = SwarmState(capacity, state_name)
+    ring = CommandRing(ring_capacity, ring_name)
+    parent_pid = os.getppid()
+
+    values = np.zeros((capacity, N_COLUMNS))
+    flags = np.zeros(capacity, np.uint8)
+    steps = 0           # Number of step commands applied
+
+    running = True
+    while running and os.getppid() == parent_pid:      # Quit if game process is gone
+        commands = ring.pop_all()
+        if not len(commands):
+            time.sleep(.0005)           # Wait for next game frame
+            continue
+
+        # Apply commands in order
+        for command in commands:
+            kind, slot = int(command[1]), int(command[2])
+            if kind == SPAWN:
+                values[slot, :N_COLUMNS] = command[3:3 + N_COLUMNS]
+                flags[slot] = ALIVE
+            elif kind == KILL:
+                flags[slot] = 0
+            elif kind == CLEAR:
+                flags[:] = 0
+            elif kind == STOP:
+                running = False
+            elif kind == STEP:
+                # Move all sprites by a game frame
+                moving = flags == ALIVE
+                values[moving, X] += values[moving, X_SPEED] * command[3]
+                values[moving, Y] += values[moving, Y_SPEED] * command[3]
+                steps += 1
+
+        state.publish(values, flags, steps)
+
+    ring.close()
+    state.close()
+
+
+class SwarmSimulation:
+    """
+    Game process side of the swarm simulation.
+
+    Starts the worker process, allocates swarm slots for sprites, sends commands, and gives positions of sprites
+    from the latest published frame. Until start() is called, nothing is simulated and sprites move by themselves.
+    """
+
+    def __init__(self, capacity=4096, ring_capacity=8192, fps=60):
+        """
+        :param capacity: maximum number of sprites in the swarm
+        :param ring_capacity: maximum number of commands waiting in the ring
+        :param fps: game frames per second, each step moves sprites by 1/fps seconds
+        """
+
+        self.capacity = capacity
+        self.ring_capacity = ring_capacity
+        self.fps = fps
+
+        self.state = None
+        self.ring = None
+        self.process = None
+        self.running = False
+
+        self.free_slots = []            # Slots not used by any sprite
+        self.tags = np.zeros(capacity)  # Tag of the sprite spawned at each slot
+        self.next_tag = 1
+        self.steps = 0                  # Number of step commands sent
+        self.values = self.flags = None     # Views of the frame acquired at sync()
+
+    def start(self):
+        """
+        Create shared memory blocks and start worker process
+        :return: None
+        """
+
+        if self.running:
+            return
+        self.state = SwarmState(self.capacity)
+        self.ring = CommandRing(self.ring_capacity)
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__), self.state.name, self.ring.name,
+                                         str(self.capacity), str(self.ring_capacity)])
+        self.free_slots = list(range(self.capacity - 1, -1, -1))
+        self.steps = 0
+        self.running = True
+        self.sync()
+
+    def stop(self):
+        """
+        Stop worker process and release shared memory blocks
+        :return: None
+        """
+
+        if not self.running:
+            return
+        self.running = False
+        while not self.ring.push(STOP):
+            time.sleep(.001)
+        try:
+            self.process.wait(1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.values = self.flags = None
+        self.ring.close()
+        self.state.close()
+        self.state = self.ring = self.process = None
+
+    def send(self, command, slot=0, *args):
+        """
+        Send a command to worker process, waiting for the ring to have room
+        :param command: command number
+        :param slot: swarm slot the command is applied to
+        :param args: numerical arguments
+        :return: None
+        """
+
+        while not self.ring.push(command, slot, *args):
+            time.sleep(0)
+
+    def sync(self):
+        """
+        Acquire the frame of worker process having all steps sent so far, waiting for it if not published yet.
+        Called once per frame before updating sprites.
+        :return: None
+        """
+
+        if not self.running:
+            return
+        while True:
+            self.values, self.flags, steps = self.state.acquire()
+            if steps >= self.steps or self.process.poll() is not None:     # Do not wait for a dead worker
+                return
+            time.sleep(0)
+
+    def step(self):
+        """
+        Let worker process move all sprites by a game frame. Called once per frame after updating sprites,
+        so the worker moves them for the next frame while this frame is drawn, and they do not move
+        while the game is paused or rewound.
+        :return: None
+        """
+
+        if self.running:
+            self.send(STEP, 0, 1 / self.fps)
+            self.steps += 1
+
+    def spawn(self, x_pos, y_pos, x_speed, y_speed):
+        """
+        Add a sprite to the swarm
+        :param x_pos: field x position
+        :param y_pos: field y position
+        :param x_speed: x direction speed in pixel/sec
+        :param y_speed: y direction speed in pixel/sec
+        :return: swarm slot of the sprite, None if no slot remains
+        """
+
+        if not self.running or not self.free_slots:
+            return None
+        slot = self.free_slots.pop()
+        tag = self.next_tag
+        self.next_tag += 1
+        self.tags[slot] = tag
+        self.send(SPAWN, slot, x_pos, y_pos, x_speed, y_speed, tag)
+        return slot
+
+    def release(self, slot):
+        """
+        Remove a sprite from the swarm and free its slot
+        :param slot: swarm slot of the sprite
+        :return: None
+        """
+
+        if self.running:
+            self.send(KILL, slot)
+            self.tags[slot] = 0
+            self.free_slots.append(slot)
+
+    def clear(self):
+        """
+        Remove all sprites from the swarm
+        :return: None
+        """
+
+        if self.running:
+            self.send(CLEAR)
+            self.tags[:] = 0
+            self.free_slots = list(range(self.capacity - 1, -1, -1))
+
+    def get_position(self, slot):
+        """
+        Get field position of a sprite in the acquired frame
+        :param slot: swarm slot of the sprite
+        :return: (x, y) field position, None if the spawn command is not simulated yet
+        """
+
+        if self.values is None or self.values[slot, TAG] != self.tags[slot]:
+            return None
+        return float(self.values[slot, X]), float(self.values[slot, Y])
+
+    def get_slot_positions(self, slots):
+        """
+        Get field positions of given sprites in the acquired frame at once
+        :param slots: array of swarm slots
+        :return: ((n, 2) array of field positions, boolean array of whether the spawn command of each is simulated)
+        """
+
+        if self.values is None:
+            return np.zeros((len(slots), 2)), np.zeros(len(slots), bool)
+        return self.values[slots, :2], self.values[slots, TAG] == self.tags[slots]
+
+    def get_positions(self):
+        """
+        Get field positions of all sprites in the acquired frame at once
+        :return: (n, 2) array of field positions, without sprites whose spawn command is not simulated yet
+        """
+
+        if self.values is None:
+            return np.zeros((0, 2))
+        spawned = (self.flags != 0) & (self.values[:, TAG] == self.tags)
+        return self.values[spawned, :2]
+
+
+if __name__ == "__main__":
+    run_worker(sys.argv[1], sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))